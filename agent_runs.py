@@ -0,0 +1,88 @@
+import logging
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+# Constants
+MAX_CONCURRENT_RUNS = 4
+KEEP_FINISHED_SECONDS = 3600
+FINISHED_STATUSES = ("done", "cancelled", "failed")
+
+logger = logging.getLogger(__name__)
+
+# Shared by every Streamlit session of the process: modules are imported once, reruns keep this state
+_pool = ThreadPoolExecutor(max_workers=MAX_CONCURRENT_RUNS, thread_name_prefix="agent-run")
+_runs = {}
+_runs_lock = threading.Lock()
+
+
+# One background pipeline run. Agents are called in order and stream into their step record;
+# cancel() skips the pending agents and stops the in-flight one at its next chunk.
+class AgentRun:
+    def __init__(self, steps: list):
+        self.id = uuid.uuid4().hex[:12]
+        self.steps = [{"header": header, "spinner": spinner, "status": "pending", "content": ""} for header, spinner, _, _ in steps]
+        self.calls = [(agent, message) for _, _, agent, message in steps]
+        self.status = "queued"
+        self.error = None
+        self.finished_at = None
+        self.cancel_event = threading.Event()
+
+    def cancel(self):
+        self.cancel_event.set()
+
+    @property
+    def finished(self) -> bool:
+        return self.status in FINISHED_STATUSES
+
+    def _stream_step(self, step: dict, agent, message: str):
+        stream = agent.run(message=message, stream=True)
+        try:
+            for chunk in stream:
+                if self.cancel_event.is_set():
+                    break
+                if isinstance(chunk.content, str):
+                    step["content"] += chunk.content
+        finally:
+            # Closing the generator drops the model connection, nothing more is generated or billed
+            stream.close()
+
+    def execute(self):
+        self.status = "running"
+        for step, (agent, message) in zip(self.steps, self.calls):
+            if self.cancel_event.is_set() or self.status == "failed":
+                step["status"] = "cancelled"
+                continue
+            step["status"] = "running"
+            try:
+                self._stream_step(step, agent, message)
+                step["status"] = "cancelled" if self.cancel_event.is_set() else "done"
+            except Exception as e:
+                logger.error(f"Processing error: {str(e)}")
+                step["status"] = "failed"
+                self.status, self.error = "failed", str(e)
+        if self.status != "failed":
+            self.status = "cancelled" if self.cancel_event.is_set() else "done"
+        self.finished_at = time.time()
+
+
+def _prune_runs():
+    now = time.time()
+    for run_id in [i for i, run in _runs.items() if run.finished and now - run.finished_at > KEEP_FINISHED_SECONDS]:
+        del _runs[run_id]
+
+
+# steps: (header, spinner text, agent, message) in run order; returns the run ID
+def start_run(steps: list) -> str:
+    run = AgentRun(steps)
+    with _runs_lock:
+        _prune_runs()
+        _runs[run.id] = run
+    _pool.submit(run.execute)
+    return run.id
+
+
+def get_run(run_id: str) -> AgentRun:
+    with _runs_lock:
+        return _runs.get(run_id)
@@ -1,5 +1,5 @@
 from agno.agent import Agent
-from agno.models.google import Gemini
+from llm import default_api_key, gemini_model
 from agno.media import Image as AgnoImage
 from agno.tools.duckduckgo import DuckDuckGoTools
 import streamlit as st
@@ -14,12 +14,12 @@ logging.basicConfig(level=logging.ERROR)
 logger = logging.getLogger(__name__)
 
 # Get API key from Streamlit secrets
-api_key = st.secrets.get("GEMINI_API_KEY")
+api_key = st.secrets.get("GEMINI_API_KEY") or default_api_key()
 
 # Agent initializer
 def initialize_agents(api_key: str) -> tuple[Agent, Agent, Agent, Agent]:
     try:
-        model = Gemini(id="gemini-2.0-flash-exp", api_key=api_key)
+        model = gemini_model("gemini-2.0-flash-exp", api_key)
 
         therapist_agent = Agent(
             model=model,
@@ -1,5 +1,5 @@
 from agno.agent import Agent
-from agno.models.google import Gemini
+from llm import gemini_model, shared_key_pool
 from agno.media import Image as AgnoImage
 from agno.tools.duckduckgo import DuckDuckGoTools
 import streamlit as st
@@ -15,7 +15,7 @@ logger = logging.getLogger(__name__)
 
 def initialize_agents(api_key: str) -> tuple[Agent, Agent, Agent, Agent]:
     try:
-        model = Gemini(id="gemini-2.0-flash-exp", api_key=api_key)
+        model = gemini_model("gemini-2.0-flash-exp", api_key)
 
         therapist_agent = Agent(
             model=model,
@@ -110,6 +110,8 @@ with st.sidebar:
     
     if api_key:
         st.success("API Key provided! ✅")
+    elif len(shared_key_pool()):
+        st.info(f"Using the shared key pool ({len(shared_key_pool())} keys) ✅")
     else:
         st.warning("Please enter your API key to proceed")
         st.markdown("""
@@ -151,10 +153,10 @@ with col2:
 
 # Process button and API key check
 if st.button("নিজের কাছে ফিরে আসুন 💝", type="primary"):
-    if not st.session_state.api_key_input:
+    if not st.session_state.api_key_input and not len(shared_key_pool()):
         st.warning("Please enter your API key in the sidebar first!")
     else:
-        therapist_agent, closure_agent, routine_planner_agent, brutal_honesty_agent = initialize_agents(st.session_state.api_key_input)
+        therapist_agent, closure_agent, routine_planner_agent, brutal_honesty_agent = initialize_agents(st.session_state.api_key_input or None)
         
         if all([therapist_agent, closure_agent, routine_planner_agent, brutal_honesty_agent]):
             if user_input or uploaded_files:
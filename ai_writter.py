@@ -4,7 +4,7 @@ import streamlit as st
 st.set_page_config(page_title="👩‍🎨 ভিঞ্চ গখ", page_icon="👩‍🎨", layout="wide")
 
 from agno.agent import Agent
-from agno.models.google import Gemini
+from llm import default_api_key, gemini_model
 from agno.media import Image as AgnoImage
 from typing import List
 import logging
@@ -16,12 +16,12 @@ logging.basicConfig(level=logging.ERROR)
 logger = logging.getLogger(__name__)
 
 # Get API key securely
-api_key = st.secrets.get("GEMINI_API_KEY")
+api_key = st.secrets.get("GEMINI_API_KEY") or default_api_key()
 
 # Agent initializer
 def initialize_agents(api_key: str) -> tuple:
     try:
-        model = Gemini(id="gemini-2.0-flash-exp", api_key=api_key)
+        model = gemini_model("gemini-2.0-flash-exp", api_key)
 
         idea_agent = Agent(
             model=model,
@@ -0,0 +1,135 @@
+# Load test of api_service.py against stubbed agents, no Gemini calls or API key needed:
+#   python api_loadtest.py --requests 200 --concurrency 50 --latency 0.2 --stream
+# Every stub call sleeps --latency seconds, so the numbers show the service overhead and how
+# well concurrent requests overlap, not model speed. The service runs in-process under uvicorn
+# and is driven over real HTTP, so SSE first-byte times are measured as a client sees them.
+import argparse
+import asyncio
+import tempfile
+import time
+
+import httpx
+import uvicorn
+
+import response_cache
+from api_service import AgentRegistry, create_app
+from breakup_agents import BREAKUP_AGENT_SPECS
+from leet_agents import AGENT_SPECS
+
+# Constants
+STUB_ANSWER = "This is a stubbed answer streamed in small chunks to exercise the pipeline end to end."
+STUB_CHUNKS = 8
+
+
+class StubResponse:
+    def __init__(self, content: str):
+        self.content = content
+        self.metrics = {}
+
+
+# Same run/arun surface as an agno Agent, answers after a fixed delay
+class StubAgent:
+    def __init__(self, name: str, latency: float):
+        self.name = name
+        self.latency = latency
+
+    def run(self, message: str = None, **kwargs) -> StubResponse:
+        time.sleep(self.latency)
+        return StubResponse(STUB_ANSWER)
+
+    async def arun(self, message: str = None, stream: bool = False, **kwargs):
+        if stream:
+            return self._stream()
+        await asyncio.sleep(self.latency)
+        return StubResponse(STUB_ANSWER)
+
+    async def _stream(self):
+        words = STUB_ANSWER.split(" ")
+        size = -(-len(words) // STUB_CHUNKS)
+        for i in range(0, len(words), size):
+            await asyncio.sleep(self.latency / STUB_CHUNKS)
+            yield StubResponse(" ".join(words[i:i + size]) + " ")
+
+
+def stub_registry(latency: float) -> AgentRegistry:
+    return AgentRegistry({
+        "breakup": lambda api_key: [StubAgent(name, latency) for _, name, _, _, _, _ in BREAKUP_AGENT_SPECS],
+        "leetcode": lambda api_key: [StubAgent(name, latency) for name, _ in AGENT_SPECS],
+    })
+
+
+def request_body(endpoint: str, i: int, stream: bool) -> dict:
+    if endpoint == "/breakup":
+        return {"message": f"Load test message {i}", "stream": stream}
+    # Unique problems, nothing is served from the index or the response cache
+    return {"problem": f"Load test problem {i}: return the sum of two integers a and b.", "stream": stream}
+
+
+async def one_request(client: httpx.AsyncClient, endpoint: str, body: dict) -> dict:
+    started = time.perf_counter()
+    first_byte = None
+    async with client.stream("POST", endpoint, json=body) as response:
+        async for _ in response.aiter_bytes():
+            if first_byte is None:
+                first_byte = time.perf_counter() - started
+        ok = response.status_code == 200
+    return {"ok": ok, "latency": time.perf_counter() - started, "first_byte": first_byte or 0.0}
+
+
+def _percentile(values: list, q: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, max(0, round(q * len(ordered)) - 1))]
+
+
+async def load_test(args) -> dict:
+    app = create_app(stub_registry(args.latency))
+    server = uvicorn.Server(uvicorn.Config(app, host="127.0.0.1", port=args.port, log_level="warning"))
+    serving = asyncio.create_task(server.serve())
+    while not server.started:
+        await asyncio.sleep(0.01)
+
+    semaphore = asyncio.Semaphore(args.concurrency)
+    limits = httpx.Limits(max_connections=args.concurrency, max_keepalive_connections=args.concurrency)
+    async with httpx.AsyncClient(base_url=f"http://127.0.0.1:{args.port}", headers={"X-Gemini-Key": "stub"}, limits=limits, timeout=None) as client:
+        async def limited(i):
+            async with semaphore:
+                return await one_request(client, args.endpoint, request_body(args.endpoint, i, args.stream))
+
+        started = time.perf_counter()
+        results = await asyncio.gather(*(limited(i) for i in range(args.requests)))
+        elapsed = time.perf_counter() - started
+        service = (await client.get("/metrics")).json()
+    server.should_exit = True
+    await serving
+    return {"results": results, "elapsed": elapsed, "service": service}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Throughput of the agent service with stubbed model calls.")
+    parser.add_argument("--endpoint", default="/breakup", choices=["/breakup", "/leetcode/solve"], help="Pipeline to load")
+    parser.add_argument("--requests", type=int, default=200, help="Total requests sent")
+    parser.add_argument("--concurrency", type=int, default=50, help="Requests in flight at once")
+    parser.add_argument("--latency", type=float, default=0.2, help="Seconds every stubbed agent call takes")
+    parser.add_argument("--stream", action="store_true", help="Request SSE streaming instead of JSON")
+    parser.add_argument("--port", type=int, default=8765, help="Local port the service is started on")
+    args = parser.parse_args()
+
+    # Stubbed answers must not end up in the real response cache
+    response_cache.CACHE_DIR = tempfile.mkdtemp(prefix="loadtest_cache_")
+    run = asyncio.run(load_test(args))
+    results = run["results"]
+    latencies = [r["latency"] for r in results]
+    first_bytes = [r["first_byte"] for r in results]
+    failed = sum(not r["ok"] for r in results)
+    serial = 4 * args.latency
+
+    print(f"{args.endpoint} {'SSE' if args.stream else 'JSON'}: {len(results)} requests, concurrency {args.concurrency}, {args.latency:.2f}s per agent call")
+    print(f"  throughput: {len(results) / run['elapsed']:.1f} req/s in {run['elapsed']:.2f}s (one request at a time: {1 / serial:.1f} req/s)")
+    print(f"  latency:    p50={_percentile(latencies, 0.5):.3f}s p95={_percentile(latencies, 0.95):.3f}s max={max(latencies):.3f}s (4 agent calls = {serial:.2f}s)")
+    print(f"  first byte: p50={_percentile(first_bytes, 0.5):.3f}s p95={_percentile(first_bytes, 0.95):.3f}s")
+    print(f"  failures:   {failed}")
+    print(f"  agent sets built: {run['service']['agent_sets']}")
+
+
+if __name__ == "__main__":
+    main()
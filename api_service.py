@@ -0,0 +1,344 @@
+# Headless HTTP service for the agent pipelines, no Streamlit session or rerun involved:
+#   uvicorn api_service:app --port 8000
+# Every POST endpoint answers with JSON, or with Server-Sent Events when the body has "stream": true.
+# The Gemini key comes from the body, the X-Gemini-Key header or GEMINI_API_KEY / .streamlit/secrets.toml.
+import asyncio
+import base64
+import json
+import threading
+import time
+from collections import OrderedDict, defaultdict, deque
+from contextlib import asynccontextmanager
+from typing import List, Optional
+
+from agno.media import Image as AgnoImage
+from fastapi import FastAPI, Header, HTTPException
+from fastapi.responses import StreamingResponse
+from pydantic import BaseModel
+
+from breakup_agents import BREAKUP_AGENT_SPECS, create_breakup_agents, breakup_prompt
+from code_sandbox import sandbox_isolated
+from dom_fingerprint import dom_fingerprint, load_scraper_cache, save_scraper_cache, lookup_cached_scraper, store_cached_scraper
+from leet_agents import ANALYSIS_VERSION, SECTIONS, build_context, create_agents, load_api_key
+from llm import rate_limit_gauges
+from model_tiers import model_metrics
+from problem_index import load_problem_index
+from response_cache import cache_key, load_cached, store_cached
+from review_pipeline import REVIEW_STEPS, create_review_agents, prepare_review, review_outcome
+from scraper_agent import create_scraper_agent, build_scraper_prompt
+from scraper_library import load_scraper_library, save_scraper_library, parse_scraper_result
+
+# Constants
+LATENCY_WINDOW = 1000
+LIBRARY_THRESHOLD = 0.9
+# Distinct (pipeline, API key) pairs holding idle agent sets; the least recently leased pair is dropped past this
+MAX_AGENT_KEYS = 256
+
+PIPELINE_FACTORIES = {
+    "breakup": create_breakup_agents,
+    "leetcode": create_agents,
+    "review": create_review_agents,
+    "scraper": create_scraper_agent,
+}
+
+
+# Agent sets per (pipeline, API key), built once and reused across requests. Agno agents keep
+# per-run state, so a set is leased to one request at a time; all sets share one client per key.
+# Callers may send any key, so only the MAX_AGENT_KEYS most recently used pairs keep their sets.
+class AgentRegistry:
+    def __init__(self, factories: dict = None):
+        self.factories = factories or PIPELINE_FACTORIES
+        self.idle = OrderedDict()
+        self.created = defaultdict(int)
+
+    def _idle_sets(self, pipeline: str, api_key: str) -> list:
+        idle = self.idle.setdefault((pipeline, api_key), [])
+        self.idle.move_to_end((pipeline, api_key))
+        while len(self.idle) > MAX_AGENT_KEYS:
+            self.idle.popitem(last=False)
+        return idle
+
+    @asynccontextmanager
+    async def lease(self, pipeline: str, api_key: str):
+        idle = self._idle_sets(pipeline, api_key)
+        if idle:
+            agents = idle.pop()
+        else:
+            agents = self.factories[pipeline](api_key)
+            self.created[pipeline] += 1
+        try:
+            yield agents
+        finally:
+            idle.append(agents)
+
+    def stats(self) -> dict:
+        idle = defaultdict(int)
+        for (pipeline, _), sets in self.idle.items():
+            idle[pipeline] += len(sets)
+        return {pipeline: {"created": count, "idle": idle[pipeline]} for pipeline, count in self.created.items()}
+
+
+# Request counters and recent latencies per pipeline
+class ServiceMetrics:
+    def __init__(self):
+        self.started = time.time()
+        self.requests = defaultdict(int)
+        self.failures = defaultdict(int)
+        self.in_flight = defaultdict(int)
+        self.latency = defaultdict(lambda: deque(maxlen=LATENCY_WINDOW))
+
+    def record(self, pipeline: str, seconds: float, failed: bool):
+        self.failures[pipeline] += failed
+        self.latency[pipeline].append(seconds)
+
+    def snapshot(self) -> dict:
+        pipelines = {}
+        for pipeline, count in self.requests.items():
+            values = sorted(self.latency[pipeline])
+            pick = lambda q: round(values[min(len(values) - 1, int(q * len(values)))], 3) if values else None
+            pipelines[pipeline] = {
+                "requests": count,
+                "failures": self.failures[pipeline],
+                "in_flight": self.in_flight[pipeline],
+                "latency_p50_s": pick(0.5),
+                "latency_p95_s": pick(0.95),
+            }
+        return {"uptime_s": round(time.time() - self.started), "pipelines": pipelines}
+
+
+# Request bodies
+class BreakupRequest(BaseModel):
+    message: str = ""
+    images: List[str] = []
+    stream: bool = False
+    api_key: Optional[str] = None
+
+
+class LeetCodeRequest(BaseModel):
+    problem: str
+    difficulty: str = "Unknown"
+    language: str = "Python"
+    use_index: bool = True
+    stream: bool = False
+    api_key: Optional[str] = None
+
+
+class ReviewRequest(BaseModel):
+    problem: str
+    code: str
+    language: str = "Python"
+    difficulty: str = "Unknown"
+    stream: bool = False
+    api_key: Optional[str] = None
+
+
+class ScraperRequest(BaseModel):
+    html: str
+    goal: str
+    url: str = ""
+    use_cache: bool = True
+    stream: bool = False
+    api_key: Optional[str] = None
+
+
+# Agent output as text deltas: token chunks when streaming, the whole answer otherwise
+async def agent_text(agent, message: str, stream: bool, images=None):
+    if stream:
+        async for chunk in await agent.arun(message, stream=True, images=images):
+            if isinstance(chunk.content, str) and chunk.content:
+                yield chunk.content
+    else:
+        response = await agent.arun(message, images=images)
+        yield response.content or ""
+
+
+def _event(name: str, data: dict) -> str:
+    return f"event: {name}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n"
+
+
+def create_app(registry: AgentRegistry = None) -> FastAPI:
+    app = FastAPI(title="Dr_Broke agent service")
+    registry = registry or AgentRegistry()
+    metrics = ServiceMetrics()
+    default_key = load_api_key()
+    problem_index = load_problem_index()
+    scraper_cache = load_scraper_cache()
+    scraper_library = load_scraper_library()
+    # Scraper cache and library are read and updated from worker threads
+    scraper_lock = threading.Lock()
+
+    def require_key(body_key: Optional[str], header_key: Optional[str]) -> str:
+        api_key = body_key or header_key or default_key
+        if not api_key:
+            raise HTTPException(status_code=401, detail="Gemini API key missing: pass api_key, the X-Gemini-Key header or set GEMINI_API_KEY")
+        return api_key
+
+    # A pipeline is an async generator of (event, data) pairs: "meta", "section" and "delta" events.
+    # Streaming forwards them as SSE, otherwise they are folded into one JSON document.
+    async def respond(pipeline: str, events, stream: bool):
+        metrics.requests[pipeline] += 1
+        metrics.in_flight[pipeline] += 1
+        started = time.perf_counter()
+
+        def finish(failed: bool):
+            metrics.in_flight[pipeline] -= 1
+            metrics.record(pipeline, time.perf_counter() - started, failed)
+
+        if stream:
+            async def sse():
+                failed = False
+                try:
+                    async for name, data in events:
+                        yield _event(name, data)
+                except Exception as e:
+                    failed = True
+                    yield _event("error", {"detail": str(e)})
+                finally:
+                    # Also runs on a client disconnect, the agent lease goes back to the registry
+                    await events.aclose()
+                    finish(failed)
+                yield _event("done", {"elapsed_s": round(time.perf_counter() - started, 3)})
+
+            return StreamingResponse(sse(), media_type="text/event-stream", headers={"Cache-Control": "no-cache"})
+
+        result = {"sections": {}}
+        try:
+            async for name, data in events:
+                if name == "delta":
+                    result["sections"][data["key"]] = result["sections"].get(data["key"], "") + data["text"]
+                elif name == "meta":
+                    result.update(data)
+        except Exception as e:
+            finish(True)
+            raise HTTPException(status_code=502, detail=f"Pipeline failed: {e}")
+        finish(False)
+        result["elapsed_s"] = round(time.perf_counter() - started, 3)
+        return result
+
+    # Four-agent breakup recovery pipeline (app.py)
+    async def breakup_events(request: BreakupRequest, api_key: str):
+        images = [AgnoImage(content=base64.b64decode(image)) for image in request.images] or None
+        async with registry.lease("breakup", api_key) as agents:
+            for agent, (key, _, _, _, _, header) in zip(agents, BREAKUP_AGENT_SPECS):
+                yield "section", {"key": key, "header": header}
+                async for text in agent_text(agent, breakup_prompt(key, request.message), request.stream, images):
+                    yield "delta", {"key": key, "text": text}
+
+    # Four-call LeetCode pipeline (leet.py): precomputed index, then the response cache, then the agents
+    async def leetcode_events(request: LeetCodeRequest, api_key: str):
+        if request.use_index:
+            indexed, score = await asyncio.to_thread(problem_index.match, request.problem)
+            precomputed = await asyncio.to_thread(problem_index.analysis, indexed, request.language, ANALYSIS_VERSION) if indexed else None
+            if precomputed:
+                yield "meta", {"source": "index", "problem_id": indexed["id"], "similarity": score}
+                for key, _, header, _ in SECTIONS:
+                    yield "section", {"key": key, "header": header}
+                    yield "delta", {"key": key, "text": precomputed["sections"].get(key, "")}
+                return
+
+        _, context = await asyncio.to_thread(build_context, request.problem, request.difficulty, request.language)
+        yield "meta", {"source": "agents"}
+        async with registry.lease("leetcode", api_key) as agents:
+            for agent, (key, _, header, prefix) in zip(agents, SECTIONS):
+                yield "section", {"key": key, "header": header}
+                message = f"{prefix}{context}"
+                entry_key = cache_key(ANALYSIS_VERSION, agent.name, message)
+                cached = await asyncio.to_thread(load_cached, entry_key) if request.use_index else None
+                if cached:
+                    yield "delta", {"key": key, "text": cached["content"]}
+                    continue
+                parts = []
+                async for text in agent_text(agent, message, request.stream):
+                    parts.append(text)
+                    yield "delta", {"key": key, "text": text}
+                await asyncio.to_thread(store_cached, entry_key, "".join(parts), agent=agent.name, version=ANALYSIS_VERSION)
+
+    # Five-agent code review (leetdoc.py); steps mix agent calls and local sandbox runs, so they
+    # run in worker threads and stream one whole section at a time. Code sent over HTTP only runs
+    # locally when the sandbox is isolated from the network and the filesystem (bubblewrap).
+    async def review_events(request: ReviewRequest, api_key: str):
+        review = await asyncio.to_thread(prepare_review, request.problem, request.code, request.language, request.difficulty, run_code=sandbox_isolated())
+        async with registry.lease("review", api_key) as agents:
+            for key, _, step in REVIEW_STEPS:
+                await asyncio.to_thread(step, review, agents)
+                if review["session"].get(key):
+                    content = review["session"][key]
+                    yield "section", {"key": key}
+                    yield "delta", {"key": key, "text": content if isinstance(content, str) else json.dumps(content)}
+        yield "meta", review_outcome(review["session"])
+
+    def lookup_scraper(request: ScraperRequest):
+        fingerprint = dom_fingerprint(request.html)
+        if not request.use_cache:
+            return fingerprint, None, None, 0.0
+        with scraper_lock:
+            cached = lookup_cached_scraper(scraper_cache, fingerprint, request.goal)
+            match, similarity = scraper_library.lookup(request.html, request.goal, request.url)
+        return fingerprint, cached, match, similarity
+
+    def store_scraper(request: ScraperRequest, fingerprint: str, result: str):
+        with scraper_lock:
+            store_cached_scraper(scraper_cache, fingerprint, request.goal, request.url, result)
+            scraper_library.add(request.html, request.goal, request.url, result)
+            save_scraper_cache(dict(scraper_cache))
+            save_scraper_library(scraper_library)
+
+    # Scraper builder (selenium2_0.py): same DOM template cache and scraper library as the batch job
+    async def scraper_events(request: ScraperRequest, api_key: str):
+        fingerprint, cached, match, similarity = await asyncio.to_thread(lookup_scraper, request)
+        if cached:
+            source, result = {"source": "cache", "fingerprint": fingerprint}, cached["result"]
+        elif match and similarity >= LIBRARY_THRESHOLD:
+            source, result = {"source": "library", "fingerprint": fingerprint, "similarity": similarity}, match["result"]
+        else:
+            source, result = None, None
+
+        yield "section", {"key": "scraper"}
+        if result:
+            yield "meta", source
+            yield "delta", {"key": "scraper", "text": result}
+        else:
+            yield "meta", {"source": "agent", "fingerprint": fingerprint}
+            parts = []
+            async with registry.lease("scraper", api_key) as agent:
+                async for text in agent_text(agent, build_scraper_prompt(request.html, request.goal, request.url), request.stream):
+                    parts.append(text)
+                    yield "delta", {"key": "scraper", "text": text}
+            result = "".join(parts)
+            await asyncio.to_thread(store_scraper, request, fingerprint, result)
+        yield "meta", {"code": parse_scraper_result(result)["code"]}
+
+    @app.post("/breakup")
+    async def breakup(request: BreakupRequest, x_gemini_key: Optional[str] = Header(None)):
+        if not request.message.strip() and not request.images:
+            raise HTTPException(status_code=422, detail="Send a message or at least one image")
+        api_key = require_key(request.api_key, x_gemini_key)
+        return await respond("breakup", breakup_events(request, api_key), request.stream)
+
+    @app.post("/leetcode/solve")
+    async def leetcode_solve(request: LeetCodeRequest, x_gemini_key: Optional[str] = Header(None)):
+        api_key = require_key(request.api_key, x_gemini_key)
+        return await respond("leetcode", leetcode_events(request, api_key), request.stream)
+
+    @app.post("/leetcode/review")
+    async def leetcode_review(request: ReviewRequest, x_gemini_key: Optional[str] = Header(None)):
+        api_key = require_key(request.api_key, x_gemini_key)
+        return await respond("review", review_events(request, api_key), request.stream)
+
+    @app.post("/scraper")
+    async def scraper(request: ScraperRequest, x_gemini_key: Optional[str] = Header(None)):
+        api_key = require_key(request.api_key, x_gemini_key)
+        return await respond("scraper", scraper_events(request, api_key), request.stream)
+
+    @app.get("/health")
+    async def health():
+        return {"status": "ok", "api_key_configured": bool(default_key), "sandbox_isolated": sandbox_isolated()}
+
+    @app.get("/metrics")
+    async def service_metrics():
+        return {**metrics.snapshot(), "agent_sets": registry.stats(), "rate_limit": rate_limit_gauges(), "models": model_metrics()}
+
+    return app
+
+
+app = create_app()
@@ -1,12 +1,15 @@
 from agno.agent import Agent
-from agno.models.google import Gemini
 from agno.media import Image as AgnoImage
-from agno.tools.duckduckgo import DuckDuckGoTools
+from breakup_agents import BREAKUP_AGENT_SPECS, BREAKUP_VERSION, create_breakup_agents, breakup_prompt
+from checkpoints import request_hash, load_checkpoint, save_checkpoint, retry_step
+from deadline import PENDING_MARKDOWN, DeadlineExceeded, deadline
+from llm import shared_key_pool
 import streamlit as st
 from typing import List
 import logging
 from pathlib import Path
 import tempfile
+import hashlib
 import os
 
 # Configure logging
@@ -16,67 +19,7 @@ logger = logging.getLogger(__name__)
 # Agent initializer
 def initialize_agents(api_key: str) -> tuple[Agent, Agent, Agent, Agent]:
     try:
-        model = Gemini(id="gemini-2.0-flash-exp", api_key=api_key)
-
-        therapist_agent = Agent(
-            model=model,
-            name="Therapist Agent",
-            instructions=[
-                "তুমি একজন সহানুভূতিশীল থেরাপিস্ট। তোমার কাজ হলো:",
-                "১। মনোযোগ দিয়ে শুনে অনুভূতিগুলোর প্রতি সহানুভূতি প্রকাশ করা",
-                "২। হালকা ও মজার রসিকতার মাধ্যমে মানসিক চাপ কমানো",
-                "৩। নিজের সম্পর্কের অভিজ্ঞতা থেকে relatable গল্প শেয়ার করা",
-                "৪। সান্ত্বনা ও সাহস জোগানোর মতো কথা বলা",
-                "৫। ব্যবহারকারীর লেখা এবং ছবির আবেগ বিশ্লেষণ করা",
-                "উত্তর শুধুমাত্র বাংলা ভাষায় দাও। সহানুভূতির সাথে কথা বলো।"
-            ],
-            markdown=True
-        )
-
-        closure_agent = Agent(
-            model=model,
-            name="Closure Agent",
-            instructions=[
-                "তুমি একজন আবেগিক ক্লোজার বিশেষজ্ঞ। তোমার কাজ হলো:",
-                "১। অপাঠানো আবেগময় বার্তা লেখায় সাহায্য করা",
-                "২। কাঁচা এবং সততার সাথে আবেগ প্রকাশের সুযোগ তৈরি করা",
-                "৩। বার্তাগুলো সুন্দরভাবে হেডিং সহ সাজিয়ে উপস্থাপন করা",
-                "৪। মন থেকে বিদায় জানানোর প্রক্রিয়া ও সহায়ক অভ্যাসের পরামর্শ দেওয়া",
-                "উত্তর অবশ্যই বাংলা ভাষায় দেবে। হৃদয়ের গভীরতা ও আন্তরিকতা বজায় রেখো।"
-            ],
-            markdown=True
-        )
-
-        routine_planner_agent = Agent(
-            model=model,
-            name="Routine Planner Agent",
-            instructions=[
-                "তুমি একজন রিকভারি রুটিন পরিকল্পক। তোমার দায়িত্ব হলো:",
-                "১। ৭ দিনের রিকভারি চ্যালেঞ্জ তৈরি করা",
-                "২। প্রতিদিনের মজার ও যত্নমূলক কাজের তালিকা দেওয়া",
-                "৩। সোশ্যাল মিডিয়া ডিটক্সের কার্যকরী উপায় দেওয়া",
-                "৪। মন ভালো করার মতো প্লেলিস্ট সাজানো",
-                "উত্তর সবসময় বাংলায় দাও। বাস্তবসম্মত ও অনুপ্রেরণামূলক পরিকল্পনা তৈরি করো।"
-            ],
-            markdown=True
-        )
-
-        brutal_honesty_agent = Agent(
-            model=model,
-            name="Brutal Honesty Agent",
-            tools=[DuckDuckGoTools()],
-            instructions=[
-                "তুমি একজন নির্মমভাবে সত্যান্বেষী বিশ্লেষক। তোমার কাজ:",
-                "১। সম্পর্ক ভেঙে যাওয়ার খোলামেলা ও অকপট বিশ্লেষণ দেওয়া",
-                "২। কেন সম্পর্কটা কাজ করেনি, সেটা বাস্তবভাবে বোঝানো",
-                "৩। চিন্তাভাবনা উদ্দীপক এবং কঠোর কিন্তু গঠনমূলক ভাষায় কথা বলা",
-                "৪। সামনে এগিয়ে যাওয়ার জন্য কার্যকরী পরামর্শ দেওয়া",
-                "উত্তর সবসময় বাংলা ভাষায় হওয়া উচিত। কোনো ধরনের সাজসজ্জা বা চিনি মেশানো কথা নয়।"
-            ],
-            markdown=True
-        )
-
-        return therapist_agent, closure_agent, routine_planner_agent, brutal_honesty_agent
+        return tuple(create_breakup_agents(api_key))
     except Exception as e:
         st.error(f"Error initializing agents: {str(e)}")
         return None, None, None, None
@@ -104,6 +47,8 @@ with st.sidebar:
 
     if api_key:
         st.success("API Key provided! ✅")
+    elif len(shared_key_pool()):
+        st.info(f"Using the shared key pool ({len(shared_key_pool())} keys) ✅")
     else:
         st.warning("Please enter your API key to proceed")
         st.markdown("""
@@ -146,43 +91,48 @@ def process_images(files) -> List[AgnoImage]:
 
 # Submit button
 if st.button("নিজের কাছে ফিরে আসো 💝", type="primary"):
-    if not st.session_state.api_key_input:
+    if not st.session_state.api_key_input and not len(shared_key_pool()):
         st.warning("Please enter your API key in the sidebar first!")
     else:
-        agents = initialize_agents(st.session_state.api_key_input)
+        agents = initialize_agents(st.session_state.api_key_input or None)
         if all(agents):
-            therapist_agent, closure_agent, routine_planner_agent, brutal_honesty_agent = agents
             if user_input or uploaded_files:
-                try:
-                    all_images = process_images(uploaded_files) if uploaded_files else []
-
-                    with st.spinner("🤗 তোমাকে নিয়ে ভাবছি..."):
-                        therapist_prompt = f"""User's message: {user_input}\nProvide a compassionate response."""
-                        response = therapist_agent.run(message=therapist_prompt, images=all_images)
-                        st.subheader("🤗 তোমার কথা শুনে যা বুঝলাম")
-                        st.markdown(response.content)
-
-                    with st.spinner("✍️ তোমাকে নিয়ে ভেবে যা পেলাম..."):
-                        closure_prompt = f"""User's feelings: {user_input}\nHelp write unsent messages and provide closure tips."""
-                        response = closure_agent.run(message=closure_prompt, images=all_images)
-                        st.subheader("✍️ আসলে এই সময়ে যা করতে পারো")
-                        st.markdown(response.content)
-
-                    with st.spinner("📅 এই সময়ে যা যা করতে পারো তাই নিয়ে ভাবলাম..."):
-                        routine_prompt = f"""Based on: {user_input}\nCreate a 7-day recovery plan."""
-                        response = routine_planner_agent.run(message=routine_prompt, images=all_images)
-                        st.subheader("📅 যেভাবে ফিরে আসবে")
-                        st.markdown(response.content)
-
-                    with st.spinner("💪 একটা বাস্তবসম্মত প্ল্যান দিচ্ছি..."):
-                        honesty_prompt = f"""Situation: {user_input}\nGive brutally honest but constructive advice."""
-                        response = brutal_honesty_agent.run(message=honesty_prompt, images=all_images)
-                        st.subheader("💪 মন খারাপ না করে হাসো ")
-                        st.markdown(response.content)
-
-                except Exception as e:
-                    logger.error(f"Error during analysis: {str(e)}")
-                    st.error("An error occurred during analysis. Please check the logs for details.")
+                all_images = process_images(uploaded_files) if uploaded_files else []
+                # Each section is saved as soon as it is done; pressing the button again for the same
+                # text and screenshots only runs the sections still missing
+                request = request_hash(BREAKUP_VERSION, user_input, [hashlib.sha256(f.getvalue()).hexdigest() for f in uploaded_files or []])
+                pending, failed = 0, 0
+
+                # One time budget for all four agents, whatever is left over shows as pending
+                with deadline() as budget:
+                    for agent, (key, _, _, _, spinner, header) in zip(agents, BREAKUP_AGENT_SPECS):
+                        with st.spinner(spinner):
+                            st.subheader(header)
+                            content = load_checkpoint(request, key)
+                            if content is None:
+                                message = breakup_prompt(key, user_input)
+                                try:
+                                    prompt = budget.budgeted(message)
+                                    content = retry_step(lambda: agent.run(message=prompt, images=all_images).content)
+                                    # A shortened answer is shown but not kept, the retry asks for the full one
+                                    if prompt == message:
+                                        save_checkpoint(request, key, content)
+                                except DeadlineExceeded:
+                                    pending += 1
+                                    st.markdown(PENDING_MARKDOWN)
+                                    continue
+                                except Exception as e:
+                                    # One failing agent does not take the other sections down with it
+                                    logger.error(f"Error in {key} agent: {str(e)}")
+                                    failed += 1
+                                    st.error("❌ This section could not be generated. Press the button again to retry it.")
+                                    continue
+                            st.markdown(content)
+
+                if pending:
+                    st.info(f"⏳ {pending} section(s) did not fit in the {budget.seconds:.0f}s budget. Press the button again to retry.")
+                if failed:
+                    st.warning(f"⚠️ {failed} section(s) failed. The finished ones are saved, retrying only runs the rest.")
             else:
                 st.warning("Please share your feelings or upload screenshots to get help.")
         else:
@@ -9,8 +9,9 @@ st.set_page_config(
 )
 
 from agno.agent import Agent
-from agno.models.google import Gemini
+from llm import default_api_key, gemini_model
 from agno.media import Image as AgnoImage
+from agent_runs import AgentRun, start_run, get_run
 from typing import List
 import logging
 import tempfile
@@ -21,12 +22,12 @@ logging.basicConfig(level=logging.ERROR)
 logger = logging.getLogger(__name__)
 
 # Get API key securely
-api_key = st.secrets.get("GEMINI_API_KEY")
+api_key = st.secrets.get("GEMINI_API_KEY") or default_api_key()
 
 # Agent initializer with expertly crafted prompts
 def initialize_agents(api_key: str) -> tuple:
     try:
-        model = Gemini(id="gemini-2.0-flash-exp", api_key=api_key)
+        model = gemini_model("gemini-2.0-flash-exp", api_key)
 
         senior_developer = Agent(
             model=model,
@@ -134,6 +135,60 @@ def initialize_agents(api_key: str) -> tuple:
         st.error(f"Error initializing agents: {str(e)}")
         return None, None, None, None
 
+# Question type routes: agent index, spinner text, header
+SINGLE_EXPERT_ROUTES = {
+    "Software Development & Architecture": (0, "🏗️ Senior Developer analyzing your challenge...", "🏗️ Senior Software Developer Analysis"),
+    "AI Agent System Design": (1, "🤖 AI Agent Architect designing your system...", "🤖 AI Agent Architecture Recommendations"),
+    "System Design & Scalability": (2, "🏢 System Designer creating architecture...", "🏢 System Design & Architecture"),
+    "Open Source AI Contribution": (3, "🌟 Open Source Expert providing guidance...", "🌟 Open Source Contribution Strategy"),
+}
+
+# Comprehensive Analysis: (spinner text, header) per agent, in run order
+COMPREHENSIVE_STEPS = [
+    ("🏗️ Senior Developer analyzing...", "🏗️ Senior Developer Perspective"),
+    ("🤖 AI Agent Architect designing...", "🤖 AI Agent Architecture Insights"),
+    ("🏢 System Designer architecting...", "🏢 System Design Recommendations"),
+    ("🌟 Open Source Expert advising...", "🌟 Open Source Strategy"),
+]
+
+if "architect_run" not in st.session_state:
+    st.session_state.architect_run = None
+
+
+# View of a background run: its Cancel control while it goes, its outcome once it is finished
+def render_run(run: AgentRun):
+    if not run.finished:
+        if st.button("⛔ Cancel", help="Stop the agent that is answering and skip the ones still waiting", disabled=run.cancel_event.is_set()):
+            run.cancel()
+        if run.status == "queued":
+            st.info("⏳ Waiting for a free worker...")
+    elif run.status == "cancelled":
+        skipped = sum(step["status"] == "cancelled" for step in run.steps)
+        st.warning(f"⛔ Analysis cancelled, {skipped} of {len(run.steps)} agents stopped or skipped.")
+    elif run.status == "failed":
+        st.error("⚠️ An error occurred during analysis. Please try again.")
+
+    shown = [step for step in run.steps if step["content"] or step["status"] == "running"]
+    for i, step in enumerate(shown):
+        if step["status"] == "running" and not run.cancel_event.is_set():
+            st.caption(step["spinner"])
+        st.subheader(step["header"])
+        st.markdown(step["content"] + (" _(stopped)_" if step["status"] == "cancelled" else ""))
+        if i < len(shown) - 1:
+            st.markdown("---")
+
+
+# Refreshed every second without rerunning the page; one full rerun once the run finishes, after
+# which the final state is drawn outside the fragment and nothing polls any more
+@st.fragment(run_every=1)
+def render_live_run(run_id: str):
+    run = get_run(run_id)
+    if run and run.finished:
+        st.rerun()
+    if run:
+        render_run(run)
+
+
 # Main UI
 st.markdown("# 🚀 Senior Software Developer AI Assistant")
 st.markdown("### Your AI-Powered Technical Mentor & Architect")
@@ -267,58 +322,14 @@ if st.button("🚀 Get Expert Analysis", type="primary"):
                 Project Scale: {project_scale}
                 """
 
-                # Route to appropriate agent(s)
-                if question_type == "Software Development & Architecture":
-                    with st.spinner("🏗️ Senior Developer analyzing your challenge..."):
-                        response = senior_developer.run(message=context)
-                        st.subheader("🏗️ Senior Software Developer Analysis")
-                        st.markdown(response.content)
-
-                elif question_type == "AI Agent System Design":
-                    with st.spinner("🤖 AI Agent Architect designing your system..."):
-                        response = ai_agent_architect.run(message=context)
-                        st.subheader("🤖 AI Agent Architecture Recommendations")
-                        st.markdown(response.content)
-
-                elif question_type == "System Design & Scalability":
-                    with st.spinner("🏢 System Designer creating architecture..."):
-                        response = system_designer.run(message=context)
-                        st.subheader("🏢 System Design & Architecture")
-                        st.markdown(response.content)
-
-                elif question_type == "Open Source AI Contribution":
-                    with st.spinner("🌟 Open Source Expert providing guidance..."):
-                        response = opensource_contributor.run(message=context)
-                        st.subheader("🌟 Open Source Contribution Strategy")
-                        st.markdown(response.content)
-
+                # Route to appropriate agent(s), the run continues in the background until done or cancelled
+                agents = [senior_developer, ai_agent_architect, system_designer, opensource_contributor]
+                if question_type in SINGLE_EXPERT_ROUTES:
+                    index, spinner, header = SINGLE_EXPERT_ROUTES[question_type]
+                    steps = [(header, spinner, agents[index], context)]
                 else:  # Comprehensive Analysis
-                    # Senior Developer Analysis
-                    with st.spinner("🏗️ Senior Developer analyzing..."):
-                        response = senior_developer.run(message=context)
-                        st.subheader("🏗️ Senior Developer Perspective")
-                        st.markdown(response.content)
-                        st.markdown("---")
-
-                    # AI Agent Architect Analysis
-                    with st.spinner("🤖 AI Agent Architect designing..."):
-                        response = ai_agent_architect.run(message=context)
-                        st.subheader("🤖 AI Agent Architecture Insights")
-                        st.markdown(response.content)
-                        st.markdown("---")
-
-                    # System Designer Analysis
-                    with st.spinner("🏢 System Designer architecting..."):
-                        response = system_designer.run(message=context)
-                        st.subheader("🏢 System Design Recommendations")
-                        st.markdown(response.content)
-                        st.markdown("---")
-
-                    # Open Source Contributor Guidance
-                    with st.spinner("🌟 Open Source Expert advising..."):
-                        response = opensource_contributor.run(message=context)
-                        st.subheader("🌟 Open Source Strategy")
-                        st.markdown(response.content)
+                    steps = [(header, spinner, agent, context) for agent, (spinner, header) in zip(agents, COMPREHENSIVE_STEPS)]
+                st.session_state.architect_run = start_run(steps)
 
             except Exception as e:
                 logger.error(f"Processing error: {str(e)}")
@@ -326,6 +337,13 @@ if st.button("🚀 Get Expert Analysis", type="primary"):
         else:
             st.error("⚠️ Agents failed to initialize. Please check your API key.")
 
+if st.session_state.architect_run:
+    run = get_run(st.session_state.architect_run)
+    if run and run.finished:
+        render_run(run)
+    elif run:
+        render_live_run(st.session_state.architect_run)
+
 # Expert Tips Section
 st.markdown("---")
 st.markdown("## 🎓 Expert Development Tips")
@@ -0,0 +1,72 @@
+import hashlib
+import json
+
+from agno.agent import Agent
+from agno.tools.duckduckgo import DuckDuckGoTools
+
+from llm import gemini_model
+
+# Constants
+MODEL_ID = "gemini-2.0-flash-exp"
+
+# Breakup recovery agents: (key, name, instructions, prompt template, spinner text, header)
+BREAKUP_AGENT_SPECS = [
+    ("therapist", "Therapist Agent", [
+        "তুমি একজন সহানুভূতিশীল থেরাপিস্ট। তোমার কাজ হলো:",
+        "১। মনোযোগ দিয়ে শুনে অনুভূতিগুলোর প্রতি সহানুভূতি প্রকাশ করা",
+        "২। হালকা ও মজার রসিকতার মাধ্যমে মানসিক চাপ কমানো",
+        "৩। নিজের সম্পর্কের অভিজ্ঞতা থেকে relatable গল্প শেয়ার করা",
+        "৪। সান্ত্বনা ও সাহস জোগানোর মতো কথা বলা",
+        "৫। ব্যবহারকারীর লেখা এবং ছবির আবেগ বিশ্লেষণ করা",
+        "উত্তর শুধুমাত্র বাংলা ভাষায় দাও। সহানুভূতির সাথে কথা বলো।"
+    ], "User's message: {input}\nProvide a compassionate response.", "🤗 তোমাকে নিয়ে ভাবছি...", "🤗 তোমার কথা শুনে যা বুঝলাম"),
+    ("closure", "Closure Agent", [
+        "তুমি একজন আবেগিক ক্লোজার বিশেষজ্ঞ। তোমার কাজ হলো:",
+        "১। অপাঠানো আবেগময় বার্তা লেখায় সাহায্য করা",
+        "২। কাঁচা এবং সততার সাথে আবেগ প্রকাশের সুযোগ তৈরি করা",
+        "৩। বার্তাগুলো সুন্দরভাবে হেডিং সহ সাজিয়ে উপস্থাপন করা",
+        "৪। মন থেকে বিদায় জানানোর প্রক্রিয়া ও সহায়ক অভ্যাসের পরামর্শ দেওয়া",
+        "উত্তর অবশ্যই বাংলা ভাষায় দেবে। হৃদয়ের গভীরতা ও আন্তরিকতা বজায় রেখো।"
+    ], "User's feelings: {input}\nHelp write unsent messages and provide closure tips.", "✍️ তোমাকে নিয়ে ভেবে যা পেলাম...", "✍️ আসলে এই সময়ে যা করতে পারো"),
+    ("routine", "Routine Planner Agent", [
+        "তুমি একজন রিকভারি রুটিন পরিকল্পক। তোমার দায়িত্ব হলো:",
+        "১। ৭ দিনের রিকভারি চ্যালেঞ্জ তৈরি করা",
+        "২। প্রতিদিনের মজার ও যত্নমূলক কাজের তালিকা দেওয়া",
+        "৩। সোশ্যাল মিডিয়া ডিটক্সের কার্যকরী উপায় দেওয়া",
+        "৪। মন ভালো করার মতো প্লেলিস্ট সাজানো",
+        "উত্তর সবসময় বাংলায় দাও। বাস্তবসম্মত ও অনুপ্রেরণামূলক পরিকল্পনা তৈরি করো।"
+    ], "Based on: {input}\nCreate a 7-day recovery plan.", "📅 এই সময়ে যা যা করতে পারো তাই নিয়ে ভাবলাম...", "📅 যেভাবে ফিরে আসবে"),
+    ("honesty", "Brutal Honesty Agent", [
+        "তুমি একজন নির্মমভাবে সত্যান্বেষী বিশ্লেষক। তোমার কাজ:",
+        "১। সম্পর্ক ভেঙে যাওয়ার খোলামেলা ও অকপট বিশ্লেষণ দেওয়া",
+        "২। কেন সম্পর্কটা কাজ করেনি, সেটা বাস্তবভাবে বোঝানো",
+        "৩। চিন্তাভাবনা উদ্দীপক এবং কঠোর কিন্তু গঠনমূলক ভাষায় কথা বলা",
+        "৪। সামনে এগিয়ে যাওয়ার জন্য কার্যকরী পরামর্শ দেওয়া",
+        "উত্তর সবসময় বাংলা ভাষায় হওয়া উচিত। কোনো ধরনের সাজসজ্জা বা চিনি মেশানো কথা নয়।"
+    ], "Situation: {input}\nGive brutally honest but constructive advice.", "💪 একটা বাস্তবসম্মত প্ল্যান দিচ্ছি...", "💪 মন খারাপ না করে হাসো "),
+]
+
+# Only the honesty agent searches the web
+TOOL_AGENTS = {"honesty"}
+
+# Checkpointed sections are only resumed while the model and prompts they were generated with are unchanged
+BREAKUP_VERSION = hashlib.sha256(json.dumps([MODEL_ID, BREAKUP_AGENT_SPECS]).encode()).hexdigest()[:12]
+
+
+def create_breakup_agents(api_key: str) -> list:
+    model = gemini_model(MODEL_ID, api_key)
+    return [
+        Agent(
+            model=model,
+            name=name,
+            tools=[DuckDuckGoTools()] if key in TOOL_AGENTS else None,
+            instructions=instructions,
+            markdown=True
+        )
+        for key, name, instructions, _, _, _ in BREAKUP_AGENT_SPECS
+    ]
+
+
+def breakup_prompt(key: str, user_input: str) -> str:
+    template = next(spec[3] for spec in BREAKUP_AGENT_SPECS if spec[0] == key)
+    return template.format(input=user_input)
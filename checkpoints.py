@@ -0,0 +1,43 @@
+import logging
+import time
+
+from deadline import MIN_CALL_BUDGET, DeadlineExceeded, current_deadline
+from response_cache import cache_key, load_cached, store_cached
+
+# Constants
+STEP_RETRIES = 3
+STEP_BACKOFF = 2.0
+
+logger = logging.getLogger(__name__)
+
+
+# Identity of one pipeline request: the prompt/agent version plus every input the agents see
+def request_hash(*parts) -> str:
+    return cache_key("request", *parts)
+
+
+# Finished pipeline sections, one response cache entry each, so a rerun of the same request
+# only runs the sections that are still missing
+def load_checkpoint(request: str, section: str) -> str:
+    entry = load_cached(cache_key("checkpoint", request, section))
+    return entry["content"] if entry else None
+
+
+def save_checkpoint(request: str, section: str, content: str):
+    store_cached(cache_key("checkpoint", request, section), content, request=request, section=section)
+
+
+# Run one agent or step on its own: failures are retried with backoff and the last one is raised
+# to the caller, which carries on with the other sections. Never sleeps past the request deadline.
+def retry_step(fn, *args, retries: int = STEP_RETRIES):
+    for attempt in range(retries):
+        try:
+            return fn(*args)
+        except DeadlineExceeded:
+            raise
+        except Exception as e:
+            delay = STEP_BACKOFF * 2 ** attempt
+            if attempt == retries - 1 or current_deadline().remaining() < delay + MIN_CALL_BUDGET:
+                raise
+            logger.warning(f"Attempt {attempt + 1}/{retries} failed, retrying in {delay:.0f}s: {e}")
+            time.sleep(delay)
@@ -0,0 +1,548 @@
+import ast
+import copy
+import difflib
+import hashlib
+import re
+
+# Calls that name a data structure, mapped to a readable label
+STRUCTURE_CALLS = {
+    "list": "list",
+    "dict": "dict",
+    "set": "set",
+    "frozenset": "set",
+    "tuple": "tuple",
+    "deque": "deque",
+    "defaultdict": "defaultdict",
+    "Counter": "Counter",
+    "OrderedDict": "OrderedDict",
+    "heappush": "heap",
+    "heappop": "heap",
+    "heapify": "heap",
+    "bisect_left": "bisect (sorted list)",
+    "bisect_right": "bisect (sorted list)",
+    "insort": "bisect (sorted list)",
+    "lru_cache": "memoization",
+    "cache": "memoization",
+}
+
+CODE_BLOCK_RE = re.compile(r"```[ \t]*([\w+#-]*)[ \t]*\n(.*?)```", re.DOTALL)
+
+BREAKDOWN_NOTE = "\n\nThe ⚙️ Function Breakdown section is generated locally; skip it in your answer."
+
+# Methods that scan their whole receiver, quadratic when called inside a loop
+LINEAR_METHODS = {"index", "count", "remove"}
+
+
+def _name_of(node) -> str:
+    if isinstance(node, ast.Name):
+        return node.id
+    if isinstance(node, ast.Attribute):
+        return node.attr
+    return ""
+
+
+def _annotation(node) -> str:
+    return ast.unparse(node) if node is not None else ""
+
+
+class _FunctionVisitor(ast.NodeVisitor):
+    def __init__(self, name: str):
+        self.name = name
+        self.depth = 0
+        self.max_depth = 0
+        self.calls = set()
+        self.recursive = False
+        self.structures = set()
+        self.patterns = []
+        self.returns = False
+        self.list_names = set()
+        self.scan_depth = 0
+
+    # A linear scan inside a loop costs one more level of nesting
+    def _scan(self, node, text: str):
+        self.patterns.append((node.lineno, text))
+        self.scan_depth = max(self.scan_depth, self.depth + 1)
+
+    def _loop(self, node):
+        self.depth += 1
+        self.max_depth = max(self.max_depth, self.depth)
+        if self.depth == 2:
+            self.patterns.append((node.lineno, "nested loops (O(n²) if both range over the input)"))
+        self.generic_visit(node)
+        self.depth -= 1
+
+    visit_For = _loop
+    visit_AsyncFor = _loop
+    visit_While = _loop
+
+    def _comprehension(self, node, label):
+        self.structures.add(label)
+        if len(node.generators) > 1:
+            self.patterns.append((node.lineno, "comprehension with several `for` clauses (nested iteration)"))
+        self.generic_visit(node)
+
+    def visit_ListComp(self, node):
+        self._comprehension(node, "list")
+
+    def visit_SetComp(self, node):
+        self._comprehension(node, "set")
+
+    def visit_DictComp(self, node):
+        self._comprehension(node, "dict")
+
+    def visit_List(self, node):
+        self.structures.add("list")
+        self.generic_visit(node)
+
+    def visit_Dict(self, node):
+        self.structures.add("dict")
+        self.generic_visit(node)
+
+    def visit_Set(self, node):
+        self.structures.add("set")
+        self.generic_visit(node)
+
+    def visit_Assign(self, node):
+        # Remember names bound to lists so `x in name` can be flagged as a linear scan
+        if isinstance(node.value, (ast.List, ast.ListComp)) or (
+            isinstance(node.value, ast.Call) and _name_of(node.value.func) == "list"
+        ):
+            for target in node.targets:
+                if isinstance(target, ast.Name):
+                    self.list_names.add(target.id)
+        self.generic_visit(node)
+
+    def visit_AugAssign(self, node):
+        if self.depth and isinstance(node.op, ast.Add) and isinstance(node.value, (ast.JoinedStr, ast.Constant)) and isinstance(getattr(node.value, "value", ""), str):
+            self._scan(node, "string concatenation inside a loop (quadratic copying)")
+        self.generic_visit(node)
+
+    def visit_Compare(self, node):
+        if self.depth:
+            for op, right in zip(node.ops, node.comparators):
+                if isinstance(op, (ast.In, ast.NotIn)) and isinstance(right, ast.Name) and right.id in self.list_names:
+                    self._scan(node, f"membership test on list `{right.id}` inside a loop (linear scan)")
+        self.generic_visit(node)
+
+    def visit_Subscript(self, node):
+        if self.depth and isinstance(node.slice, ast.Slice):
+            self._scan(node, "slicing inside a loop (copies O(k) per iteration)")
+        self.generic_visit(node)
+
+    def visit_Call(self, node):
+        callee = _name_of(node.func)
+        self.calls.add(callee)
+        if callee == self.name:
+            self.recursive = True
+        if callee in STRUCTURE_CALLS:
+            self.structures.add(STRUCTURE_CALLS[callee])
+        if self.depth and isinstance(node.func, ast.Attribute):
+            if callee == "pop" and node.args and isinstance(node.args[0], ast.Constant) and node.args[0].value == 0:
+                self._scan(node, "`pop(0)` on a list inside a loop (use collections.deque)")
+            elif callee == "insert" and node.args and isinstance(node.args[0], ast.Constant) and node.args[0].value == 0:
+                self._scan(node, "`insert(0, …)` on a list inside a loop (use collections.deque)")
+            elif callee in LINEAR_METHODS:
+                self._scan(node, f"`.{callee}()` inside a loop (linear scan per iteration)")
+            elif callee == "sort":
+                self.patterns.append((node.lineno, "sorting inside a loop (O(n log n) per iteration)"))
+        if self.depth and callee == "sorted":
+            self.patterns.append((node.lineno, "sorting inside a loop (O(n log n) per iteration)"))
+        self.generic_visit(node)
+
+    def visit_Return(self, node):
+        if node.value is not None:
+            self.returns = True
+        self.generic_visit(node)
+
+    # Nested definitions are analyzed as functions of their own
+    def visit_FunctionDef(self, node):
+        pass
+
+    visit_AsyncFunctionDef = visit_FunctionDef
+
+
+def _analyze_function(node, owner: str = "") -> dict:
+    visitor = _FunctionVisitor(node.name)
+    for statement in node.body:
+        visitor.visit(statement)
+    for decorator in node.decorator_list:
+        visitor.visit(decorator)
+        # Bare decorators (@cache, @functools.lru_cache) are names, not calls
+        if STRUCTURE_CALLS.get(_name_of(decorator)) == "memoization":
+            visitor.structures.add("memoization")
+    params = []
+    for arg in node.args.posonlyargs + node.args.args + node.args.kwonlyargs:
+        if owner and arg.arg in ("self", "cls"):
+            continue
+        params.append({"name": arg.arg, "annotation": _annotation(arg.annotation)})
+    return {
+        "name": f"{owner}.{node.name}" if owner else node.name,
+        "short_name": node.name,
+        "params": params,
+        "returns": _annotation(node.returns),
+        "has_return": visitor.returns,
+        "lines": (node.lineno, getattr(node, "end_lineno", node.lineno)),
+        "docstring": (ast.get_docstring(node) or "").split("\n")[0],
+        "loop_depth": visitor.max_depth,
+        "cost_depth": max(visitor.max_depth, visitor.scan_depth),
+        "recursive": visitor.recursive,
+        "calls": sorted(c for c in visitor.calls if c),
+        "structures": sorted(visitor.structures),
+        "patterns": sorted(set(visitor.patterns)),
+    }
+
+
+def _collect_functions(body, owner: str = "") -> list:
+    functions = []
+    for node in body:
+        if isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef)):
+            functions.append(_analyze_function(node, owner))
+            functions.extend(_collect_functions(node.body, f"{owner}.{node.name}" if owner else node.name))
+        elif isinstance(node, ast.ClassDef):
+            functions.extend(_collect_functions(node.body, f"{owner}.{node.name}" if owner else node.name))
+    return functions
+
+
+def _estimate_complexity(info: dict) -> str:
+    if info["recursive"] and "memoization" not in info["structures"]:
+        return "recursive (depends on branching; check for repeated subproblems)"
+    depth = info["cost_depth"]
+    if depth == 0:
+        return "O(1) per call" if not info["recursive"] else "recursive with memoization"
+    if depth == 1:
+        return "O(n) likely"
+    if depth == 2:
+        return "O(n²) worst case"
+    return f"O(n^{depth}) worst case"
+
+
+# Parse submitted Python code; returns None when it is not valid Python
+def analyze_python_code(code: str):
+    try:
+        tree = ast.parse(code)
+    except (SyntaxError, ValueError):
+        return None
+    functions = _collect_functions(tree.body)
+    for info in functions:
+        info["estimate"] = _estimate_complexity(info)
+    classes = [node.name for node in ast.walk(tree) if isinstance(node, ast.ClassDef)]
+    imports = set()
+    for node in ast.walk(tree):
+        if isinstance(node, ast.Import):
+            imports.update(alias.name.split(".")[0] for alias in node.names)
+        elif isinstance(node, ast.ImportFrom) and node.module:
+            imports.add(node.module.split(".")[0])
+    return {
+        "functions": functions,
+        "classes": classes,
+        "imports": sorted(imports),
+        "max_loop_depth": max((f["loop_depth"] for f in functions), default=0),
+        "recursive": [f["name"] for f in functions if f["recursive"]],
+        "structures": sorted({s for f in functions for s in f["structures"]}),
+        "patterns": [(f["name"], line, text) for f in functions for line, text in f["patterns"]],
+        "lines": len(code.splitlines()),
+    }
+
+
+# Compact structured summary that is attached to the agent prompts
+def summarize_analysis(analysis: dict) -> str:
+    lines = [
+        f"- Lines: {analysis['lines']}; classes: {', '.join(analysis['classes']) or 'none'}; imports: {', '.join(analysis['imports']) or 'none'}",
+        f"- Max loop nesting depth: {analysis['max_loop_depth']}",
+        f"- Recursive functions: {', '.join(analysis['recursive']) or 'none'}",
+        f"- Data structures: {', '.join(analysis['structures']) or 'none detected'}",
+    ]
+    for f in analysis["functions"]:
+        params = ", ".join(p["name"] for p in f["params"])
+        lines.append(f"- `{f['name']}({params})` lines {f['lines'][0]}-{f['lines'][1]}: loop depth {f['loop_depth']}, {'recursive, ' if f['recursive'] else ''}estimate {f['estimate']}")
+    if analysis["patterns"]:
+        lines.append("- Potential hot spots:")
+        lines.extend(f"  - `{name}` line {line}: {text}" for name, line, text in analysis["patterns"])
+    return "\n".join(lines)
+
+
+# Local static-analysis pre-pass shared by the review apps: (analysis, summary, context with the
+# summary appended). analysis and summary are None for other languages and invalid Python; the
+# explainer additionally gets BREAKDOWN_NOTE when there is an analysis.
+def static_analysis_context(code: str, language: str, context: str) -> tuple:
+    analysis = analyze_python_code(code) if language == "Python" else None
+    if not analysis:
+        return None, None, context
+    summary = summarize_analysis(analysis)
+    return analysis, summary, f"{context}\n\nStatic analysis (computed locally from the AST):\n{summary}"
+
+
+# The explainer's "Function Breakdown" section, answered locally
+def function_breakdown_markdown(analysis: dict) -> str:
+    if not analysis["functions"]:
+        return "### ⚙️ Function Breakdown\nNo functions defined; the code runs at module level."
+    parts = ["### ⚙️ Function Breakdown"]
+    for f in analysis["functions"]:
+        params = ", ".join(f"`{p['name']}: {p['annotation']}`" if p["annotation"] else f"`{p['name']}`" for p in f["params"]) or "none"
+        returns = f"`{f['returns']}`" if f["returns"] else ("a value" if f["has_return"] else "nothing (`None`)")
+        details = [
+            f"- **Parameters:** {params}",
+            f"- **Returns:** {returns}",
+            f"- **Lines:** {f['lines'][0]}–{f['lines'][1]}, loop nesting depth {f['loop_depth']}{', recursive' if f['recursive'] else ''}",
+        ]
+        if f["docstring"]:
+            details.insert(0, f"- **Purpose:** {f['docstring']}")
+        helpers = [c for c in f["calls"] if c in {g["short_name"] for g in analysis["functions"]} and c != f["short_name"]]
+        if helpers:
+            details.append(f"- **Calls helpers:** {', '.join(f'`{h}`' for h in helpers)}")
+        if f["structures"]:
+            details.append(f"- **Data structures:** {', '.join(f['structures'])}")
+        details.append(f"- **Estimated complexity:** {f['estimate']}")
+        parts.append(f"**`{f['name']}`**\n" + "\n".join(details))
+    return "\n\n".join(parts)
+
+
+# Python code blocks from an agent's markdown answer, preferring the ones under `heading`
+def extract_python_blocks(markdown: str, heading: str = None) -> list:
+    text = markdown or ""
+    if heading and heading in text:
+        section = text[text.index(heading):]
+        following = re.search(r"\n#{1,3} ", section[len(heading):])
+        text = section[:len(heading) + following.start()] if following else section
+    blocks = []
+    for language, code in CODE_BLOCK_RE.findall(text):
+        if language.lower() not in ("", "python", "py", "python3"):
+            continue
+        try:
+            ast.parse(code)
+        except SyntaxError:
+            continue
+        blocks.append(code.strip())
+    if not blocks and heading:
+        return extract_python_blocks(markdown)
+    return blocks
+
+
+COMPLEXITY_RE = re.compile(r"(time|space)(?:\s+complexity)?\s*\**\s*[:\-–]?\s*\**\s*`?\$?(O\((?:[^()]|\([^()]*\))*\))", re.IGNORECASE)
+HEADING_RE = re.compile(r"^\s*(?:#{1,6}\s+(.+?)|\*\*([^*]+)\*\*:?)\s*$", re.MULTILINE)
+
+
+# Solution approaches from the architect's markdown: title, runnable code and claimed Big-O
+def extract_approaches(markdown: str) -> list:
+    text = markdown or ""
+    matches = list(CODE_BLOCK_RE.finditer(text))
+    approaches = []
+    for i, match in enumerate(matches):
+        language, code = match.group(1).lower(), match.group(2)
+        if language not in ("", "python", "py", "python3"):
+            continue
+        try:
+            ast.parse(code)
+        except SyntaxError:
+            continue
+        before = text[matches[i - 1].end() if i else 0:match.start()]
+        after = text[match.end():matches[i + 1].start() if i + 1 < len(matches) else len(text)]
+        headings = list(HEADING_RE.finditer(before))
+        if headings:
+            before = before[headings[-1].start():]
+        next_heading = HEADING_RE.search(after)
+        if next_heading:
+            after = after[:next_heading.start()]
+        claimed = {}
+        # Complexity usually follows the code block; fall back to the text introducing it
+        for kind, big_o in COMPLEXITY_RE.findall(after) + COMPLEXITY_RE.findall(before):
+            claimed.setdefault(kind.lower(), big_o)
+        approaches.append({
+            "title": (headings[-1].group(1) or headings[-1].group(2)).strip(" *#:") if headings else f"Approach {len(approaches) + 1}",
+            "code": code.strip(),
+            "claimed_time": claimed.get("time"),
+            "claimed_space": claimed.get("space"),
+        })
+    return approaches
+
+
+LINE_COMMENTS = {"Python": "#", "Java": "//", "C++": "//", "JavaScript": "//"}
+
+
+def _strip_docstring(body: list) -> list:
+    if body and isinstance(body[0], ast.Expr) and isinstance(body[0].value, ast.Constant) and isinstance(body[0].value.value, str):
+        return body[1:] or [ast.Pass()]
+    return body
+
+
+# Nodes of a function's body, without descending into nested functions and classes (their own scopes)
+def _own_scope(node):
+    pending = list(node.body)
+    while pending:
+        child = pending.pop()
+        yield child
+        if not isinstance(child, (ast.FunctionDef, ast.AsyncFunctionDef, ast.ClassDef, ast.Lambda)):
+            pending.extend(ast.iter_child_nodes(child))
+
+
+class _AmbiguousCall(Exception):
+    pass
+
+
+# Parameter names of every function defined in the module, by function name; None when two
+# definitions of that name disagree
+def _parameter_lists(tree) -> dict:
+    parameters = {}
+    for node in ast.walk(tree):
+        if isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef)):
+            names = [arg.arg for arg in node.args.posonlyargs + node.args.args + node.args.kwonlyargs]
+            parameters[node.name] = names if parameters.get(node.name, names) == names else None
+    return parameters
+
+
+# Renames each function's and lambda's parameters and local variables to v0, v1, ... in order of
+# first appearance, so submissions that only differ in naming get the same tree. Globals, builtins,
+# attributes and function/class names (the problem's signature) are kept. Numbers are unique
+# across the whole module, a closure's inner locals never share a name with an outer local.
+# Keyword arguments of calls to functions defined in the module become "#<parameter position>",
+# not an identifier, so f(b=1) keeps telling def f(a, b) and def f(b, a) apart.
+class _LocalRenamer(ast.NodeTransformer):
+    def __init__(self, parameters: dict = None):
+        self.scopes = []
+        self.next_local = 0
+        self.parameters = parameters or {}
+
+    def _local(self, name: str) -> str:
+        scope = self.scopes[-1]
+        if name not in scope:
+            scope[name] = f"v{self.next_local}"
+            self.next_local += 1
+        return scope[name]
+
+    def _lookup(self, name: str) -> str:
+        for scope in reversed(self.scopes):
+            if name in scope:
+                return scope[name]
+        return name
+
+    def visit_FunctionDef(self, node):
+        node.body = _strip_docstring(node.body)
+        node.decorator_list = [self.visit(d) for d in node.decorator_list]
+        own = list(_own_scope(node))
+        declared = {name for n in own if isinstance(n, (ast.Global, ast.Nonlocal)) for name in n.names}
+        self.scopes.append({})
+        for arg in node.args.posonlyargs + node.args.args + node.args.kwonlyargs + [node.args.vararg, node.args.kwarg]:
+            if arg is not None:
+                arg.arg = self._local(arg.arg)
+                arg.annotation = None
+        # Locals are the names stored in this function's own scope, minus global/nonlocal declarations
+        stored = [n.id for n in own if isinstance(n, ast.Name) and isinstance(n.ctx, ast.Store)]
+        for name in stored:
+            if name not in declared:
+                self._local(name)
+        node.args.defaults = [self.visit(d) for d in node.args.defaults]
+        node.body = [self.visit(statement) for statement in node.body]
+        node.returns = None
+        self.scopes.pop()
+        return node
+
+    visit_AsyncFunctionDef = visit_FunctionDef
+
+    def visit_ClassDef(self, node):
+        node.body = _strip_docstring(node.body)
+        self.generic_visit(node)
+        return node
+
+    def visit_Lambda(self, node):
+        node.args.defaults = [self.visit(d) for d in node.args.defaults]
+        node.args.kw_defaults = [d and self.visit(d) for d in node.args.kw_defaults]
+        self.scopes.append({})
+        for arg in node.args.posonlyargs + node.args.args + node.args.kwonlyargs + [node.args.vararg, node.args.kwarg]:
+            if arg is not None:
+                arg.arg = self._local(arg.arg)
+        node.body = self.visit(node.body)
+        self.scopes.pop()
+        return node
+
+    def visit_Call(self, node):
+        func = node.func
+        name = func.id if isinstance(func, ast.Name) else func.attr if isinstance(func, ast.Attribute) else None
+        self.generic_visit(node)
+        keywords = [keyword for keyword in node.keywords if keyword.arg]
+        if keywords and name in self.parameters:
+            names = self.parameters[name]
+            if names is None:
+                raise _AmbiguousCall(name)
+            for keyword in keywords:
+                if keyword.arg in names:
+                    keyword.arg = f"#{names.index(keyword.arg)}"
+        return node
+
+    def visit_Nonlocal(self, node):
+        node.names = [self._lookup(name) for name in node.names]
+        return node
+
+    def visit_Name(self, node):
+        if self.scopes:
+            node.id = self._lookup(node.id)
+        return node
+
+
+# Code with formatting and comments removed, equal for submissions that only differ in those.
+# Python compares by AST without docstrings, annotations and local names; other languages by
+# their non-blank lines without line comments.
+def normalize_code(code: str, language: str = "Python") -> str:
+    if language == "Python":
+        try:
+            tree = ast.parse(code)
+        except (SyntaxError, ValueError):
+            tree = None
+        if tree is not None:
+            tree.body = _strip_docstring(tree.body)
+            try:
+                renamed = _LocalRenamer(_parameter_lists(tree)).visit(copy.deepcopy(tree))
+            except _AmbiguousCall:
+                # Keyword calls that cannot be tied to one definition: keep the original names
+                renamed = tree
+            return ast.dump(renamed, annotate_fields=False)
+    marker = LINE_COMMENTS.get(language, "//")
+    lines = (" ".join(line.split(marker)[0].split()) for line in code.splitlines())
+    return "\n".join(line for line in lines if line)
+
+
+# Stable hash of the normalized code
+def code_fingerprint(code: str, language: str = "Python") -> str:
+    return hashlib.sha256(normalize_code(code, language).encode()).hexdigest()[:32]
+
+
+# Unified diff between two submissions, plus the share of lines that changed
+def code_diff(old: str, new: str) -> tuple:
+    old_lines, new_lines = old.splitlines(), new.splitlines()
+    diff = list(difflib.unified_diff(old_lines, new_lines, "previous", "edited", n=2, lineterm=""))
+    changed = sum(1 for line in diff[2:] if line[:1] in "+-")
+    return "\n".join(diff), changed / max(len(old_lines) + len(new_lines), 1)
+
+
+def _source_lines(lines: list, node) -> list:
+    start = min([node.lineno] + [d.lineno for d in getattr(node, "decorator_list", [])])
+    return lines[start - 1:node.end_lineno]
+
+
+# Python code split into reviewable units: top-level functions and classes, with a class of several
+# methods split into its methods (each keeps the class line and class attributes). Module-level code
+# such as imports and constants becomes the preamble. Returns (preamble, [(name, source)]), or None
+# for code that does not parse.
+def split_code_units(code: str):
+    try:
+        tree = ast.parse(code)
+    except (SyntaxError, ValueError):
+        return None
+    lines = code.splitlines()
+    preamble, units = [], []
+    for node in tree.body:
+        if isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef)):
+            units.append((node.name, "\n".join(_source_lines(lines, node))))
+        elif isinstance(node, ast.ClassDef):
+            methods = [n for n in node.body if isinstance(n, (ast.FunctionDef, ast.AsyncFunctionDef))]
+            if len(methods) < 2:
+                units.append((node.name, "\n".join(_source_lines(lines, node))))
+                continue
+            header = lines[node.lineno - 1:node.body[0].lineno - 1] if node.body else []
+            for statement in node.body:
+                if statement not in methods and not (isinstance(statement, ast.Expr) and isinstance(statement.value, ast.Constant)):
+                    header += _source_lines(lines, statement)
+            for method in methods:
+                units.append((f"{node.name}.{method.name}", "\n".join(header + _source_lines(lines, method))))
+        else:
+            preamble += _source_lines(lines, node)
+    return "\n".join(preamble), units
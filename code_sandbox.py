@@ -0,0 +1,377 @@
+import json
+import logging
+import math
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+
+# Constants
+RUNNER = os.path.join(os.path.dirname(os.path.abspath(__file__)), "sandbox_runner.py")
+DEFAULT_SIZES = [1_000, 3_000, 10_000, 30_000, 100_000, 300_000, 1_000_000]
+CALL_TIME_LIMIT = 2.0
+TOTAL_TIME_LIMIT = 30.0
+MEMORY_LIMIT_MB = 512
+# Read-only system paths the interpreter needs inside bubblewrap; everything else stays invisible
+SYSTEM_PATHS = ["/usr", "/bin", "/sbin", "/lib", "/lib32", "/lib64", "/etc/ld.so.cache", "/etc/alternatives", "/etc/localtime"]
+BWRAP = shutil.which("bwrap")
+
+logger = logging.getLogger(__name__)
+
+# Candidate growth curves for the fit
+COMPLEXITY_MODELS = [
+    ("O(1)", lambda n: 1.0),
+    ("O(log n)", lambda n: math.log2(n)),
+    ("O(n)", lambda n: n),
+    ("O(n log n)", lambda n: n * math.log2(n)),
+    ("O(n²)", lambda n: n ** 2),
+    ("O(n³)", lambda n: n ** 3),
+]
+
+
+# Submitted code can come from the network (api_service.py). With bubblewrap installed it runs with
+# no network and sees only the interpreter and its own working directory, not the repo or its
+# secrets. Without it only the resource limits below apply.
+def sandbox_isolated() -> bool:
+    return BWRAP is not None
+
+
+# Whether a caller may execute untrusted code: always under isolation, otherwise only when the
+# operator opted in (e.g. review_queue.py worker --run-unisolated), with a warning
+def code_execution_allowed(unisolated_opt_in: bool = False) -> bool:
+    if sandbox_isolated():
+        return True
+    if unisolated_opt_in:
+        logger.warning("bubblewrap not found: submitted code runs with resource limits only, it can read local files and open network connections")
+    return unisolated_opt_in
+
+
+# The runner applies the resource limits to itself before it reads any code (see sandbox_runner.main);
+# a preexec_fn would not be safe here, sandboxes are started from worker threads
+def _command(workdir: str, memory_mb: int, cpu_seconds: float) -> list:
+    # No child processes outside bubblewrap; inside, bubblewrap has to fork once and its PID namespace stands in
+    limit_processes = not BWRAP and os.name == "posix" and os.getuid() != 0
+    python = [sys.executable, "-I", RUNNER, str(memory_mb), str(cpu_seconds), "1" if limit_processes else "0"]
+    if not BWRAP:
+        return python
+    command = [BWRAP, "--unshare-all", "--die-with-parent", "--new-session", "--proc", "/proc", "--dev", "/dev", "--tmpfs", "/tmp"]
+    for path in dict.fromkeys(SYSTEM_PATHS + [sys.base_prefix, sys.prefix]):
+        command += ["--ro-bind-try", path, path]
+    command += ["--ro-bind", RUNNER, RUNNER, "--bind", workdir, workdir, "--chdir", workdir]
+    return command + python
+
+
+# Run one payload in a separate, resource-limited interpreter and collect its JSON records
+def run_sandboxed(payload: dict, timeout: float = TOTAL_TIME_LIMIT, memory_mb: int = MEMORY_LIMIT_MB) -> dict:
+    records, fatal = [], None
+    with tempfile.TemporaryDirectory(prefix="sandbox_") as workdir:
+        try:
+            proc = subprocess.run(
+                _command(workdir, memory_mb, timeout),
+                input=json.dumps(payload),
+                capture_output=True,
+                text=True,
+                timeout=timeout,
+                cwd=workdir,
+                env={"PATH": os.environ.get("PATH", ""), "PYTHONHASHSEED": "0"},
+                start_new_session=os.name == "posix",
+            )
+            stdout, returncode = proc.stdout, proc.returncode
+        except subprocess.TimeoutExpired as e:
+            stdout = e.stdout.decode() if isinstance(e.stdout, bytes) else (e.stdout or "")
+            returncode, fatal = None, f"Sandbox exceeded the {timeout:.0f}s total time limit."
+    for line in stdout.splitlines():
+        try:
+            records.append(json.loads(line))
+        except json.JSONDecodeError:
+            continue
+    for record in records:
+        if record.get("event") == "fatal":
+            fatal = record["error"]
+    if returncode not in (0, None) and not fatal:
+        # Killed by a signal (e.g. RLIMIT_CPU) or crashed (e.g. C stack overflow)
+        fatal = f"Sandbox process exited with code {returncode}."
+    return {"records": records, "fatal": fatal}
+
+
+def fit_complexity(points: list):
+    usable = [(p["n"], p["seconds"]) for p in points if p.get("status") == "ok" and p["seconds"] > 0]
+    if len(usable) < 2:
+        return None, None
+    best_label, best_error = None, float("inf")
+    for label, model in COMPLEXITY_MODELS:
+        values = [model(n) for n, _ in usable]
+        scale = sum(t * v for (_, t), v in zip(usable, values)) / sum(v * v for v in values)
+        if scale <= 0:
+            continue
+        # Error in log space so small and large sizes weigh the same
+        error = sum((math.log(t) - math.log(scale * v)) ** 2 for (_, t), v in zip(usable, values)) / len(usable)
+        if error < best_error:
+            best_label, best_error = label, error
+    (n0, t0), (n1, t1) = usable[0], usable[-1]
+    slope = math.log(t1 / t0) / math.log(n1 / n0) if t0 > 0 and n1 > n0 else None
+    return best_label, slope
+
+
+# Time the submitted function on inputs of growing size and estimate its complexity
+def measure_complexity(code: str, sizes=None, target_n: int = 100_000, time_limit: float = CALL_TIME_LIMIT, entry: str = None) -> dict:
+    result = run_sandboxed({
+        "mode": "scale",
+        "code": code,
+        "entry": entry,
+        "sizes": sizes or DEFAULT_SIZES,
+        "time_limit": time_limit,
+    })
+    entry_record = next((r for r in result["records"] if r.get("event") == "entry"), {})
+    points = [r for r in result["records"] if "n" in r]
+    label, slope = fit_complexity(points)
+    failed = next((p for p in points if p["status"] != "ok"), None)
+    if result["fatal"] and not points:
+        verdict = "❌ Runtime Error"
+    elif failed and (failed["status"] == "error" or (failed["status"] == "recursion" and failed["n"] <= target_n)):
+        verdict = "❌ Runtime Error"
+    elif failed and failed["status"] == "memory":
+        verdict = "💥 Memory Limit Exceeded" if failed["n"] <= target_n else "✅ Within limits"
+    elif (failed and failed["n"] <= target_n) or (result["fatal"] and max((p["n"] for p in points), default=0) < target_n):
+        verdict = "⚠️ TLE"
+    else:
+        verdict = "✅ Within limits"
+    return {
+        "entry": entry_record.get("entry"),
+        "points": points,
+        "complexity": label,
+        "slope": slope,
+        "verdict": verdict,
+        "target_n": target_n,
+        "time_limit": time_limit,
+        "error": (failed or {}).get("error") or result["fatal"],
+    }
+
+
+def measurement_markdown(measurement: dict) -> str:
+    lines = [
+        f"**Entry point:** `{measurement['entry'] or 'not found'}`  ",
+        f"**Measured verdict:** {measurement['verdict']} (limit {measurement['time_limit']:.1f}s per call, target n = {measurement['target_n']:,})  ",
+    ]
+    if measurement["complexity"]:
+        slope = f", log-log slope {measurement['slope']:.2f}" if measurement["slope"] is not None else ""
+        lines.append(f"**Best-fit growth:** {measurement['complexity']}{slope}")
+    lines += ["", "| n | time | status |", "|---:|---:|:---|"]
+    for p in measurement["points"]:
+        seconds = f"{p['seconds'] * 1000:.2f} ms" if p["status"] == "ok" else "—"
+        lines.append(f"| {p['n']:,} | {seconds} | {p['status']} |")
+    if measurement["error"]:
+        lines.append(f"\n`{measurement['error']}`")
+    return "\n".join(lines)
+
+
+# Check candidate implementations against the first one and time them on the same inputs
+def benchmark_candidates(candidates: dict, sizes=None, time_limit: float = CALL_TIME_LIMIT, repeats: int = 15) -> dict:
+    result = run_sandboxed({
+        "mode": "bench",
+        "candidates": candidates,
+        "sizes": sizes or [1_000, 10_000, 100_000],
+        "time_limit": time_limit,
+        "repeats": repeats,
+    }, timeout=TOTAL_TIME_LIMIT * 2)
+    records = result["records"]
+    labels = list(candidates)
+    cases = [r for r in records if r.get("event") == "case"]
+    equivalence = {}
+    for label in labels[1:]:
+        checked = [c for c in cases if c["label"] == label]
+        equivalence[label] = {
+            "cases": len(checked),
+            "different": len([c for c in checked if c["verdict"] == "different"]),
+            "unordered": len([c for c in checked if c["verdict"] == "equal up to order"]),
+            "mismatches": [c for c in checked if c["verdict"] == "different"][:3],
+        }
+    timings = [r for r in records if r.get("event") == "timing"]
+    return {
+        "labels": labels,
+        "entries": {r["label"]: r["entry"] for r in records if r.get("event") == "entry"},
+        "load_errors": {r["label"]: r["error"] for r in records if r.get("event") == "load_error"},
+        "equivalence": equivalence,
+        "timings": timings,
+        "error": result["fatal"],
+    }
+
+
+def benchmark_markdown(benchmark: dict) -> str:
+    labels = benchmark["labels"]
+    reference = labels[0]
+    lines = []
+    for label, error in benchmark["load_errors"].items():
+        lines.append(f"❌ **{label}** could not be loaded: `{error}`")
+    for label, eq in benchmark["equivalence"].items():
+        if not eq["cases"]:
+            continue
+        if eq["different"]:
+            lines.append(
+                f"❌ **{label}** differs from **{reference}** on {eq['different']}/{eq['cases']} edge/random cases "
+                "(problems that accept several valid answers can differ legitimately)."
+            )
+            for case in eq["mismatches"]:
+                lines.append(f"- n={case['n']} ({case['variant']}): input `{case['input']}` → expected `{case['expected']}`, got `{case['got']}`")
+        else:
+            order = f" ({eq['unordered']} equal up to order)" if eq["unordered"] else ""
+            lines.append(f"✅ **{label}** matches **{reference}** on all {eq['cases']} edge/random cases{order}.")
+    if benchmark["timings"]:
+        medians = {(t["label"], t["n"]): t["median"] for t in benchmark["timings"] if t["status"] == "ok"}
+        lines += ["", "| n | version | median | p95 | peak memory | speedup |", "|---:|:---|---:|---:|---:|---:|"]
+        for t in benchmark["timings"]:
+            if t["status"] != "ok":
+                lines.append(f"| {t['n']:,} | {t['label']} | {t['status']} | — | — | — |")
+                continue
+            base = medians.get((reference, t["n"]))
+            speedup = f"{base / t['median']:.2f}×" if base and t["median"] > 0 and t["label"] != reference else "—"
+            lines.append(
+                f"| {t['n']:,} | {t['label']} | {t['median'] * 1000:.2f} ms | {t['p95'] * 1000:.2f} ms "
+                f"| {t['peak_bytes'] / 1024:.1f} KiB | {speedup} |"
+            )
+    if benchmark["error"]:
+        lines.append(f"\n`{benchmark['error']}`")
+    return "\n".join(lines)
+
+
+# Benchmark sizes scaled to the problem's largest input, e.g. 10^5 -> [10^3, 10^4, 10^5]
+def sizes_for_bound(max_n: int, points: int = 3) -> list:
+    top = max(100, min(max_n, DEFAULT_SIZES[-1]))
+    return sorted({max(10, top // 10 ** i) for i in range(points)})
+
+
+# Run every approach on the same generated inputs and rank them by measured runtime
+def rank_approaches(approaches: list, max_n: int, time_limit: float = CALL_TIME_LIMIT, examples: list = None) -> dict:
+    candidates = {f"{i + 1}. {a['title']}": a["code"] for i, a in enumerate(approaches)}
+    benchmark = benchmark_candidates(candidates, sizes=sizes_for_bound(max_n), time_limit=time_limit, repeats=7)
+    rows = []
+    for (label, approach) in zip(candidates, approaches):
+        timings = [t for t in benchmark["timings"] if t["label"] == label]
+        completed = [t for t in timings if t["status"] == "ok"]
+        largest = completed[-1] if completed else None
+        growth, _ = fit_complexity([{"n": t["n"], "status": "ok", "seconds": t["median"]} for t in completed])
+        failure = next((t["status"] for t in timings if t["status"] != "ok"), None)
+        equivalence = benchmark["equivalence"].get(label)
+        example_run = run_examples(approach["code"], examples, time_limit) if examples else None
+        rows.append({
+            "label": label,
+            "claimed_time": approach["claimed_time"],
+            "claimed_space": approach["claimed_space"],
+            "observed_growth": growth,
+            "largest_n": largest["n"] if largest else 0,
+            "median": largest["median"] if largest else None,
+            "p95": largest["p95"] if largest else None,
+            "peak_bytes": largest["peak_bytes"] if largest else None,
+            "failure": failure or benchmark["load_errors"].get(label),
+            "agrees": None if equivalence is None or not equivalence["cases"] else not equivalence["different"],
+            "examples": f"{example_run['passed']}/{example_run['total']}" if example_run else None,
+        })
+    # More sizes completed first, then fastest at the largest completed size
+    rows.sort(key=lambda r: (-r["largest_n"], r["median"] if r["median"] is not None else float("inf")))
+    return {"rows": rows, "sizes": sizes_for_bound(max_n), "reference": next(iter(candidates), None), "error": benchmark["error"]}
+
+
+def leaderboard_markdown(leaderboard: dict) -> str:
+    sizes = ", ".join(f"{n:,}" for n in leaderboard["sizes"])
+    lines = [
+        f"Measured locally on generated inputs of size {sizes}.",
+        "",
+        "| rank | approach | claimed time | observed growth | largest n | median | p95 | peak memory | claimed space | agrees with #1 | examples |",
+        "|---:|:---|:---|:---|---:|---:|---:|---:|:---|:---:|:---:|",
+    ]
+    for rank, row in enumerate(leaderboard["rows"], 1):
+        measured = row["median"] is not None
+        agrees = {True: "✅", False: "❌", None: "—"}[row["agrees"]]
+        if row["label"] == leaderboard["reference"]:
+            agrees = "ref"
+        largest = f"{row['largest_n']:,}" if row["largest_n"] else "—"
+        if row["failure"]:
+            largest += f" ({row['failure'] if len(row['failure']) < 40 else 'error'})"
+        median = f"{row['median'] * 1000:.2f} ms" if measured else "—"
+        p95 = f"{row['p95'] * 1000:.2f} ms" if measured else "—"
+        peak = f"{row['peak_bytes'] / 1024:.1f} KiB" if measured else "—"
+        lines.append(
+            f"| {rank} | {row['label']} | {row['claimed_time'] or '—'} | {row['observed_growth'] or '—'} | {largest} "
+            f"| {median} | {p95} | {peak} | {row['claimed_space'] or '—'} | {agrees} | {row['examples'] or '—'} |"
+        )
+    if leaderboard["error"]:
+        lines.append(f"\n`{leaderboard['error']}`")
+    return "\n".join(lines)
+
+
+# Peak auxiliary memory (input excluded) across input sizes, traced with tracemalloc
+def profile_memory(code: str, sizes=None, time_limit: float = CALL_TIME_LIMIT * 5, entry: str = None) -> dict:
+    result = run_sandboxed({
+        "mode": "memory",
+        "code": code,
+        "entry": entry,
+        "sizes": sizes or [1_000, 10_000, 100_000],
+        "time_limit": time_limit,
+    })
+    entry_record = next((r for r in result["records"] if r.get("event") == "entry"), {})
+    points = [r for r in result["records"] if "n" in r]
+    completed = [p for p in points if p["status"] == "ok"]
+    # Tiny peaks are interpreter noise, only fit when memory actually moves
+    growth = None
+    if completed and max(p["peak_bytes"] for p in completed) > 64 * 1024:
+        growth, _ = fit_complexity([{"n": p["n"], "status": "ok", "seconds": max(p["peak_bytes"], 1)} for p in completed])
+    elif completed:
+        growth = "O(1)"
+    return {
+        "entry": entry_record.get("entry"),
+        "points": points,
+        "growth": growth,
+        "sites": [site for site in completed[-1]["sites"] if site["size_bytes"] >= 1024] if completed else [],
+        "error": next((p.get("error") or p["status"] for p in points if p["status"] != "ok"), None) or result["fatal"],
+    }
+
+
+def memory_markdown(profile: dict) -> str:
+    lines = [f"**Observed space growth:** {profile['growth'] or 'unknown'} (peak allocation during the call, input excluded)", ""]
+    lines += ["| n | peak memory | status |", "|---:|---:|:---|"]
+    for p in profile["points"]:
+        peak = f"{p['peak_bytes'] / 1024:.1f} KiB" if p["status"] == "ok" else "—"
+        lines.append(f"| {p['n']:,} | {peak} | {p['status']} |")
+    if profile["sites"]:
+        n = [p for p in profile["points"] if p["status"] == "ok"][-1]["n"]
+        lines += ["", f"**Largest allocation sites at n = {n:,}:**"]
+        for site in profile["sites"]:
+            lines.append(f"- line {site['line']}: {site['size_bytes'] / 1024:.1f} KiB in {site['count']:,} blocks — `{site['code']}`")
+    if profile["error"]:
+        lines.append(f"\n`{profile['error']}`")
+    return "\n".join(lines)
+
+
+# Run the examples parsed from the problem statement against the submitted code
+def run_examples(code: str, examples: list, time_limit: float = CALL_TIME_LIMIT, entry: str = None) -> dict:
+    if not examples:
+        return {"entry": None, "results": [], "passed": 0, "total": 0, "error": None}
+    result = run_sandboxed({
+        "mode": "examples",
+        "code": code,
+        "entry": entry,
+        "examples": examples,
+        "time_limit": time_limit,
+    }, timeout=min(TOTAL_TIME_LIMIT, 5 + time_limit * len(examples)))
+    entry_record = next((r for r in result["records"] if r.get("event") == "entry"), {})
+    results = [r for r in result["records"] if "example" in r]
+    return {
+        "entry": entry_record.get("entry"),
+        "results": results,
+        "passed": sum(1 for r in results if r["status"].startswith("pass")),
+        "total": len(examples),
+        "error": result["fatal"],
+    }
+
+
+def examples_markdown(outcome: dict) -> str:
+    lines = [f"**Examples passed:** {outcome['passed']}/{outcome['total']}", ""]
+    lines += ["| # | status | expected | actual |", "|---:|:---|:---|:---|"]
+    icons = {"pass": "✅", "pass up to order": "✅ (order differs)", "fail": "❌"}
+    for r in outcome["results"]:
+        status = icons.get(r["status"], f"⚠️ {r.get('error') or r['status']}")
+        lines.append(f"| {r['example']} | {status} | `{r.get('expected', '—')}` | `{r.get('actual', '—')}` |")
+    if outcome["error"]:
+        lines.append(f"\n`{outcome['error']}`")
+    return "\n".join(lines)
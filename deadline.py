@@ -0,0 +1,71 @@
+import contextvars
+import os
+import time
+from contextlib import contextmanager
+
+# Constants
+DEFAULT_BUDGET = 25.0
+# A single structured call writing all four sections at once cannot show partial progress, it gets
+# the time of the whole answer (several thousand output tokens) in one go
+ONE_SHOT_BUDGET = 90.0
+SHORT_FORM_BELOW = 8.0
+MIN_CALL_BUDGET = 2.0
+SHORT_FORM_NOTE = "\n\nTime is short: answer in at most 5 concise bullet points under the same headings."
+PENDING_MARKDOWN = "⏳ _Pending — this section ran out of time. Retry to finish it._"
+
+
+class DeadlineExceeded(TimeoutError):
+    pass
+
+
+# Time budget of one user request, shared by every agent call it makes. seconds=None or 0 is unbounded.
+class Deadline:
+    def __init__(self, seconds: float = None):
+        self.seconds = seconds or None
+        self.expires_at = time.monotonic() + seconds if seconds else None
+
+    def remaining(self) -> float:
+        if self.expires_at is None:
+            return float("inf")
+        return max(0.0, self.expires_at - time.monotonic())
+
+    # Too little left for a model call to be worth starting
+    def expired(self) -> bool:
+        return self.remaining() < MIN_CALL_BUDGET
+
+    def check(self):
+        if self.expired():
+            raise DeadlineExceeded(f"Request deadline of {self.seconds:.0f}s reached")
+
+    # Prompt for the next call: unchanged with time to spare, asking for a short answer near the end
+    def budgeted(self, message: str) -> str:
+        self.check()
+        return message + SHORT_FORM_NOTE if self.remaining() < SHORT_FORM_BELOW else message
+
+
+_current = contextvars.ContextVar("deadline", default=Deadline())
+
+
+# Seconds from PIPELINE_DEADLINE, or DEFAULT_BUDGET; 0 turns the deadline off
+def default_budget() -> float:
+    return float(os.environ.get("PIPELINE_DEADLINE", DEFAULT_BUDGET))
+
+
+# Seconds from PIPELINE_ONE_SHOT_DEADLINE, or ONE_SHOT_BUDGET; 0 turns the deadline off
+def one_shot_budget() -> float:
+    return float(os.environ.get("PIPELINE_ONE_SHOT_DEADLINE", ONE_SHOT_BUDGET))
+
+
+# Model calls made inside the block (llm.LimitedGemini) time out with what is left of the budget
+@contextmanager
+def deadline(seconds: float = None):
+    budget = Deadline(default_budget() if seconds is None else seconds)
+    token = _current.set(budget)
+    try:
+        yield budget
+    finally:
+        _current.reset(token)
+
+
+def current_deadline() -> Deadline:
+    return _current.get()
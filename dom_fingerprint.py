@@ -0,0 +1,251 @@
+import hashlib
+import json
+import os
+import re
+from datetime import datetime
+from html.parser import HTMLParser
+
+# Constants
+CACHE_FILE = "sessions/scraper_cache.json"
+MAX_DEPTH = 14
+
+# Tags that say nothing about the page template
+IGNORED_TAGS = {"script", "style", "noscript", "template", "svg", "path", "meta", "link", "head", "title", "br", "wbr"}
+VOID_TAGS = {"area", "base", "br", "col", "embed", "hr", "img", "input", "link", "meta", "param", "source", "track", "wbr"}
+
+
+# Class names like "col-md-4" or "item-1293" differ between pages of one template
+def _normalize_class(token: str) -> str:
+    return re.sub(r"\d+", "#", token.lower())
+
+
+def _element_label(tag: str, attrs) -> str:
+    classes = ""
+    for name, value in attrs:
+        if name == "class" and value:
+            classes = ".".join(sorted({_normalize_class(c) for c in value.split()}))
+    return f"{tag}.{classes}" if classes else tag
+
+
+# Collects tag paths, class sets and repeated sibling patterns, ignoring text and attribute values
+class _StructureParser(HTMLParser):
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.stack = []
+        self.children = [[]]
+        self.skip_depth = 0
+        self.paths = set()
+        self.class_sets = set()
+        self.repeats = set()
+
+    def handle_starttag(self, tag, attrs):
+        if self.skip_depth or tag in IGNORED_TAGS:
+            if tag not in VOID_TAGS:
+                self.skip_depth += 1
+            return
+        label = _element_label(tag, attrs)
+        self.children[-1].append(label)
+        if len(self.stack) < MAX_DEPTH:
+            self.paths.add(">".join([t for t, _ in self.stack] + [tag]))
+        if "." in label:
+            self.class_sets.add(label)
+        if tag in VOID_TAGS:
+            return
+        self.stack.append((tag, label))
+        self.children.append([])
+
+    def handle_startendtag(self, tag, attrs):
+        if self.skip_depth or tag in IGNORED_TAGS:
+            return
+        self.handle_starttag(tag, attrs)
+        if tag not in VOID_TAGS:
+            self.handle_endtag(tag)
+
+    def handle_endtag(self, tag):
+        if self.skip_depth:
+            if tag not in VOID_TAGS:
+                self.skip_depth -= 1
+            return
+        # Close up to the matching tag to tolerate sloppy markup
+        for i in range(len(self.stack) - 1, -1, -1):
+            if self.stack[i][0] == tag:
+                while len(self.stack) > i:
+                    self._close()
+                return
+
+    def _close(self):
+        _, label = self.stack.pop()
+        siblings = self.children.pop()
+        parent_path = ">".join([t for t, _ in self.stack] + [label])
+        for child in {c for c in siblings if siblings.count(c) > 1}:
+            self.repeats.add(f"{parent_path}>{child}*")
+
+    def finish(self):
+        self.close()
+        while self.stack:
+            self._close()
+
+
+def extract_features(html: str) -> set:
+    parser = _StructureParser()
+    try:
+        parser.feed(html or "")
+        parser.finish()
+    except Exception:
+        # html.parser is lenient, but never let a broken dump block the UI
+        pass
+    return (
+        {f"p:{p}" for p in parser.paths}
+        | {f"c:{c}" for c in parser.class_sets}
+        | {f"r:{r}" for r in parser.repeats}
+    )
+
+
+def fingerprint_features(features) -> str:
+    return hashlib.sha256("\n".join(sorted(features)).encode("utf-8")).hexdigest()[:16]
+
+
+def dom_fingerprint(html: str) -> str:
+    return fingerprint_features(extract_features(html))
+
+
+# Attributes a scraper selects on; everything else is dropped from the distilled page
+KEPT_ATTRIBUTES = {"id", "class", "href", "src", "name", "type", "role", "aria-label", "itemprop", "itemtype", "for", "title", "alt", "value"}
+KEPT_REPEATS = 3
+MAX_TEXT = 80
+MAX_ATTRIBUTE = 60
+
+
+# Re-emits the markup without scripts, styles and noise attributes, keeping only the first
+# few of each run of identical siblings so a long listing becomes a short, representative one
+class _DistillParser(HTMLParser):
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.out = []
+        self.stack = []
+        self.skip_depth = 0
+        self.hidden_depth = 0
+
+    def _attributes(self, attrs) -> str:
+        kept = []
+        for name, value in attrs:
+            if name in KEPT_ATTRIBUTES or name.startswith("data-"):
+                value = " ".join((value or "").split())
+                if len(value) > MAX_ATTRIBUTE:
+                    value = value[:MAX_ATTRIBUTE] + "…"
+                kept.append(f'{name}="{value}"' if value else name)
+        return "".join(f" {a}" for a in kept)
+
+    def handle_starttag(self, tag, attrs):
+        if self.skip_depth or tag in IGNORED_TAGS:
+            if tag not in VOID_TAGS:
+                self.skip_depth += 1
+            return
+        label = _element_label(tag, attrs)
+        hidden = bool(self.hidden_depth)
+        if self.stack and not hidden:
+            counts = self.stack[-1]["counts"]
+            counts[label] = counts.get(label, 0) + 1
+            if counts[label] > KEPT_REPEATS:
+                hidden = True
+                self.stack[-1]["omitted"][label] = self.stack[-1]["omitted"].get(label, 0) + 1
+        if not hidden:
+            self.out.append(f"<{tag}{self._attributes(attrs)}>")
+        if tag in VOID_TAGS:
+            return
+        self.stack.append({"tag": tag, "counts": {}, "omitted": {}, "hidden": hidden})
+        if hidden:
+            self.hidden_depth += 1
+
+    def handle_startendtag(self, tag, attrs):
+        if self.skip_depth or tag in IGNORED_TAGS:
+            return
+        self.handle_starttag(tag, attrs)
+        if tag not in VOID_TAGS:
+            self.handle_endtag(tag)
+
+    def handle_endtag(self, tag):
+        if self.skip_depth:
+            if tag not in VOID_TAGS:
+                self.skip_depth -= 1
+            return
+        for i in range(len(self.stack) - 1, -1, -1):
+            if self.stack[i]["tag"] == tag:
+                while len(self.stack) > i:
+                    self._close()
+                return
+
+    def _close(self):
+        element = self.stack.pop()
+        if element["hidden"]:
+            self.hidden_depth -= 1
+            return
+        for label, count in element["omitted"].items():
+            self.out.append(f"<!-- {count} more <{label}> -->")
+        self.out.append(f"</{element['tag']}>")
+
+    def handle_data(self, data):
+        if self.skip_depth or self.hidden_depth:
+            return
+        text = " ".join(data.split())
+        if text:
+            self.out.append(text if len(text) <= MAX_TEXT else text[:MAX_TEXT] + "…")
+
+    def finish(self):
+        self.close()
+        while self.stack:
+            self._close()
+
+
+# Compact, structure-preserving version of a page for the scraper prompt
+def distill_html(html: str, max_chars: int = 6000) -> str:
+    parser = _DistillParser()
+    try:
+        parser.feed(html or "")
+        parser.finish()
+    except Exception:
+        return (html or "")[:max_chars]
+    distilled = "".join(parser.out)
+    return distilled if len(distilled) <= max_chars else distilled[:max_chars] + "\n<!-- truncated -->"
+
+
+def _goal_key(goal: str) -> str:
+    return " ".join((goal or "").lower().split())
+
+
+def cache_key(fingerprint: str, goal: str) -> str:
+    goal_hash = hashlib.sha256(_goal_key(goal).encode("utf-8")).hexdigest()[:12]
+    return f"{fingerprint}:{goal_hash}"
+
+
+# Cache persistence, same layout as the session history files
+def load_scraper_cache() -> dict:
+    if os.path.exists(CACHE_FILE):
+        with open(CACHE_FILE, "r") as f:
+            return json.load(f)
+    return {}
+
+
+def save_scraper_cache(cache: dict):
+    os.makedirs(os.path.dirname(CACHE_FILE), exist_ok=True)
+    with open(CACHE_FILE, "w") as f:
+        json.dump(cache, f, indent=2)
+
+
+def lookup_cached_scraper(cache: dict, fingerprint: str, goal: str):
+    entry = cache.get(cache_key(fingerprint, goal))
+    if entry:
+        entry["hits"] = entry.get("hits", 0) + 1
+        entry["last_hit"] = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+    return entry
+
+
+def store_cached_scraper(cache: dict, fingerprint: str, goal: str, url: str, result: str):
+    cache[cache_key(fingerprint, goal)] = {
+        "fingerprint": fingerprint,
+        "goal": goal,
+        "url": url,
+        "result": result,
+        "timestamp": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+        "hits": 0,
+    }
@@ -0,0 +1,104 @@
+import threading
+import time
+
+from rate_limiter import is_rate_limited
+
+# Constants
+STRATEGIES = ["least_loaded", "round_robin"]
+RATE_LIMIT_COOLDOWN = 30
+MAX_RATE_LIMIT_COOLDOWN = 300
+INVALID_KEY_COOLDOWN = 600
+INVALID_KEY_MARKERS = ("api_key_invalid", "api key not valid", "permission_denied")
+MAX_SLEEP = 1.0
+
+
+def mask_key(key: str) -> str:
+    return f"…{key[-4:]}" if key else "—"
+
+
+def is_invalid_key(error: Exception) -> bool:
+    if getattr(error, "status_code", None) in (401, 403):
+        return True
+    text = str(error).lower()
+    return any(marker in text for marker in INVALID_KEY_MARKERS)
+
+
+# Gemini API keys handed out per model call. A key that gets a 429 cools down (longer after
+# every consecutive 429), a rejected key is parked for INVALID_KEY_COOLDOWN; the others keep serving.
+class KeyPool:
+    def __init__(self, keys: list, strategy: str = "least_loaded"):
+        self.keys = list(dict.fromkeys(k for k in keys if k))
+        self.strategy = strategy if strategy in STRATEGIES else STRATEGIES[0]
+        self.stats = {
+            key: {"in_flight": 0, "calls": 0, "failures": 0, "rate_limited": 0, "tokens": 0, "streak": 0, "cooldown_until": 0.0, "last_error": None}
+            for key in self.keys
+        }
+        self.next_index = 0
+        self.lock = threading.Lock()
+
+    def __contains__(self, key: str) -> bool:
+        return key in self.stats
+
+    def __len__(self) -> int:
+        return len(self.keys)
+
+    def _pick(self, ready: list) -> str:
+        if self.strategy == "round_robin":
+            for offset in range(len(self.keys)):
+                key = self.keys[(self.next_index + offset) % len(self.keys)]
+                if key in ready:
+                    self.next_index = (self.keys.index(key) + 1) % len(self.keys)
+                    return key
+        return min(ready, key=lambda k: (self.stats[k]["in_flight"], self.stats[k]["calls"]))
+
+    # Blocks only while every key is cooling down, at most timeout seconds
+    def acquire(self, timeout: float = None) -> str:
+        if not self.keys:
+            raise ValueError("No Gemini API key configured")
+        started = time.monotonic()
+        while True:
+            with self.lock:
+                now = time.time()
+                ready = [k for k in self.keys if self.stats[k]["cooldown_until"] <= now]
+                if ready:
+                    key = self._pick(ready)
+                    self.stats[key]["in_flight"] += 1
+                    self.stats[key]["calls"] += 1
+                    return key
+                wait = min(self.stats[k]["cooldown_until"] for k in self.keys) - now
+            if timeout is not None and time.monotonic() - started + wait > timeout:
+                raise TimeoutError("Every Gemini API key is cooling down")
+            time.sleep(min(max(wait, 0.05), MAX_SLEEP))
+
+    def release(self, key: str, tokens: int = None, error: Exception = None):
+        with self.lock:
+            stats = self.stats[key]
+            stats["in_flight"] -= 1
+            stats["tokens"] += tokens or 0
+            if error is None:
+                stats["streak"] = 0
+                return
+            stats["failures"] += 1
+            stats["last_error"] = str(error)[:200]
+            if is_rate_limited(error):
+                stats["rate_limited"] += 1
+                stats["streak"] += 1
+                cooldown = min(MAX_RATE_LIMIT_COOLDOWN, RATE_LIMIT_COOLDOWN * 2 ** (stats["streak"] - 1))
+            elif is_invalid_key(error):
+                cooldown = INVALID_KEY_COOLDOWN
+            else:
+                return
+            stats["cooldown_until"] = max(stats["cooldown_until"], time.time() + cooldown)
+
+    def metrics(self) -> list:
+        now = time.time()
+        with self.lock:
+            return [
+                {
+                    "key": mask_key(key),
+                    "healthy": self.stats[key]["cooldown_until"] <= now,
+                    "cooldown_s": round(max(0.0, self.stats[key]["cooldown_until"] - now), 1),
+                    **{name: self.stats[key][name] for name in ("in_flight", "calls", "failures", "rate_limited", "tokens", "last_error")},
+                }
+                for key in self.keys
+            ]
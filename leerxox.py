@@ -2,12 +2,23 @@ import streamlit as st
 import logging
 import os
 import json
+import hashlib
 from datetime import datetime
 from agno.agent import Agent
-from agno.models.google import Gemini
+from llm import default_api_key, gemini_model
+from code_analysis import BREAKDOWN_NOTE, static_analysis_context, function_breakdown_markdown
+from response_cache import cache_key, load_cached, store_cached
+from review_pipeline import review_key
 
 # Constants
 SAVE_FILE = "sessions/review_history.json"
+REVIEW_SECTIONS = [
+    ("explanation", "📖 Code Explanation"),
+    ("evaluation", "🔍 Code Evaluation"),
+    ("judgement", "⚖️ Judgement Verdict"),
+    ("criticism", "🕵️ Critic Analysis"),
+    ("improvement", "🚀 Improved Solution"),
+]
 
 # Streamlit Page Config
 st.set_page_config(page_title="🧠 LeetCode Code Reviewer", page_icon="🧠", layout="wide")
@@ -17,7 +28,7 @@ logging.basicConfig(level=logging.ERROR)
 logger = logging.getLogger(__name__)
 
 # Get secrets
-gemini_api_key = st.secrets.get("GEMINI_API_KEY")
+gemini_api_key = st.secrets.get("GEMINI_API_KEY") or default_api_key()
 
 # Session Persistence Functions
 def save_review_history(history):
@@ -38,7 +49,7 @@ if 'review_history' not in st.session_state:
 # Agent Initializer
 def initialize_evaluator_agents(api_key: str) -> tuple:
     try:
-        model = Gemini(id="gemini-2.0-flash-exp", api_key=api_key)
+        model = gemini_model("gemini-2.0-flash-exp", api_key)
 
         code_explainer = Agent(
             model=model,
@@ -149,19 +160,44 @@ if st.button("🚀 Review My Code", type="primary"):
     else:
         code_explainer, code_evaluator, code_judge, code_critic, code_improver = initialize_evaluator_agents(gemini_api_key)
 
-        if all([code_explainer, code_evaluator, code_judge, code_critic, code_improver]):
+        # Reviews are cached by normalized code, so resubmitting with other formatting, comments
+        # or variable names shows the earlier review instead of running the agents again
+        agents = [code_explainer, code_evaluator, code_judge, code_critic, code_improver]
+        version = hashlib.sha256(json.dumps([[agent.name, agent.instructions] for agent in agents if agent]).encode()).hexdigest()[:12]
+        review_cache_key = cache_key("leerxox-review", review_key(version, user_problem, user_code, language, difficulty))
+        cached_review = load_cached(review_cache_key)
+
+        if cached_review:
+            st.info(f"♻️ Same code as a review from {cached_review['timestamp']} up to formatting, comments and names; showing that review.")
+            if cached_review["content"].get("static_analysis"):
+                with st.expander("🧮 Local Static Analysis"):
+                    st.markdown(cached_review["content"]["static_analysis"])
+            for key, title in REVIEW_SECTIONS:
+                st.subheader(title)
+                st.markdown(cached_review["content"][key])
+        elif all(agents):
             full_context = f"Problem:\n{user_problem}\n\nCode:\n```{language}\n{user_code}\n```"
 
+            # Local static-analysis pre-pass, shared with every agent
+            analysis, static_summary, full_context = static_analysis_context(user_code, language, full_context)
+            explainer_context = full_context + BREAKDOWN_NOTE if analysis else full_context
+            if analysis:
+                with st.expander("🧮 Local Static Analysis"):
+                    st.markdown(static_summary)
+
             session_data = {
                 "timestamp": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
                 "problem": user_problem,
                 "code": user_code,
                 "language": language,
-                "difficulty": difficulty
+                "difficulty": difficulty,
+                "static_analysis": static_summary
             }
 
             with st.spinner("📖 Explaining your code..."):
-                explanation = code_explainer.run(message=full_context).content
+                explanation = code_explainer.run(message=explainer_context).content
+                if analysis:
+                    explanation += "\n\n" + function_breakdown_markdown(analysis)
                 st.subheader("📖 Code Explanation")
                 st.markdown(explanation)
                 session_data["explanation"] = explanation
@@ -193,6 +229,7 @@ if st.button("🚀 Review My Code", type="primary"):
             # Append and Save Session
             st.session_state.review_history.append(session_data)
             save_review_history(st.session_state.review_history)
+            store_cached(review_cache_key, session_data, agent="leerxox-review", version=version)
         else:
             st.error("⚠️ Could not initialize one or more agents.")
 
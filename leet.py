@@ -4,11 +4,18 @@ import streamlit as st
 st.set_page_config(page_title="🧠 LeetCode Master", page_icon="🧠", layout="wide")
 
 from agno.agent import Agent
-from agno.models.google import Gemini
 from agno.media import Image as AgnoImage
 from typing import List
+from code_analysis import extract_approaches
+from code_sandbox import rank_approaches, leaderboard_markdown, code_execution_allowed, sandbox_isolated
+from problem_parser import parsed_problem_markdown
+from leet_agents import SECTIONS, ANALYSIS_VERSION, DIFFICULTIES, LeetCodeSections, create_agents, create_one_shot_agent, build_context, token_count, run_agent_cached
+from problem_index import load_problem_index
+from deadline import PENDING_MARKDOWN, DeadlineExceeded, deadline, one_shot_budget
+from llm import default_api_key
 import logging
 import tempfile
+import time
 import os
 
 # Setup logging
@@ -16,83 +23,52 @@ logging.basicConfig(level=logging.ERROR)
 logger = logging.getLogger(__name__)
 
 # Get API key securely
-api_key = st.secrets.get("GEMINI_API_KEY")
+api_key = st.secrets.get("GEMINI_API_KEY") or default_api_key()
+
+if "pipeline_metrics" not in st.session_state:
+    st.session_state.pipeline_metrics = []
+
+# Bundled index of well-known problems with precomputed analyses
+if "problem_index" not in st.session_state:
+    st.session_state.problem_index = load_problem_index()
 
 # Agent initializer
 def initialize_agents(api_key: str) -> tuple:
     try:
-        model = Gemini(id="gemini-2.0-flash-exp", api_key=api_key)
-
-        problem_analyzer = Agent(
-            model=model,
-            name="Problem Analyzer",
-            instructions=[
-                "You are a LeetCode problem analyzer that:",
-                "1. Breaks down the problem statement into clear components",
-                "2. Identifies the problem type (Array, String, Tree, Graph, DP, etc.)",
-                "3. Extracts key constraints and requirements",
-                "4. Identifies edge cases to consider",
-                "5. Determines the expected time/space complexity",
-                "Always respond in clear English for better understanding.",
-                "Start with a brief summary, then provide detailed analysis."
-            ],
-            markdown=True
-        )
-
-        problem_explainer = Agent(
-            model=model,
-            name="Problem Explainer",
-            instructions=[
-                "You are a coding mentor that explains LeetCode problems in depth:",
-                "1. Use simple analogies and real-world examples",
-                "2. Break down complex concepts into digestible parts",
-                "3. Provide step-by-step walkthrough of examples",
-                "4. Explain why certain approaches work better than others",
-                "5. Help users understand the intuition behind the solution",
-                "Use clear English throughout your explanations.",
-                "Focus on building conceptual understanding, not just code."
-            ],
-            markdown=True
-        )
-
-        solution_architect = Agent(
-            model=model,
-            name="Solution Architect",
-            instructions=[
-                "You are a coding expert that provides multiple solution approaches:",
-                "1. Present solutions from brute force to optimal",
-                "2. Provide clean, well-commented code in Python/Java/C++",
-                "3. Explain time and space complexity for each approach",
-                "4. Show the evolution of thinking from naive to optimal",
-                "5. Include code snippets with detailed explanations",
-                "All explanations and code comments should be in English.",
-                "Always provide at least 2-3 different approaches when possible."
-            ],
-            markdown=True
-        )
-
-        problem_solver_mentor = Agent(
-            model=model,
-            name="Problem Solver Mentor",
-            instructions=[
-                "You are a competitive programming mentor that teaches problem-solving mindset:",
-                "1. Provide strategic thinking patterns for similar problems",
-                "2. Teach when to use specific data structures and algorithms",
-                "3. Share debugging techniques and optimization strategies",
-                "4. Give advice on how to approach unknown problems",
-                "5. Provide tips for interview preparation and competitive programming",
-                "6. Share insights on recognizing problem patterns",
-                "Use clear English throughout for better understanding.",
-                "Focus on developing algorithmic thinking and problem-solving intuition."
-            ],
-            markdown=True
-        )
-
-        return problem_analyzer, problem_explainer, solution_architect, problem_solver_mentor
+        return tuple(create_agents(api_key))
     except Exception as e:
         st.error(f"Error initializing agents: {str(e)}")
         return None, None, None, None
 
+# One-shot agent producing all four sections in a single structured call
+def initialize_one_shot_agent(api_key: str) -> Agent:
+    try:
+        return create_one_shot_agent(api_key)
+    except Exception as e:
+        st.error(f"Error initializing agent: {str(e)}")
+        return None
+
+# Parse the pasted problem once; agents get the compact structure instead of the verbose text
+def build_problem_context(problem: str, difficulty: str, preferred_language: str):
+    parsed, context = build_context(problem, difficulty, preferred_language)
+    with st.expander("🧾 Parsed Problem"):
+        st.markdown(parsed_problem_markdown(parsed))
+    return parsed, context
+
+# Run the architect's Python approaches locally and rank them by measured runtime. Model output is
+# untrusted code: it only runs in an isolated sandbox or after the user opted in.
+def render_leaderboard(solutions_markdown: str, parsed: dict):
+    approaches = extract_approaches(solutions_markdown)
+    if not approaches:
+        return
+    if not code_execution_allowed(run_locally):
+        st.caption("🔒 Measured leaderboard unavailable: the sandbox is not isolated on this host (bubblewrap not installed). Tick **Run approaches locally** to measure the generated code anyway.")
+        return
+    with st.spinner("🏁 Measuring each approach on generated inputs and the problem's examples..."):
+        leaderboard = rank_approaches(approaches, parsed["max_n"] or 10 ** 5, examples=parsed["examples"])
+    st.markdown("#### 🏁 Measured Leaderboard")
+    st.markdown(leaderboard_markdown(leaderboard))
+
 # UI
 st.markdown("# 🧠 LeetCode Master")
 st.markdown("### Advanced Problem Solving Assistant")
@@ -131,6 +107,9 @@ st.sidebar.markdown("""
 - 💻 **Multiple Solutions**
 - 🧠 **Solving Strategies**
 """)
+indexed_problems = st.session_state.problem_index.problems.values()
+analyzed = sum(1 for entry in indexed_problems if entry["analyses"])
+st.sidebar.caption(f"📚 Bundled index: {len(indexed_problems)} problems, {analyzed} with precomputed analyses. Refresh offline with `python problem_index.py problems.jsonl`.")
 
 # Input field
 st.subheader("Submit Your LeetCode Problem & Get Complete Solution")
@@ -152,50 +131,138 @@ Explanation: Because nums[0] + nums[1] == 9, we return [0, 1]."""
 )
 
 # Additional options
-col1, col2 = st.columns(2)
+col1, col2, col3 = st.columns(3)
 with col1:
-    difficulty = st.selectbox("Difficulty Level:", ["Easy", "Medium", "Hard", "Unknown"])
+    difficulty = st.selectbox("Difficulty Level:", DIFFICULTIES)
 with col2:
     preferred_language = st.selectbox("Preferred Language:", ["Python", "Java", "C++", "JavaScript"])
+with col3:
+    pipeline_mode = st.radio("Pipeline Mode:", ["Four agents", "One-shot (single call)"], help="One-shot asks a single structured call for all four sections.")
+# Without bubblewrap the generated approaches could read local files and use the network
+run_locally = False
+if not sandbox_isolated():
+    run_locally = st.checkbox("🏁 Run approaches locally", help="Measure the generated Python approaches on this machine. The sandbox is not isolated here: the code can read local files and open network connections.")
+bypass_index = st.checkbox("🔄 Ignore precomputed analyses", help="Always ask the agents, even for problems in the bundled index or the response cache.")
 
 # Button
 if st.button("🚀 Solve This Problem", type="primary"):
-    if not api_key:
-        st.error("❌ API Key missing! Add it to `.streamlit/secrets.toml` as GEMINI_API_KEY.")
-    elif not user_input.strip():
+    # Well-known problems are served from the bundled index without any model call
+    indexed, match_score, precomputed = None, 0.0, None
+    if user_input.strip() and not bypass_index:
+        indexed, match_score = st.session_state.problem_index.match(user_input)
+        if indexed:
+            precomputed = st.session_state.problem_index.analysis(indexed, preferred_language, ANALYSIS_VERSION)
+            if not precomputed:
+                st.caption(f"📚 Matched **{indexed['title']}**, but the bundled index has no current {preferred_language} analysis for it yet, so the agents answer.")
+
+    if not user_input.strip():
         st.warning("Please provide a LeetCode problem statement.")
+    elif precomputed:
+        st.success(f"📚 Matched **{indexed['title']}** (`{indexed['id']}`, similarity {match_score:.0%}), served from the precomputed index generated {precomputed['generated_at']}.")
+        parsed, _ = build_problem_context(user_input, difficulty, preferred_language)
+        for i, (key, _, header, _) in enumerate(SECTIONS):
+            st.subheader(header)
+            st.markdown(precomputed["sections"].get(key) or "_No content stored for this section._")
+            if key == "solutions":
+                render_leaderboard(precomputed["sections"].get(key, ""), parsed)
+            if i < len(SECTIONS) - 1:
+                st.markdown("---")
+        st.session_state.pipeline_metrics.append({"mode": "Precomputed index", "calls": 0, "latency_s": 0.0, "input_tokens": 0, "output_tokens": 0})
+    elif not api_key:
+        st.error("❌ API Key missing! Add it to `.streamlit/secrets.toml` as GEMINI_API_KEY.")
+    elif pipeline_mode == "One-shot (single call)":
+        one_shot_agent = initialize_one_shot_agent(api_key)
+        if one_shot_agent:
+            try:
+                parsed, problem_context = build_problem_context(user_input, difficulty, preferred_language)
+
+                with st.spinner("🧠 Analyzing, explaining and solving in one pass..."):
+                    started = time.perf_counter()
+                    with deadline(one_shot_budget()) as budget:
+                        try:
+                            response = one_shot_agent.run(message=budget.budgeted(problem_context))
+                        except DeadlineExceeded:
+                            response = None
+                    latency = time.perf_counter() - started
+
+                if response is None:
+                    # The single call covers every section, so all of them are pending
+                    sections = None
+                elif isinstance(response.content, LeetCodeSections):
+                    sections = response.content
+                else:
+                    # Structured parsing failed, keep the raw answer rather than losing the call
+                    sections = LeetCodeSections(analysis=str(response.content), explanation="", solutions="", mindset="")
+
+                for i, (key, _, header, _) in enumerate(SECTIONS):
+                    st.subheader(header)
+                    if sections is None:
+                        st.markdown(PENDING_MARKDOWN)
+                    else:
+                        st.markdown(getattr(sections, key) or "_No content returned for this section._")
+                        if key == "solutions":
+                            render_leaderboard(sections.solutions, parsed)
+                    if i < len(SECTIONS) - 1:
+                        st.markdown("---")
+                if sections is None:
+                    st.info(f"⏳ The answer did not fit in the {budget.seconds:.0f}s budget. Press **🚀 Solve This Problem** again to retry, or use the four agents mode to get sections as they finish.")
+
+                st.session_state.pipeline_metrics.append({
+                    "mode": "One-shot",
+                    "calls": 1,
+                    "latency_s": round(latency, 2),
+                    "input_tokens": token_count(response, "input_tokens") if response else 0,
+                    "output_tokens": token_count(response, "output_tokens") if response else 0,
+                })
+
+            except Exception as e:
+                logger.error(f"Processing error: {str(e)}")
+                st.error("⚠️ An error occurred during analysis. Please try again.")
+        else:
+            st.error("⚠️ Agent failed to initialize. Please check your API key.")
     else:
         problem_analyzer, problem_explainer, solution_architect, problem_solver_mentor = initialize_agents(api_key)
         if all([problem_analyzer, problem_explainer, solution_architect, problem_solver_mentor]):
             try:
-                problem_context = f"Problem: {user_input}\nDifficulty: {difficulty}\nPreferred Language: {preferred_language}"
-
-                # Problem Analysis Phase
-                with st.spinner("🔍 Analyzing the problem..."):
-                    response = problem_analyzer.run(message=problem_context)
-                    st.subheader("🔍 Problem Analysis")
-                    st.markdown(response.content)
-                    st.markdown("---")
-
-                # Problem Explanation Phase
-                with st.spinner("📖 Explaining the problem in depth..."):
-                    response = problem_explainer.run(message=f"Explain this problem in depth: {problem_context}")
-                    st.subheader("📖 Deep Problem Understanding")
-                    st.markdown(response.content)
-                    st.markdown("---")
-
-                # Solution Architecture Phase
-                with st.spinner("💻 Creating multiple solutions..."):
-                    response = solution_architect.run(message=f"Provide multiple solution approaches for: {problem_context}")
-                    st.subheader("💻 Solution Approaches")
-                    st.markdown(response.content)
-                    st.markdown("---")
-
-                # Problem Solving Mentorship Phase
-                with st.spinner("🧠 Sharing problem-solving strategies..."):
-                    response = problem_solver_mentor.run(message=f"Provide problem-solving insights and strategies for: {problem_context}")
-                    st.subheader("🧠 Problem Solver's Mindset")
-                    st.markdown(response.content)
+                parsed, problem_context = build_problem_context(user_input, difficulty, preferred_language)
+                agents = [problem_analyzer, problem_explainer, solution_architect, problem_solver_mentor]
+                run_metrics = {"mode": "Four agents", "calls": 0, "latency_s": 0.0, "input_tokens": 0, "output_tokens": 0}
+
+                # One time budget for the four calls; sections that do not fit show as pending, finished
+                # ones are in the response cache, so a retry only makes the missing calls. The local
+                # leaderboard is measured after the calls so it does not spend their budget.
+                pending = 0
+                leaderboard = None
+                with deadline() as budget:
+                    for i, (agent, (key, spinner, header, prefix)) in enumerate(zip(agents, SECTIONS)):
+                        with st.spinner(spinner):
+                            started = time.perf_counter()
+                            try:
+                                content, response = run_agent_cached(agent, f"{prefix}{problem_context}", use_cache=not bypass_index)
+                            except DeadlineExceeded:
+                                content, response = None, None
+                            run_metrics["latency_s"] += time.perf_counter() - started
+                            # Cache hits (e.g. filled by the warm-up job) cost no call
+                            if response is not None:
+                                run_metrics["calls"] += 1
+                                run_metrics["input_tokens"] += token_count(response, "input_tokens")
+                                run_metrics["output_tokens"] += token_count(response, "output_tokens")
+                            st.subheader(header)
+                            st.markdown(content or PENDING_MARKDOWN)
+                        if content is None:
+                            pending += 1
+                        elif key == "solutions":
+                            leaderboard = (st.container(), content)
+                        if i < len(SECTIONS) - 1:
+                            st.markdown("---")
+                if leaderboard:
+                    with leaderboard[0]:
+                        render_leaderboard(leaderboard[1], parsed)
+                if pending:
+                    st.info(f"⏳ {pending} section(s) did not fit in the {budget.seconds:.0f}s budget. Press **🚀 Solve This Problem** again to retry them.")
+
+                run_metrics["latency_s"] = round(run_metrics["latency_s"], 2)
+                st.session_state.pipeline_metrics.append(run_metrics)
 
             except Exception as e:
                 logger.error(f"Processing error: {str(e)}")
@@ -203,6 +270,25 @@ if st.button("🚀 Solve This Problem", type="primary"):
         else:
             st.error("⚠️ Agents failed to initialize. Please check your API key.")
 
+# Pipeline metrics: compare latency and tokens of both modes
+if st.session_state.pipeline_metrics:
+    with st.expander("📊 Pipeline Mode Metrics"):
+        st.markdown("**Runs this session**")
+        st.table(st.session_state.pipeline_metrics)
+        summary = []
+        for mode in ["Four agents", "One-shot"]:
+            runs = [m for m in st.session_state.pipeline_metrics if m["mode"] == mode]
+            if runs:
+                summary.append({
+                    "mode": mode,
+                    "runs": len(runs),
+                    "avg_latency_s": round(sum(m["latency_s"] for m in runs) / len(runs), 2),
+                    "avg_input_tokens": round(sum(m["input_tokens"] for m in runs) / len(runs)),
+                    "avg_output_tokens": round(sum(m["output_tokens"] for m in runs) / len(runs)),
+                })
+        st.markdown("**Averages per mode**")
+        st.table(summary)
+
 # Tips section
 st.markdown("---")
 st.markdown("## 💡 Pro Tips")
@@ -0,0 +1,138 @@
+import hashlib
+import json
+
+from agno.agent import Agent
+from pydantic import BaseModel, Field
+
+from deadline import current_deadline
+from llm import default_api_key, gemini_model
+from problem_parser import parse_problem, compact_problem
+from response_cache import cache_key, load_cached, store_cached
+
+# Constants
+MODEL_ID = "gemini-2.0-flash-exp"
+# Difficulty choices of the leet.py selectbox, first one preselected; the difficulty is part of
+# the prompt, so offline jobs default to the same value to warm the entries the UI looks up
+DIFFICULTIES = ["Easy", "Medium", "Hard", "Unknown"]
+
+# Pipeline sections: (key, spinner text, header, prompt prefix for the four-call mode)
+SECTIONS = [
+    ("analysis", "🔍 Analyzing the problem...", "🔍 Problem Analysis", ""),
+    ("explanation", "📖 Explaining the problem in depth...", "📖 Deep Problem Understanding", "Explain this problem in depth: "),
+    ("solutions", "💻 Creating multiple solutions...", "💻 Solution Approaches", "Provide multiple solution approaches for: "),
+    ("mindset", "🧠 Sharing problem-solving strategies...", "🧠 Problem Solver's Mindset", "Provide problem-solving insights and strategies for: "),
+]
+
+# Agent definitions, one per section, shared by leet.py and the offline jobs
+AGENT_SPECS = [
+    ("Problem Analyzer", [
+        "You are a LeetCode problem analyzer that:",
+        "1. Breaks down the problem statement into clear components",
+        "2. Identifies the problem type (Array, String, Tree, Graph, DP, etc.)",
+        "3. Extracts key constraints and requirements",
+        "4. Identifies edge cases to consider",
+        "5. Determines the expected time/space complexity",
+        "Always respond in clear English for better understanding.",
+        "Start with a brief summary, then provide detailed analysis."
+    ]),
+    ("Problem Explainer", [
+        "You are a coding mentor that explains LeetCode problems in depth:",
+        "1. Use simple analogies and real-world examples",
+        "2. Break down complex concepts into digestible parts",
+        "3. Provide step-by-step walkthrough of examples",
+        "4. Explain why certain approaches work better than others",
+        "5. Help users understand the intuition behind the solution",
+        "Use clear English throughout your explanations.",
+        "Focus on building conceptual understanding, not just code."
+    ]),
+    ("Solution Architect", [
+        "You are a coding expert that provides multiple solution approaches:",
+        "1. Present solutions from brute force to optimal",
+        "2. Provide clean, well-commented code in Python/Java/C++",
+        "3. Explain time and space complexity for each approach",
+        "4. Show the evolution of thinking from naive to optimal",
+        "5. Include code snippets with detailed explanations",
+        "All explanations and code comments should be in English.",
+        "Always provide at least 2-3 different approaches when possible."
+    ]),
+    ("Problem Solver Mentor", [
+        "You are a competitive programming mentor that teaches problem-solving mindset:",
+        "1. Provide strategic thinking patterns for similar problems",
+        "2. Teach when to use specific data structures and algorithms",
+        "3. Share debugging techniques and optimization strategies",
+        "4. Give advice on how to approach unknown problems",
+        "5. Provide tips for interview preparation and competitive programming",
+        "6. Share insights on recognizing problem patterns",
+        "Use clear English throughout for better understanding.",
+        "Focus on developing algorithmic thinking and problem-solving intuition."
+    ]),
+]
+
+ONE_SHOT_INSTRUCTIONS = [
+    "You are a team of four LeetCode experts answering in one response:",
+    "1. Problem Analyzer: break down the statement, identify the problem type, constraints, edge cases and target complexity",
+    "2. Problem Explainer: explain the problem in depth with analogies and step-by-step example walkthroughs",
+    "3. Solution Architect: present 2-3 approaches from brute force to optimal with clean, well-commented code and complexity",
+    "4. Problem Solver Mentor: share strategic thinking patterns, data structure choices and interview tips",
+    "Fill each field of the response with well-formatted markdown in clear English.",
+    "Do not repeat the same content across fields."
+]
+
+# Stored analyses are only reused while the model and prompts they were generated with are unchanged
+ANALYSIS_VERSION = hashlib.sha256(json.dumps([MODEL_ID, SECTIONS, AGENT_SPECS]).encode()).hexdigest()[:12]
+
+
+# Structured output for the one-shot mode, one field per agent of the four-call mode
+class LeetCodeSections(BaseModel):
+    analysis: str = Field(..., description="Markdown problem analysis: components, problem type, key constraints, edge cases and expected time/space complexity. Start with a brief summary.")
+    explanation: str = Field(..., description="Markdown in-depth explanation: analogies, step-by-step walkthrough of the examples and the intuition behind the solution.")
+    solutions: str = Field(..., description="Markdown with 2-3 solution approaches from brute force to optimal, each with well-commented code in the preferred language and its time/space complexity.")
+    mindset: str = Field(..., description="Markdown problem-solving mindset: patterns for similar problems, when to use which data structures, debugging and interview tips.")
+
+
+def create_agents(api_key: str) -> list:
+    model = gemini_model(MODEL_ID, api_key)
+    return [Agent(model=model, name=name, instructions=instructions, markdown=True) for name, instructions in AGENT_SPECS]
+
+
+def create_one_shot_agent(api_key: str) -> Agent:
+    # Own model instance, response_model sets the response schema on the model
+    model = gemini_model(MODEL_ID, api_key)
+    return Agent(
+        model=model,
+        name="LeetCode Master",
+        instructions=ONE_SHOT_INSTRUCTIONS,
+        response_model=LeetCodeSections,
+        markdown=True
+    )
+
+
+# Parsed problem plus the prompt context every agent receives
+def build_context(problem: str, difficulty: str, preferred_language: str):
+    parsed = parse_problem(problem)
+    problem_text = compact_problem(parsed) if parsed["constraints"] or parsed["examples"] else problem
+    return parsed, f"Problem:\n{problem_text}\nDifficulty: {difficulty}\nPreferred Language: {preferred_language}"
+
+
+def token_count(response, key: str) -> int:
+    return sum((response.metrics or {}).get(key, []) or [0])
+
+
+# Outside Streamlit the key comes from the environment or the same secrets file; any key of
+# the pool will do, model calls are spread over all of them (llm.LimitedGemini)
+def load_api_key() -> str:
+    return default_api_key()
+
+
+# One agent call through the shared response cache; the response is None on a cache hit.
+# Within a deadline (deadline.py) the prompt may ask for a short answer, which is not cached.
+def run_agent_cached(agent: Agent, message: str, use_cache: bool = True, call=None):
+    key = cache_key(ANALYSIS_VERSION, agent.name, message)
+    cached = load_cached(key) if use_cache else None
+    if cached:
+        return cached["content"], None
+    budgeted = current_deadline().budgeted(message)
+    response = call(agent, budgeted) if call else agent.run(message=budgeted)
+    if budgeted == message:
+        store_cached(key, response.content, agent=agent.name, version=ANALYSIS_VERSION)
+    return response.content, response
@@ -0,0 +1,216 @@
+# Offline batch jobs for the leet.py pipeline, run outside Streamlit:
+#   python leet_batch.py warmup problems.jsonl --workers 4 --rpm 15
+#   python leet_batch.py run problems/ --output results.jsonl --workers 8
+import argparse
+import json
+import os
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from datetime import datetime
+
+from leet_agents import DIFFICULTIES, SECTIONS, build_context, create_agents, load_api_key, run_agent_cached
+from llm import DEFAULT_RPM, configure_rate_limit, rate_limit_gauges
+
+# Constants
+DEFAULT_WORKERS = 4
+
+
+# Agno agents keep per-run state, so every worker thread gets its own set
+_local = threading.local()
+
+
+def _worker_agents(api_key: str) -> list:
+    if not hasattr(_local, "agents"):
+        _local.agents = create_agents(api_key)
+    return _local.agents
+
+
+# Four agents for one problem through the shared response cache; rate limiting and 429
+# retries happen in the model (llm.LimitedGemini)
+def run_problem(problem: dict, api_key: str, language: str, difficulty: str) -> dict:
+    _, context = build_context(problem["statement"], problem.get("difficulty", difficulty), language)
+    result = {"id": problem["id"], "language": language, "sections": {}, "latency": {}, "cached": 0, "calls": 0}
+    for agent, (key, _, _, prefix) in zip(_worker_agents(api_key), SECTIONS):
+        started = time.perf_counter()
+        content, response = run_agent_cached(agent, f"{prefix}{context}")
+        result["sections"][key] = content
+        if response is None:
+            result["cached"] += 1
+        else:
+            result["latency"][key] = time.perf_counter() - started
+            result["calls"] += 1
+    return result
+
+
+# JSONL ({"statement": ...} per line), a directory of Markdown files (one problem each)
+# or plain text with problems separated by "---" lines
+def read_problem_file(path: str) -> list:
+    if os.path.isdir(path):
+        problems = []
+        for name in sorted(os.listdir(path)):
+            if name.endswith((".md", ".markdown", ".txt")):
+                with open(os.path.join(path, name), "r") as f:
+                    problems.append({"id": os.path.splitext(name)[0], "statement": f.read().strip()})
+        return [p for p in problems if p["statement"]]
+    with open(path, "r") as f:
+        text = f.read()
+    if path.endswith(".jsonl"):
+        items = [json.loads(line) for line in text.splitlines() if line.strip()]
+        problems = [{**item, "statement": item.get("statement") or item.get("problem", "")} for item in items]
+    else:
+        problems = [{"statement": chunk.strip()} for chunk in text.split("\n---\n") if chunk.strip()]
+    for i, problem in enumerate(problems, 1):
+        problem.setdefault("id", f"p{i:04d}")
+    return [p for p in problems if p["statement"].strip()]
+
+
+def _percentile(values: list, q: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, max(0, round(q * len(ordered)) - 1))]
+
+
+def latency_report(latency: dict) -> str:
+    lines = []
+    for key, _, header, _ in SECTIONS:
+        values = latency.get(key)
+        if values:
+            lines.append(
+                f"  {header}: n={len(values)} mean={sum(values) / len(values):.1f}s "
+                f"p50={_percentile(values, 0.5):.1f}s p95={_percentile(values, 0.95):.1f}s max={max(values):.1f}s"
+            )
+    return "\n".join(lines) or "  no model calls"
+
+
+def key_report() -> str:
+    lines = [
+        f"  {k['key']}: {k['calls']} calls, {k['tokens']} tokens, {k['rate_limited']} rate limited, {k['failures']} failed"
+        + ("" if k["healthy"] else f" (cooling down {k['cooldown_s']:.0f}s)")
+        for k in rate_limit_gauges()["keys"]
+    ]
+    return "\n".join(lines) or "  no key pool configured"
+
+
+def run_batch(problems: list, api_key: str, workers: int, rpm: int, language: str, difficulty: str, on_result=None, report_every: int = 0) -> dict:
+    configure_rate_limit(rpm)
+    stats = {"done": 0, "cached": 0, "calls": 0, "failures": [], "results": [], "latency": {}}
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        futures = {pool.submit(run_problem, p, api_key, language, difficulty): p for p in problems}
+        for future in as_completed(futures):
+            problem = futures[future]
+            try:
+                result = future.result()
+                stats["cached"] += result["cached"]
+                stats["calls"] += result["calls"]
+                stats["results"].append(result)
+                for key, seconds in result["latency"].items():
+                    stats["latency"].setdefault(key, []).append(seconds)
+                status = "cached" if result["calls"] == 0 else f"{result['calls']} calls"
+            except Exception as e:
+                stats["failures"].append({"id": problem["id"], "error": str(e)})
+                result, status = None, f"failed: {e}"
+            stats["done"] += 1
+            elapsed = time.perf_counter() - started
+            gauges = rate_limit_gauges()
+            print(
+                f"[{stats['done']}/{len(problems)}] {problem['id']} {status} | {stats['done'] / elapsed * 60:.1f} problems/min"
+                f" | rate limit queue {gauges['queue_depth']}, wait p95 {gauges['wait_p95_s']:.1f}s"
+            )
+            if on_result:
+                on_result(problem, result)
+            if report_every and stats["done"] % report_every == 0:
+                print("Per-agent latency so far:\n" + latency_report(stats["latency"]))
+    stats["elapsed_s"] = time.perf_counter() - started
+    return stats
+
+
+def warmup(args, api_key: str):
+    problems = read_problem_file(args.problems)
+    stats = run_batch(problems, api_key, args.workers, args.rpm, args.language, args.difficulty)
+    minutes = stats["elapsed_s"] / 60
+    # Cached sections were filled by an earlier (possibly interrupted) run
+    print(
+        f"\nWarm-up done: {len(problems) - len(stats['failures'])}/{len(problems)} problems in {minutes:.1f} min "
+        f"({len(problems) / max(minutes, 1e-9):.1f} problems/min), {stats['calls']} model calls, {stats['cached']} sections already cached"
+    )
+    print("API keys:\n" + key_report())
+    for failure in stats["failures"]:
+        print(f"❌ {failure['id']}: {failure['error']}", file=sys.stderr)
+    return 1 if stats["failures"] else 0
+
+
+# Headless pipeline run: results are streamed to JSONL, problems already in the output are skipped
+def run(args, api_key: str):
+    problems = read_problem_file(args.problems)
+    done_ids = set()
+    if os.path.exists(args.output):
+        with open(args.output, "r") as f:
+            done_ids = {json.loads(line).get("id") for line in f if line.strip()}
+    pending = [p for p in problems if p["id"] not in done_ids]
+    if done_ids:
+        print(f"Resuming: {len(problems) - len(pending)} of {len(problems)} problems already in {args.output}")
+    write_lock = threading.Lock()
+
+    with open(args.output, "a") as out:
+        def write_result(problem, result):
+            if result is None:
+                return
+            record = {
+                "id": problem["id"],
+                "timestamp": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+                "language": args.language,
+                "problem": problem["statement"],
+                "sections": result["sections"],
+                "latency_s": {k: round(v, 2) for k, v in result["latency"].items()},
+                "cached_sections": result["cached"],
+            }
+            with write_lock:
+                out.write(json.dumps(record) + "\n")
+                out.flush()
+
+        stats = run_batch(pending, api_key, args.workers, args.rpm, args.language, args.difficulty, write_result, report_every=10)
+
+    minutes = stats["elapsed_s"] / 60
+    print(
+        f"\nRun done: {len(pending) - len(stats['failures'])}/{len(pending)} problems in {minutes:.1f} min "
+        f"({len(pending) / max(minutes, 1e-9):.1f} problems/min), {stats['calls']} model calls, {stats['cached']} cached sections"
+    )
+    print("Per-agent latency:\n" + latency_report(stats["latency"]))
+    print("API keys:\n" + key_report())
+    for failure in stats["failures"]:
+        print(f"❌ {failure['id']}: {failure['error']}", file=sys.stderr)
+    return 1 if stats["failures"] else 0
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Batch jobs for the LeetCode Master pipeline.")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    warm = commands.add_parser("warmup", help="Fill the response cache for a list of problems (resumable)")
+    warm.add_argument("problems", help="JSONL file or text file with problems separated by '---' lines")
+    warm.add_argument("--language", default="Python", help="Preferred language the UI will ask for")
+    warm.add_argument("--difficulty", default=DIFFICULTIES[0], choices=DIFFICULTIES, help="Difficulty used when a problem has none, as preselected in leet.py")
+    warm.add_argument("--workers", type=int, default=DEFAULT_WORKERS, help="Problems processed concurrently")
+    warm.add_argument("--rpm", type=int, default=DEFAULT_RPM, help="Model requests per minute across all workers")
+    warm.set_defaults(handler=warmup)
+
+    batch = commands.add_parser("run", help="Run the pipeline over a problem file or Markdown directory, streaming results to JSONL")
+    batch.add_argument("problems", help="JSONL file, directory of .md files, or text file with '---' separators")
+    batch.add_argument("--output", default="leet_results.jsonl", help="JSONL file results are appended to")
+    batch.add_argument("--language", default="Python", help="Preferred language for the solutions")
+    batch.add_argument("--difficulty", default=DIFFICULTIES[0], choices=DIFFICULTIES, help="Difficulty used when a problem has none, as preselected in leet.py")
+    batch.add_argument("--workers", type=int, default=DEFAULT_WORKERS, help="Problems processed concurrently")
+    batch.add_argument("--rpm", type=int, default=DEFAULT_RPM, help="Model requests per minute across all workers")
+    batch.set_defaults(handler=run)
+
+    args = parser.parse_args()
+    api_key = load_api_key()
+    if not api_key:
+        sys.exit("❌ GEMINI_API_KEY not set in the environment or .streamlit/secrets.toml")
+    sys.exit(args.handler(args, api_key))
+
+
+if __name__ == "__main__":
+    main()
@@ -4,7 +4,8 @@ import streamlit as st
 st.set_page_config(page_title="🧠 LeetCode Code Reviewer", page_icon="🧠", layout="wide")
 
 from agno.agent import Agent
-from agno.models.google import Gemini
+from llm import default_api_key, gemini_model
+from code_analysis import BREAKDOWN_NOTE, static_analysis_context, function_breakdown_markdown
 import logging
 
 # Setup logging
@@ -12,12 +13,12 @@ logging.basicConfig(level=logging.ERROR)
 logger = logging.getLogger(__name__)
 
 # Get API key securely from Streamlit secrets
-api_key = st.secrets.get("GEMINI_API_KEY")
+api_key = st.secrets.get("GEMINI_API_KEY") or default_api_key()
 
 # Agent Initializer
 def initialize_evaluator_agents(api_key: str) -> tuple:
     try:
-        model = Gemini(id="gemini-2.0-flash-exp", api_key=api_key)
+        model = gemini_model("gemini-2.0-flash-exp", api_key)
 
         code_evaluator = Agent(
             model=model,
@@ -138,6 +139,13 @@ if st.button("🚀 Review My Code", type="primary"):
         if all([code_evaluator, code_judge, code_critic, code_improver, code_explainer]):
             full_context = f"Problem:\n{user_problem}\n\nCode:\n```{language}\n{user_code}\n```"
 
+            # Local static-analysis pre-pass, shared with every agent
+            analysis, static_summary, full_context = static_analysis_context(user_code, language, full_context)
+            explainer_context = full_context + BREAKDOWN_NOTE if analysis else full_context
+            if analysis:
+                with st.expander("🧮 Local Static Analysis"):
+                    st.markdown(static_summary)
+
             with st.spinner("🔍 Evaluating Code..."):
                 eval_response = code_evaluator.run(message=full_context)
                 st.subheader("🔍 Code Evaluation")
@@ -159,9 +167,11 @@ if st.button("🚀 Review My Code", type="primary"):
                 st.markdown(improve_response.content)
 
             with st.spinner("📖 Explaining Code..."):
-                explainer_response = code_explainer.run(message=full_context)
+                explainer_response = code_explainer.run(message=explainer_context)
                 st.subheader("📖 Code Explanation")
                 st.markdown(explainer_response.content)
+                if analysis:
+                    st.markdown(function_breakdown_markdown(analysis))
 
         else:
             st.error("⚠️ Failed to initialize agents. Please check your configuration.")
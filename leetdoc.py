@@ -1,8 +1,11 @@
 import streamlit as st
 import logging
 from datetime import datetime
-from agno.agent import Agent
-from agno.models.google import Gemini
+from code_sandbox import benchmark_markdown
+from review_pipeline import REVIEW_STEPS
+from review_queue import ACTIVE_STATUSES, submit_job, get_job, list_jobs, queue_counts, retry_job, ensure_worker, live_workers
+from deadline import PENDING_MARKDOWN
+from llm import default_api_key
 
 # Streamlit Page Config
 st.set_page_config(page_title="🧠 LeetCode Code Reviewer", page_icon="🧠", layout="wide")
@@ -12,89 +15,101 @@ logging.basicConfig(level=logging.ERROR)
 logger = logging.getLogger(__name__)
 
 # Get secrets
-gemini_api_key = st.secrets.get("GEMINI_API_KEY")
-
-# Initialize history
-if 'review_history' not in st.session_state:
-    st.session_state.review_history = []
-
-# Agent Initializer
-def initialize_evaluator_agents(api_key: str) -> tuple:
-    try:
-        model = Gemini(id="gemini-2.0-flash-exp", api_key=api_key)
-
-        code_explainer = Agent(
-            model=model,
-            name="Code Explainer",
-            instructions=[
-                "You are a detailed technical explainer of code logic and structure.",
-                "Go through the code line by line, explaining what each part does.",
-                "Break down all functions, control flows, loops, conditions, and data structures used.",
-                "Respond in markdown using this format:",
-                "### 🔎 Code Walkthrough\nExplain what happens from the start to the end, including all helper functions.",
-                "### ⚙️ Function Breakdown\nFor each function, explain parameters, return value, and role in the solution.",
-                "### 📊 Data Structures Used\nMention the data structures used, why they were chosen, and how they impact performance."
-            ],
-            markdown=True
-        )
-
-        code_evaluator = Agent(
-            model=model,
-            name="Code Evaluator",
-            instructions=[
-                "You are an expert algorithm master evaluating submitted code.",
-                "Return output in the following structured format with markdown:",
-                "### 🔍 Code Summary\nBriefly explain what this code is trying to solve.",
-                "### ⏱️ Time & Space Complexity\nState Big-O complexity for worst and average cases.",
-                "### 📐 Code Structure & Style\nComment on the code's readability, organization, and clarity.",
-                "### 🧼 Clean Code Score\nGive a score out of 10 with a short justification."
-            ],
-            markdown=True
-        )
-
-        code_judge = Agent(
-            model=model,
-            name="Code Judge",
-            instructions=[
-                "You are an elite problem judge like a LeetCode moderator.",
-                "Respond in markdown with:",
-                "### 🧪 Test Verdict\nNormal Case ✅ | Edge Case ❗ | Large Input 🚀",
-                "### 🧠 Logical Correctness\nExplain flaws if any.",
-                "### 🔥 Verdict\n✅ Accepted | ⚠️ TLE | ❌ Wrong Answer",
-                "### 🛠️ Diagnostic Tip\n1-line insight for debugging."
-            ],
-            markdown=True
-        )
-
-        code_critic = Agent(
-            model=model,
-            name="Code Critic",
-            instructions=[
-                "You are a seasoned code critic analyzing the solution.",
-                "Break down into:",
-                "### ❌ Pain Points\nTop issues in logic, structure, or performance.",
-                "### 🧠 Better Practices\nImprovements and justifications.",
-                "### ⚡ Missed Optimization Opportunities\nMention better algorithms or structures."
-            ],
-            markdown=True
-        )
-
-        code_improver = Agent(
-            model=model,
-            name="Code Improver",
-            instructions=[
-                "You are a master developer rewriting this code to be better.",
-                "### 🚀 Improved Version (with explanation)\nExplain what changed and why.",
-                "### 📦 Optimized Code\nRespond with clean, efficient code block."
-            ],
-            markdown=True
-        )
-
-        return code_explainer, code_evaluator, code_judge, code_critic, code_improver
-
-    except Exception as e:
-        st.error(f"Error initializing agents: {str(e)}")
-        return None, None, None, None, None
+gemini_api_key = st.secrets.get("GEMINI_API_KEY") or default_api_key()
+
+# Reviews run as queued jobs in review_queue.py workers, one is started on submit if none is alive;
+# the job ID in the URL survives reloads
+if "review_job" not in st.session_state:
+    st.session_state.review_job = st.query_params.get("job")
+
+
+# Render one finished pipeline step
+def render_step(key: str, session: dict):
+    if key == "explanation":
+        st.subheader("📖 Code Explanation")
+        st.markdown(session["explanation"])
+    elif key == "evaluation":
+        st.subheader("🔍 Code Evaluation")
+        st.markdown(session["evaluation"])
+        if session.get("memory_profile"):
+            with st.expander("🧠 Measured Memory Profile"):
+                st.markdown(session["memory_profile"])
+    elif key == "judgement":
+        st.subheader("⚖️ Judgement Verdict")
+        if session.get("measurement"):
+            judge_col, measured_col = st.columns(2)
+            with judge_col:
+                st.markdown(session["judgement"])
+            with measured_col:
+                st.markdown("#### ⏱️ Measured Runtime")
+                st.markdown(session["measurement"])
+        else:
+            st.markdown(session["judgement"])
+    elif key == "criticism":
+        st.subheader("🕵️ Critic Analysis")
+        st.markdown(session["criticism"])
+    elif key == "improvement":
+        st.subheader("🚀 Improved Solution")
+        st.markdown(session["improvement"])
+    elif key == "benchmark" and session.get("benchmark"):
+        st.subheader("🧪 Optimized Code Benchmark")
+        st.markdown(benchmark_markdown(session["benchmark"]))
+
+
+# View of one job: progress while queued or running, the review and any pending steps after
+def render_job(job: dict):
+    job_id = job["id"]
+    session = job["session"]
+    done = len(job["steps_done"])
+    if job["status"] == "queued":
+        counts = queue_counts()
+        workers = live_workers()
+        # Also covers jobs opened by ID or retried after the last worker stopped
+        if not workers:
+            ensure_worker()
+        hint = f"{workers} worker(s) alive" if workers else "starting a worker"
+        st.info(f"⏳ Job `{job_id}` is queued ({counts['queued']} waiting, {counts['running']} running, {hint}). For more throughput run `python review_queue.py worker --processes 4`.")
+    elif job["status"] == "running":
+        next_step = next((spinner for key, spinner, _ in REVIEW_STEPS if key not in job["steps_done"]), "")
+        st.progress(done / len(REVIEW_STEPS), text=f"{next_step} ({done}/{len(REVIEW_STEPS)} steps, job `{job_id}`)")
+    elif job["status"] == "partial":
+        reason = f"some steps failed ({job['error']})" if job["error"] else "it ran out of time"
+        st.warning(f"⏳ Job `{job_id}` finished {done}/{len(REVIEW_STEPS)} steps, {reason}; the rest are pending.")
+        if st.button("🔁 Retry pending steps", key=f"retry_{job_id}"):
+            retry_job(job_id)
+            st.rerun()
+    elif job["status"] == "failed":
+        st.error(f"❌ Job `{job_id}` failed after {done} steps: {job['error']}")
+    else:
+        st.success(f"✅ Review finished {job['finished_at']} (job `{job_id}`).")
+
+    if session.get("incremental") == "same":
+        st.caption(f"♻️ Only formatting or comments changed since job `{session['base_job']}`, its review was reused.")
+    elif session.get("incremental") == "diff":
+        st.caption(f"♻️ Updated from the review of job `{session['base_job']}` using the diff of your edit.")
+    if session.get("sandbox_skipped"):
+        st.caption("🔒 The code was not executed: the sandbox is not isolated on this host (install bubblewrap, or start workers with `--run-unisolated`). Memory, runtime and benchmark sections are based on the agents alone.")
+    if session.get("units"):
+        st.caption(f"🧩 Large submission, reviewed unit by unit: {', '.join(session['units'])}.")
+    if session.get("static_analysis"):
+        with st.expander("🧮 Local Static Analysis"):
+            st.markdown(session["static_analysis"])
+    for key, spinner, _ in REVIEW_STEPS:
+        if key in job["steps_done"]:
+            render_step(key, session)
+        elif job["status"] == "partial":
+            st.markdown(f"{spinner.rstrip('.')} — {PENDING_MARKDOWN}")
+
+
+# Refreshed on its own without rerunning the page while a worker may still change the job; one
+# full rerun once it settles, after which it is drawn outside the fragment and nothing polls
+@st.fragment(run_every=2)
+def render_live_job(job_id: str):
+    job = get_job(job_id)
+    if job and job["status"] not in ACTIVE_STATUSES:
+        st.rerun()
+    if job:
+        render_job(job)
 
 
 # Sidebar
@@ -120,6 +135,7 @@ st.text_area("📝 Problem Statement", key="problem", height=200, placeholder="P
 st.text_area("💻 Your Code", key="code", height=250, placeholder="Paste your code here.")
 language = st.selectbox("Preferred Language", ["Python", "Java", "C++", "JavaScript"])
 difficulty = st.selectbox("Difficulty Level", ["Easy", "Medium", "Hard", "Unknown"])
+incremental = st.checkbox("♻️ Incremental re-review", value=True, help="After editing the code, update the previous review from the diff instead of starting over.")
 
 # Review button
 if st.button("🚀 Review My Code", type="primary"):
@@ -131,65 +147,53 @@ if st.button("🚀 Review My Code", type="primary"):
     elif not user_problem or not user_code:
         st.warning("Please provide both the problem and your code.")
     else:
-        code_explainer, code_evaluator, code_judge, code_critic, code_improver = initialize_evaluator_agents(gemini_api_key)
-
-        if all([code_explainer, code_evaluator, code_judge, code_critic, code_improver]):
-            full_context = f"Problem:\n{user_problem}\n\nCode:\n```{language}\n{user_code}\n```"
-
-            session_data = {
-                "timestamp": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
-                "problem": user_problem,
-                "code": user_code,
-                "language": language,
-                "difficulty": difficulty
-            }
-
-            with st.spinner("📖 Explaining your code..."):
-                explanation = code_explainer.run(message=full_context).content
-                st.subheader("📖 Code Explanation")
-                st.markdown(explanation)
-                session_data["explanation"] = explanation
-
-            with st.spinner("🔍 Evaluating Code..."):
-                evaluation = code_evaluator.run(message=full_context).content
-                st.subheader("🔍 Code Evaluation")
-                st.markdown(evaluation)
-                session_data["evaluation"] = evaluation
-
-            with st.spinner("⚖️ Judging Code..."):
-                judgement = code_judge.run(message=full_context).content
-                st.subheader("⚖️ Judgement Verdict")
-                st.markdown(judgement)
-                session_data["judgement"] = judgement
-
-            with st.spinner("🕵️ Analyzing Drawbacks..."):
-                criticism = code_critic.run(message=full_context).content
-                st.subheader("🕵️ Critic Analysis")
-                st.markdown(criticism)
-                session_data["criticism"] = criticism
-
-            with st.spinner("🚀 Rewriting Optimized Code..."):
-                improvement = code_improver.run(message=full_context).content
-                st.subheader("🚀 Improved Solution")
-                st.markdown(improvement)
-                session_data["improvement"] = improvement
-
-            st.session_state.review_history.append(session_data)
-        else:
-            st.error("⚠️ Could not initialize one or more agents.")
+        try:
+            base_job = st.session_state.review_job if incremental else None
+            st.session_state.review_job = submit_job(user_problem, user_code, language, difficulty, base_job)
+            ensure_worker()
+            st.query_params["job"] = st.session_state.review_job
+            # Jobs are keyed by the normalized code, an equivalent earlier submission answers this one
+            if get_job(st.session_state.review_job)["request"]["code"] != user_code:
+                st.info(f"♻️ Same code as job `{st.session_state.review_job}` up to formatting, comments and names; its review is shown.")
+        except Exception as e:
+            st.error(f"❌ Could not queue the review: {str(e)}")
+
+# Open any earlier job, e.g. one started in another tab
+def open_job():
+    if st.session_state.job_lookup.strip():
+        st.session_state.review_job = st.session_state.job_lookup.strip()
+        st.query_params["job"] = st.session_state.review_job
+
+st.sidebar.text_input("🔎 Open review job", key="job_lookup", placeholder="Job ID", on_change=open_job)
+
+if st.session_state.review_job:
+    job = get_job(st.session_state.review_job)
+    if not job:
+        st.error(f"❌ Review job `{st.session_state.review_job}` not found.")
+    elif job["status"] in ACTIVE_STATUSES:
+        render_live_job(job["id"])
+    else:
+        render_job(job)
 
 # Display Review History
-if st.session_state.review_history:
+finished_jobs = [job for job in list_jobs(status="done") if job["id"] != st.session_state.review_job]
+if finished_jobs:
     st.markdown("## 📚 Previous Review Sessions")
-    for session in reversed(st.session_state.review_history):
+    for session in (job["session"] for job in finished_jobs):
         with st.expander(f"🧠 {session['timestamp']} — {session['language']} | {session['difficulty']}"):
             st.markdown(f"### 📋 Problem Statement\n{session['problem']}")
             st.markdown(f"### 💻 Code\n```{session['language'].lower()}\n{session['code']}\n```")
             st.markdown(f"### 📖 Code Explanation\n{session['explanation']}")
             st.markdown(f"### 🔍 Code Evaluation\n{session['evaluation']}")
+            if session.get("memory_profile"):
+                st.markdown(f"### 🧠 Measured Memory Profile\n{session['memory_profile']}")
             st.markdown(f"### ⚖️ Judgement Verdict\n{session['judgement']}")
+            if session.get("measurement"):
+                st.markdown(f"### ⏱️ Measured Runtime\n{session['measurement']}")
             st.markdown(f"### 🕵️ Critic Analysis\n{session['criticism']}")
             st.markdown(f"### 🚀 Improved Solution\n{session['improvement']}")
+            if session.get("benchmark"):
+                st.markdown(f"### 🧪 Optimized Code Benchmark\n{benchmark_markdown(session['benchmark'])}")
 
 # Footer
 st.markdown("---")
@@ -0,0 +1,376 @@
+import asyncio
+import contextvars
+import copy
+import hashlib
+import os
+import random
+import threading
+import time
+import tomllib
+from collections import OrderedDict
+from concurrent.futures import FIRST_COMPLETED, Future, wait
+
+from agno.models.google import Gemini
+from google import genai
+
+from deadline import DeadlineExceeded, current_deadline
+from key_pool import KeyPool
+from model_tiers import fallback_model, hedge_after, model_health, route
+from rate_limiter import RateLimiter, is_rate_limited
+
+# Constants
+SECRETS_FILE = ".streamlit/secrets.toml"
+DEFAULT_RPM = 15
+DEFAULT_TPM = 1000000
+MAX_RETRIES = 5
+CHARS_PER_TOKEN = 4
+EXPECTED_OUTPUT_TOKENS = 1000
+# Keys sent by callers (api_service.py X-Gemini-Key) each get a client, limiter and pool; past this
+# many the least recently used caller key is dropped. Keys of the configured pool are always kept.
+MAX_CALLER_KEYS = 256
+
+# One Gemini client per API key for the whole process, so every agent reuses its connections
+_clients = OrderedDict()
+_clients_lock = threading.Lock()
+
+# One rate limiter per API key, each key has its own quota; GEMINI_RATE_LIMIT_DB shares them across processes
+_limiters = OrderedDict()
+_limit_config = {}
+_limiters_lock = threading.Lock()
+
+# Key pool from GEMINI_API_KEYS / GEMINI_API_KEY; a key passed in that is not part of it gets a pool of its own
+_pools = OrderedDict()
+_pools_lock = threading.Lock()
+
+
+# Entry of a per-key cache, created on first use; call with the cache's lock held
+def _cached_for_key(cache: OrderedDict, api_key, create, configured: KeyPool):
+    if api_key in cache:
+        cache.move_to_end(api_key)
+        return cache[api_key]
+    cache[api_key] = value = create()
+    callers = [key for key in cache if key is not None and key not in configured]
+    for key in callers[:max(0, len(callers) - MAX_CALLER_KEYS)]:
+        del cache[key]
+    return value
+
+
+def shared_client(api_key: str) -> genai.Client:
+    configured = shared_key_pool()
+    with _clients_lock:
+        return _cached_for_key(_clients, api_key, lambda: genai.Client(api_key=api_key), configured)
+
+
+def _split_keys(value) -> list:
+    if isinstance(value, str):
+        return [k.strip() for k in value.split(",") if k.strip()]
+    return [k for k in value or [] if k]
+
+
+# Environment first, then .streamlit/secrets.toml (GEMINI_API_KEYS may be a list or comma-separated)
+def load_api_keys() -> list:
+    keys = [os.environ.get("GEMINI_API_KEY")] + _split_keys(os.environ.get("GEMINI_API_KEYS"))
+    if os.path.exists(SECRETS_FILE):
+        with open(SECRETS_FILE, "rb") as f:
+            secrets = tomllib.load(f)
+        keys += [secrets.get("GEMINI_API_KEY")] + _split_keys(secrets.get("GEMINI_API_KEYS"))
+    return list(dict.fromkeys(k for k in keys if k))
+
+
+def default_api_key() -> str:
+    keys = load_api_keys()
+    return keys[0] if keys else None
+
+
+def shared_key_pool() -> KeyPool:
+    with _pools_lock:
+        if None not in _pools:
+            _pools[None] = KeyPool(load_api_keys(), os.environ.get("GEMINI_KEY_STRATEGY", "least_loaded"))
+        return _pools[None]
+
+
+def key_pool_for(api_key: str) -> KeyPool:
+    pool = shared_key_pool()
+    if api_key is None or api_key in pool:
+        return pool
+    with _pools_lock:
+        return _cached_for_key(_pools, api_key, lambda: KeyPool([api_key]), pool)
+
+
+def configure_rate_limit(rpm: int = None, tpm: int = None, path: str = None):
+    with _limiters_lock:
+        _limiters.clear()
+        _limit_config.update(
+            rpm=rpm or int(os.environ.get("GEMINI_RPM", DEFAULT_RPM)),
+            tpm=tpm or int(os.environ.get("GEMINI_TPM", DEFAULT_TPM)),
+            path=path or os.environ.get("GEMINI_RATE_LIMIT_DB"),
+        )
+
+
+def shared_limiter(api_key: str) -> RateLimiter:
+    if not _limit_config:
+        configure_rate_limit()
+    configured = shared_key_pool()
+    # Buckets in a shared file are named by a hash, the key itself is never written to disk
+    name = hashlib.sha256(api_key.encode()).hexdigest()[:12]
+    with _limiters_lock:
+        return _cached_for_key(_limiters, api_key, lambda: RateLimiter(_limit_config["rpm"], _limit_config["tpm"], _limit_config["path"], name), configured)
+
+
+# Gauges summed over every key's limiter, plus the per-key pool metrics
+def rate_limit_gauges() -> dict:
+    with _limiters_lock:
+        gauges = [limiter.gauges() for limiter in _limiters.values()]
+    return {
+        "queue_depth": sum(g["queue_depth"] for g in gauges),
+        "oldest_wait_s": max([g["oldest_wait_s"] for g in gauges] or [0.0]),
+        "granted": sum(g["granted"] for g in gauges),
+        "wait_p95_s": max([g["wait_p95_s"] for g in gauges] or [0.0]),
+        "rate_limit_pauses": sum(g["rate_limit_pauses"] for g in gauges),
+        "keys": shared_key_pool().metrics(),
+    }
+
+
+# Prompt size is known before the call, the answer size only after it (see RateLimiter.settle)
+def estimate_tokens(messages) -> int:
+    return sum(len(str(m.content or "")) for m in messages) // CHARS_PER_TOKEN + EXPECTED_OUTPUT_TOKENS
+
+
+def _usage(response):
+    usage = getattr(response, "usage_metadata", None)
+    return getattr(usage, "total_token_count", None)
+
+
+def _backoff(attempt: int) -> float:
+    return min(60, 2 ** attempt * 5) * (1 + random.random() / 2)
+
+
+# A blocking call on its own daemon thread, so a hedge can race it; it keeps the caller's deadline
+def _in_thread(fn, *args) -> Future:
+    future = Future()
+    context = contextvars.copy_context()
+
+    def run():
+        try:
+            future.set_result(context.run(fn, *args))
+        except BaseException as e:
+            future.set_exception(e)
+
+    threading.Thread(target=run, daemon=True).start()
+    return future
+
+
+# Gemini whose calls each take a key from the pool and pass through that key's rate limiter.
+# A 429 cools the key down and the call is retried, normally on another key; a stream is
+# only retried if nothing was yielded yet.
+# Calls slower than GEMINI_HEDGE_AFTER get a duplicate request on the fallback tier and the first
+# answer wins; while a model's circuit breaker is open its calls go to the fallback tier directly.
+class LimitedGemini(Gemini):
+    # Waits for a key and for the limiter end with the request deadline (deadline.py), and the
+    # call itself times out with whatever budget is left after them
+    def _start(self, estimate: int, model_id: str):
+        budget = current_deadline()
+        budget.check()
+        timeout = None if budget.seconds is None else budget.remaining()
+        pool = key_pool_for(self.api_key)
+        try:
+            key = pool.acquire(timeout)
+        except TimeoutError as e:
+            raise DeadlineExceeded(str(e)) from e
+        try:
+            shared_limiter(key).acquire(estimate, None if timeout is None else budget.remaining())
+            budget.check()
+        except TimeoutError as e:
+            pool.release(key)
+            raise DeadlineExceeded(str(e)) from e
+        except BaseException:
+            pool.release(key)
+            raise
+        # Same settings on the chosen key's client and model tier, concurrent calls never share mutable state
+        bound = copy.copy(self)
+        bound.client = shared_client(key)
+        bound.id = model_id
+        if budget.seconds is not None:
+            http_options = {"timeout": int(budget.remaining() * 1000)}
+            bound.generative_model_kwargs = {**(self.generative_model_kwargs or {}), "http_options": http_options}
+        return pool, key, bound
+
+    def _finish(self, pool: KeyPool, key: str, estimate: int, usage, error: Exception = None):
+        shared_limiter(key).settle(estimate, usage)
+        pool.release(key, usage, error)
+
+    # A call given up before its answer (the losing request of a hedge): the key is free again and
+    # the reserved estimate is refunded, as for a rejected call
+    def _abandon(self, pool: KeyPool, key: str, estimate: int):
+        shared_limiter(key).settle(estimate, 0)
+        pool.release(key)
+
+    def _rejected(self, pool: KeyPool, key: str, estimate: int, error: Exception, attempt: int):
+        # A rejected call used no tokens
+        limiter = shared_limiter(key)
+        limiter.settle(estimate, 0)
+        pool.release(key, error=error)
+        # Out of budget, most likely the call's own timeout; not worth a retry
+        if current_deadline().expired():
+            raise DeadlineExceeded(f"Request deadline reached: {error}") from error
+        if attempt == MAX_RETRIES - 1 or not is_rate_limited(error):
+            raise error
+        # Only a pool of one has to wait for the same key again
+        if len(pool) == 1:
+            limiter.pause(_backoff(attempt))
+
+    def _invoke_once(self, model_id: str, messages):
+        estimate = estimate_tokens(messages)
+        started = time.perf_counter()
+        for attempt in range(MAX_RETRIES):
+            pool, key, bound = self._start(estimate, model_id)
+            try:
+                response = Gemini.invoke(bound, messages)
+            except Exception as e:
+                try:
+                    self._rejected(pool, key, estimate, e, attempt)
+                except Exception:
+                    model_health(model_id).record(False, time.perf_counter() - started)
+                    raise
+                continue
+            self._finish(pool, key, estimate, _usage(response))
+            model_health(model_id).record(True, time.perf_counter() - started)
+            return response
+
+    async def _ainvoke_once(self, model_id: str, messages):
+        estimate = estimate_tokens(messages)
+        started = time.perf_counter()
+        for attempt in range(MAX_RETRIES):
+            start = asyncio.ensure_future(asyncio.to_thread(self._start, estimate, model_id))
+            try:
+                pool, key, bound = await asyncio.shield(start)
+            except asyncio.CancelledError:
+                # The other request of a hedge won while this one was still queued for a key
+                start.add_done_callback(lambda f: f.exception() or self._abandon(f.result()[0], f.result()[1], estimate))
+                raise
+            try:
+                response = await Gemini.ainvoke(bound, messages)
+            except asyncio.CancelledError:
+                # The other request of a hedge won: this model did not answer in time, which the
+                # breaker counts as a failure rather than a success
+                self._abandon(pool, key, estimate)
+                model_health(model_id).record(False, time.perf_counter() - started)
+                raise
+            except Exception as e:
+                try:
+                    self._rejected(pool, key, estimate, e, attempt)
+                except Exception:
+                    model_health(model_id).record(False, time.perf_counter() - started)
+                    raise
+                continue
+            self._finish(pool, key, estimate, _usage(response))
+            model_health(model_id).record(True, time.perf_counter() - started)
+            return response
+
+    def invoke(self, messages):
+        primary, delay = route(self.id), hedge_after()
+        if not delay:
+            return self._invoke_once(primary, messages)
+        first = _in_thread(self._invoke_once, primary, messages)
+        done, _ = wait([first], timeout=delay)
+        if done:
+            return first.result()
+        model_health(primary).count("hedged")
+        second = _in_thread(self._invoke_once, fallback_model(primary) or primary, messages)
+        pending = {first, second}
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                if future.exception() is None:
+                    model_health(primary).count("hedge_wins" if future is second else "primary_wins")
+                    # A blocking call cannot be interrupted, the slower one finishes in the background unused
+                    return future.result()
+        return first.result()
+
+    async def ainvoke(self, messages):
+        primary, delay = route(self.id), hedge_after()
+        if not delay:
+            return await self._ainvoke_once(primary, messages)
+        first = asyncio.ensure_future(self._ainvoke_once(primary, messages))
+        done, _ = await asyncio.wait({first}, timeout=delay)
+        if done:
+            return first.result()
+        model_health(primary).count("hedged")
+        second = asyncio.ensure_future(self._ainvoke_once(fallback_model(primary) or primary, messages))
+        pending = {first, second}
+        while pending:
+            done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                if task.exception() is None:
+                    model_health(primary).count("hedge_wins" if task is second else "primary_wins")
+                    for other in pending:
+                        other.cancel()
+                    return task.result()
+        return first.result()
+
+    # Streams are not hedged, a partial answer is already on screen; they follow the breaker and
+    # feed it with their time to first chunk
+    def invoke_stream(self, messages):
+        model_id, estimate = route(self.id), estimate_tokens(messages)
+        started = time.perf_counter()
+        for attempt in range(MAX_RETRIES):
+            pool, key, bound = self._start(estimate, model_id)
+            usage, first_chunk, error, rejected = None, False, None, False
+            try:
+                for chunk in Gemini.invoke_stream(bound, messages):
+                    if not first_chunk:
+                        first_chunk = True
+                        model_health(model_id).record(True, time.perf_counter() - started)
+                    usage = _usage(chunk) or usage
+                    yield chunk
+                return
+            except Exception as e:
+                if first_chunk:
+                    error = e
+                    raise
+                # Nothing yielded yet: _rejected settles the call and the loop retries it
+                rejected = True
+                try:
+                    self._rejected(pool, key, estimate, e, attempt)
+                except Exception:
+                    model_health(model_id).record(False, time.perf_counter() - started)
+                    raise
+            finally:
+                # Finished, failed partway or closed by the caller (cancelled run): the usage seen
+                # so far replaces the estimate
+                if not rejected:
+                    self._finish(pool, key, estimate, usage, error)
+
+    async def ainvoke_stream(self, messages):
+        model_id, estimate = route(self.id), estimate_tokens(messages)
+        started = time.perf_counter()
+        for attempt in range(MAX_RETRIES):
+            pool, key, bound = await asyncio.to_thread(self._start, estimate, model_id)
+            usage, first_chunk, error, rejected = None, False, None, False
+            try:
+                async for chunk in Gemini.ainvoke_stream(bound, messages):
+                    if not first_chunk:
+                        first_chunk = True
+                        model_health(model_id).record(True, time.perf_counter() - started)
+                    usage = _usage(chunk) or usage
+                    yield chunk
+                return
+            except Exception as e:
+                if first_chunk:
+                    error = e
+                    raise
+                rejected = True
+                try:
+                    self._rejected(pool, key, estimate, e, attempt)
+                except Exception:
+                    model_health(model_id).record(False, time.perf_counter() - started)
+                    raise
+            finally:
+                # Also on GeneratorExit and cancellation, which are not Exceptions
+                if not rejected:
+                    self._finish(pool, key, estimate, usage, error)
+
+
+# api_key=None draws from the configured key pool; a key from the pool is balanced across all of it
+def gemini_model(model_id: str, api_key: str = None) -> Gemini:
+    return LimitedGemini(id=model_id, api_key=api_key)
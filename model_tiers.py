@@ -0,0 +1,106 @@
+import os
+import threading
+import time
+from collections import deque
+
+# Constants
+# Lighter tier a call can be hedged to or rerouted to while its model is degraded
+FALLBACK_MODELS = {
+    "gemini-2.0-flash-exp": "gemini-2.0-flash-lite",
+    "gemini-2.0-flash": "gemini-2.0-flash-lite",
+}
+DEFAULT_HEDGE_AFTER = 10.0
+SLOW_CALL = 30.0
+BREAKER_WINDOW = 20
+BREAKER_MIN_CALLS = 10
+BREAKER_FAILURE_RATIO = 0.5
+BREAKER_OPEN_SECONDS = 60
+
+
+# Seconds before a duplicate request is sent; GEMINI_HEDGE_AFTER=0 turns hedging off
+def hedge_after() -> float:
+    return float(os.environ.get("GEMINI_HEDGE_AFTER", DEFAULT_HEDGE_AFTER))
+
+
+def fallback_model(model_id: str) -> str:
+    return FALLBACK_MODELS.get(model_id)
+
+
+# Per model: recent outcomes for the breaker, plus hedge counters. A call that fails or takes
+# longer than SLOW_CALL counts as degraded; too many of those in the window open the breaker
+# and calls go to the fallback tier until a trial call after BREAKER_OPEN_SECONDS succeeds.
+class ModelHealth:
+    def __init__(self, model_id: str):
+        self.model_id = model_id
+        self.outcomes = deque(maxlen=BREAKER_WINDOW)
+        self.opened_at = None
+        self.trial_running = False
+        self.counters = {"calls": 0, "failures": 0, "slow": 0, "rerouted": 0, "hedged": 0, "hedge_wins": 0, "primary_wins": 0}
+        self.lock = threading.Lock()
+
+    def allow(self) -> bool:
+        with self.lock:
+            if self.opened_at is None:
+                return True
+            # Half-open: one trial call at a time once the breaker has been open long enough
+            if time.time() - self.opened_at >= BREAKER_OPEN_SECONDS and not self.trial_running:
+                self.trial_running = True
+                return True
+            self.counters["rerouted"] += 1
+            return False
+
+    def record(self, ok: bool, seconds: float):
+        with self.lock:
+            degraded = not ok or seconds > SLOW_CALL
+            self.counters["calls"] += 1
+            self.counters["failures"] += not ok
+            self.counters["slow"] += ok and seconds > SLOW_CALL
+            self.outcomes.append(degraded)
+            if self.trial_running:
+                self.trial_running = False
+                self.opened_at = time.time() if degraded else None
+                if not degraded:
+                    self.outcomes.clear()
+            elif self.opened_at is None and len(self.outcomes) >= BREAKER_MIN_CALLS and sum(self.outcomes) / len(self.outcomes) >= BREAKER_FAILURE_RATIO:
+                self.opened_at = time.time()
+
+    def count(self, name: str):
+        with self.lock:
+            self.counters[name] += 1
+
+    def metrics(self) -> dict:
+        with self.lock:
+            state = "closed" if self.opened_at is None else ("half-open" if self.trial_running else "open")
+            degraded = sum(self.outcomes) / len(self.outcomes) if self.outcomes else 0.0
+            hedged = self.counters["hedged"]
+            return {
+                "breaker": state,
+                "degraded_ratio": round(degraded, 2),
+                **self.counters,
+                "hedge_win_rate": round(self.counters["hedge_wins"] / hedged, 2) if hedged else None,
+            }
+
+
+_health = {}
+_health_lock = threading.Lock()
+
+
+def model_health(model_id: str) -> ModelHealth:
+    with _health_lock:
+        if model_id not in _health:
+            _health[model_id] = ModelHealth(model_id)
+        return _health[model_id]
+
+
+def model_metrics() -> dict:
+    with _health_lock:
+        models = list(_health.values())
+    return {health.model_id: health.metrics() for health in models}
+
+
+# Model a call should use: its own, or the fallback tier while its breaker is open
+def route(model_id: str) -> str:
+    fallback = fallback_model(model_id)
+    if fallback is None or model_health(model_id).allow():
+        return model_id
+    return fallback
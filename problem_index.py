@@ -0,0 +1,212 @@
+# Canonical problem index: maps pasted LeetCode text to a known problem ID and serves
+# precomputed, versioned analyses for it. Refresh offline with:
+#   python problem_index.py problems.jsonl --language Python --language Java
+# problems.jsonl holds the seed problems; --register-only adds them without generating analyses.
+import argparse
+import hashlib
+import json
+import os
+import re
+import sys
+import time
+from datetime import datetime
+
+from problem_parser import parse_problem, SUPERSCRIPTS
+
+# Constants
+INDEX_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "problem_index.json")
+INDEX_VERSION = 1
+MATCH_THRESHOLD = 0.9
+# With the same title, a trimmed paste only has to be contained in the indexed statement
+TITLE_MATCH_THRESHOLD = 0.8
+SHINGLE_SIZE = 3
+
+
+def slugify(title: str) -> str:
+    title = re.sub(r"^\s*\d+\s*[.)]\s*", "", title or "")
+    return re.sub(r"[^a-z0-9]+", "-", title.lower()).strip("-")
+
+
+# Lowercase words only: numbering, markdown, punctuation and spacing differences disappear
+def normalize_statement(text: str) -> str:
+    text = (text or "").translate(SUPERSCRIPTS).lower()
+    text = re.sub(r"```.*?```", " ", text, flags=re.DOTALL)
+    return " ".join(re.findall(r"[a-z0-9]+", text))
+
+
+def problem_fingerprint(text: str) -> str:
+    return hashlib.sha256(normalize_statement(parse_problem(text)["statement"]).encode()).hexdigest()[:16]
+
+
+def _shingles(normalized: str) -> set:
+    words = normalized.split()
+    if len(words) <= SHINGLE_SIZE:
+        return {" ".join(words)} if words else set()
+    return {" ".join(words[i:i + SHINGLE_SIZE]) for i in range(len(words) - SHINGLE_SIZE + 1)}
+
+
+def _jaccard(a: set, b: set) -> float:
+    if not a or not b:
+        return 0.0
+    return len(a & b) / len(a | b)
+
+
+class ProblemIndex:
+    def __init__(self, problems=None):
+        self.problems = {}
+        self.by_fingerprint = {}
+        self.by_slug = {}
+        for entry in problems or []:
+            self._index(entry)
+
+    def _index(self, entry: dict):
+        entry["_shingles"] = _shingles(entry["normalized"])
+        self.problems[entry["id"]] = entry
+        self.by_fingerprint[entry["fingerprint"]] = entry
+        self.by_slug[slugify(entry["title"])] = entry
+
+    def add_problem(self, problem_id: str, title: str, statement: str, difficulty: str = "Unknown") -> dict:
+        parsed = parse_problem(statement)
+        title = title or parsed["title"]
+        problem_id = problem_id or slugify(title)
+        entry = self.problems.get(problem_id) or {"analyses": {}}
+        self.by_fingerprint.pop(entry.get("fingerprint"), None)
+        entry.update({
+            "id": problem_id,
+            "title": title,
+            "difficulty": difficulty,
+            "fingerprint": problem_fingerprint(statement),
+            "normalized": normalize_statement(parsed["statement"]),
+        })
+        self._index(entry)
+        return entry
+
+    # Canonical entry for pasted text: exact fingerprint, then near-duplicate statement
+    def match(self, text: str):
+        parsed = parse_problem(text)
+        normalized = normalize_statement(parsed["statement"])
+        exact = self.by_fingerprint.get(hashlib.sha256(normalized.encode()).hexdigest()[:16])
+        if exact:
+            return exact, 1.0
+        shingles = _shingles(normalized)
+        titled = self.by_slug.get(slugify(parsed["title"])) if parsed["title"] else None
+        best, best_score = None, 0.0
+        for entry in self.problems.values():
+            score = _jaccard(shingles, entry["_shingles"])
+            if score > best_score:
+                best, best_score = entry, score
+        if titled and shingles and len(shingles & titled["_shingles"]) / len(shingles) >= TITLE_MATCH_THRESHOLD:
+            return titled, round(_jaccard(shingles, titled["_shingles"]), 3)
+        if best_score >= MATCH_THRESHOLD:
+            return best, round(best_score, 3)
+        return None, round(best_score, 3)
+
+    # Precomputed sections for a language, only when generated with the current agents
+    def analysis(self, entry: dict, language: str, version: str):
+        stored = entry["analyses"].get(language)
+        if stored and stored["version"] == version:
+            return stored
+        return None
+
+    def store_analysis(self, problem_id: str, language: str, version: str, sections: dict, model: str):
+        self.problems[problem_id]["analyses"][language] = {
+            "version": version,
+            "model": model,
+            "generated_at": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+            "sections": sections,
+        }
+
+    def to_dict(self) -> dict:
+        return {
+            "version": INDEX_VERSION,
+            "problems": [{k: v for k, v in e.items() if not k.startswith("_")} for e in self.problems.values()],
+        }
+
+
+# The index is bundled next to the code rather than in sessions/, it ships with the app
+def load_problem_index(path: str = INDEX_FILE) -> ProblemIndex:
+    if os.path.exists(path):
+        with open(path, "r") as f:
+            data = json.load(f)
+        if data.get("version") == INDEX_VERSION:
+            return ProblemIndex(data.get("problems", []))
+    return ProblemIndex()
+
+
+def save_problem_index(index: ProblemIndex, path: str = INDEX_FILE):
+    # Write then rename, so the app never loads a half-written index
+    with open(path + ".tmp", "w") as f:
+        json.dump(index.to_dict(), f, indent=2)
+    os.replace(path + ".tmp", path)
+
+
+# Matching entries only: pasted statements are recognised, answers still come from the agents
+def register_problems(index: ProblemIndex, problems: list, path: str = INDEX_FILE) -> dict:
+    for problem in problems:
+        entry = index.add_problem(problem.get("id"), problem.get("title", ""), problem["statement"], problem.get("difficulty", "Unknown"))
+        print(f"📌 {entry['id']}")
+    save_problem_index(index, path)
+    return {"registered": len(problems)}
+
+
+# Offline refresh: (re)generate the analyses that are missing or stale for the current agents
+def refresh_index(index: ProblemIndex, problems: list, api_key: str, languages: list, force: bool = False, path: str = INDEX_FILE) -> dict:
+    from leet_agents import ANALYSIS_VERSION, MODEL_ID, SECTIONS, build_context, create_agents
+
+    agents = create_agents(api_key)
+    stats = {"generated": 0, "fresh": 0, "failed": 0}
+    for problem in problems:
+        entry = index.add_problem(problem.get("id"), problem.get("title", ""), problem["statement"], problem.get("difficulty", "Unknown"))
+        for language in languages:
+            if not force and index.analysis(entry, language, ANALYSIS_VERSION):
+                stats["fresh"] += 1
+                continue
+            try:
+                _, context = build_context(problem["statement"], entry["difficulty"], language)
+                sections = {}
+                for agent, (key, _, _, prefix) in zip(agents, SECTIONS):
+                    sections[key] = agent.run(message=f"{prefix}{context}").content
+                index.store_analysis(entry["id"], language, ANALYSIS_VERSION, sections, MODEL_ID)
+                # Saved per problem so an interrupted refresh keeps its progress
+                save_problem_index(index, path)
+                stats["generated"] += 1
+                print(f"✅ {entry['id']} [{language}]")
+            except Exception as e:
+                stats["failed"] += 1
+                print(f"❌ {entry['id']} [{language}]: {e}", file=sys.stderr)
+    save_problem_index(index, path)
+    return stats
+
+
+def read_problems(path: str) -> list:
+    with open(path, "r") as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Refresh the precomputed LeetCode problem index.")
+    parser.add_argument("problems", help="JSONL file with one {id, title, statement, difficulty} object per line")
+    parser.add_argument("--language", action="append", dest="languages", help="Preferred language to precompute (repeatable, default Python)")
+    parser.add_argument("--index", default=INDEX_FILE, help="Index file to update")
+    parser.add_argument("--force", action="store_true", help="Regenerate analyses even when they are current")
+    parser.add_argument("--register-only", action="store_true", help="Add the problems for matching without generating analyses (no API key needed)")
+    args = parser.parse_args()
+
+    if args.register_only:
+        stats = register_problems(load_problem_index(args.index), read_problems(args.problems), args.index)
+        print(f"Registered {stats['registered']} problems")
+        return
+
+    from leet_agents import load_api_key
+
+    api_key = load_api_key()
+    if not api_key:
+        sys.exit("❌ GEMINI_API_KEY not set in the environment or .streamlit/secrets.toml")
+    started = time.perf_counter()
+    index = load_problem_index(args.index)
+    stats = refresh_index(index, read_problems(args.problems), api_key, args.languages or ["Python"], args.force, args.index)
+    print(f"Done in {time.perf_counter() - started:.0f}s: {stats['generated']} generated, {stats['fresh']} already current, {stats['failed']} failed")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,286 @@
+import ast
+import json
+import re
+
+SUPERSCRIPTS = str.maketrans("⁰¹²³⁴⁵⁶⁷⁸⁹", "0123456789")
+
+# "10^5", "10⁵", "2 * 10^4", "5 x 10^4", "1e5", "10**9", "100000", "2^31 - 1"
+NUMBER_RE = re.compile(
+    r"(?:(\d+(?:\.\d+)?)\s*[*x×·]\s*)?(\d+)\s*(?:\^|\*\*)\s*\{?(\d+)\}?(\s*-\s*1)?|(\d+(?:\.\d+)?)e(\d+)|(\d[\d,]*)"
+)
+COMPARISON_RE = re.compile(r"\s*(<=|≤|>=|≥|==|<|>)\s*")
+SIZE_HINTS = ("length", ".size", "len(", "number of")
+SIZE_SUBJECTS = {"n", "m", "k", "q"}
+
+SECTION_RE = re.compile(r"^\s*(example\s*\d*|constraints|follow[- ]up|note)\s*:?", re.IGNORECASE | re.MULTILINE)
+EXAMPLE_RE = re.compile(
+    r"Input\s*:\s*(?P<input>.+?)\s*\n\s*Output\s*:\s*(?P<output>.+?)"
+    r"(?:\s*\n\s*Explanation\s*:\s*(?P<explanation>.+?))?(?=\n\s*\n|\n\s*Example|\n\s*Constraints|\n\s*Follow|\Z)",
+    re.IGNORECASE | re.DOTALL,
+)
+NOTE_RE = re.compile(
+    r"^\s*(?P<kind>follow[- ]up|note)\s*:?[ \t]*(?P<text>.*?)(?=\n\s*\n\s*(?:example|constraints|follow[- ]up|note)\b|\Z)",
+    re.IGNORECASE | re.MULTILINE | re.DOTALL,
+)
+
+# Largest n each complexity class handles in about a second (~10^8 simple operations)
+FEASIBLE_CLASSES = [
+    (11, "O(n!)"),
+    (25, "O(2^n · n)"),
+    (500, "O(n³)"),
+    (10 ** 4, "O(n²)"),
+    (10 ** 6, "O(n log n)"),
+    (10 ** 8, "O(n)"),
+]
+
+
+# Superscript exponents are written without a caret: "10⁵" means 10^5
+def _normalize_powers(text: str) -> str:
+    return re.sub(r"10([⁰¹²³⁴⁵⁶⁷⁸⁹]+)", lambda m: "10^" + m.group(1).translate(SUPERSCRIPTS), text)
+
+
+def parse_number(text: str):
+    text = _normalize_powers(text).replace(" ", "")
+    match = NUMBER_RE.search(text)
+    if not match:
+        return None
+    factor, base, exponent, minus_one, mantissa, e_exponent, plain = match.groups()
+    if base:
+        return int(float(factor or 1) * int(base) ** int(exponent)) - (1 if minus_one else 0)
+    if mantissa:
+        return int(float(mantissa) * 10 ** int(e_exponent))
+    return int(plain.replace(",", ""))
+
+
+def _signed_number(text: str):
+    value = parse_number(text)
+    if value is None or re.search(r"[A-Za-z_]\w*[\[.(]", text):
+        return None
+    return -value if text.strip().startswith("-") else value
+
+
+def constraints_block(problem: str) -> str:
+    match = re.search(
+        r"^\s*constraints\s*:?[ \t]*\n?(.*?)(?:\n\s*\n\s*(?:follow[- ]up|example|note)\b|\Z)",
+        problem or "", re.IGNORECASE | re.DOTALL | re.MULTILINE,
+    )
+    return match.group(1) if match else ""
+
+
+# "1 <= nums.length <= 10^4" -> {"subject": "nums.length", "lower": 1, "upper": 10000}
+def parse_constraint(line: str) -> dict:
+    text = _normalize_powers(re.sub(r"^\s*(?:[-•*]\s+)?", "", line).strip(" \t`"))
+    parts = COMPARISON_RE.split(text)
+    constraint = {"text": text, "subject": text, "lower": None, "upper": None}
+    if len(parts) >= 5:
+        constraint.update(subject=parts[2].strip("` "), lower=_signed_number(parts[0]), upper=_signed_number(parts[4]))
+    elif len(parts) == 3:
+        left, op, right = parts
+        if _signed_number(left) is not None and _signed_number(right) is None:
+            left, right = right, left
+            op = {"<=": ">=", "≤": "≥", "<": ">", ">=": "<=", "≥": "≤", ">": "<"}.get(op, op)
+        constraint["subject"] = left.strip("` ")
+        if op in ("<=", "≤", "<"):
+            constraint["upper"] = _signed_number(right)
+        elif op in (">=", "≥", ">"):
+            constraint["lower"] = _signed_number(right)
+    return constraint
+
+
+def parse_constraints(problem: str) -> list:
+    return [parse_constraint(line) for line in constraints_block(problem).splitlines() if line.strip()]
+
+
+# "1 <= m, n <= 200" bounds m and n alike, so each variable of the subject is checked on its own
+def _is_size_constraint(constraint: dict) -> bool:
+    variables = [v.strip("` ") for v in constraint["subject"].lower().split(",")]
+    return any(v in SIZE_SUBJECTS or any(hint in v for hint in SIZE_HINTS) for v in variables if v)
+
+
+# Largest bound on an input size (array length, string length, n) in the "Constraints:" block
+def max_input_size(problem: str, default: int = 10 ** 5) -> int:
+    sizes = [c["upper"] for c in parse_constraints(problem) if _is_size_constraint(c) and c["upper"]]
+    return max(sizes) if sizes else default
+
+
+def feasible_complexity(max_n: int) -> str:
+    for limit, label in FEASIBLE_CLASSES:
+        if max_n <= limit:
+            return label
+    return "O(log n)"
+
+
+# "nums = [2,7,11,15], target = 9" -> [("nums", "[2,7,11,15]"), ("target", "9")]
+def split_assignments(text: str) -> list:
+    parts, depth, quote, current = [], 0, None, ""
+    for char in text:
+        if quote:
+            quote = None if char == quote else quote
+        elif char in "\"'":
+            quote = char
+        elif char in "[({":
+            depth += 1
+        elif char in "])}":
+            depth -= 1
+        elif char == "," and depth == 0:
+            parts.append(current)
+            current = ""
+            continue
+        current += char
+    parts.append(current)
+    assignments = []
+    for part in parts:
+        match = re.match(r"\s*([A-Za-z_]\w*)\s*=\s*(.+)", part, re.DOTALL)
+        if match:
+            assignments.append((match.group(1), match.group(2).strip()))
+        elif assignments and assignments[-1][0]:
+            name, value = assignments[-1]
+            assignments[-1] = (name, f"{value},{part}")
+        elif part.strip():
+            assignments.append((None, part.strip()))
+    return assignments
+
+
+# Example values are JSON-ish: null/true/false, quoted strings, nested lists
+def parse_literal(text: str):
+    cleaned = re.sub(r"\bnull\b", "None", re.sub(r"\btrue\b", "True", re.sub(r"\bfalse\b", "False", text.strip())))
+    try:
+        return ast.literal_eval(cleaned)
+    except (ValueError, SyntaxError):
+        return text.strip()
+
+
+def shape_of(value) -> str:
+    if isinstance(value, bool):
+        return "bool"
+    if isinstance(value, int):
+        return "int"
+    if isinstance(value, float):
+        return "float"
+    if isinstance(value, str):
+        return "string"
+    if value is None:
+        return "null"
+    if isinstance(value, (list, tuple)):
+        if not value:
+            return "[]"
+        inner = {shape_of(v) for v in value if v is not None}
+        return f"{inner.pop() if len(inner) == 1 else 'any'}[]"
+    return type(value).__name__
+
+
+# Text of the Follow-up and Note sections, which can ask for more than the constraints alone imply
+def parse_notes(problem: str) -> dict:
+    notes = {"follow_up": [], "note": []}
+    for match in NOTE_RE.finditer(problem or ""):
+        kind = "note" if match.group("kind").lower() == "note" else "follow_up"
+        text = " ".join(match.group("text").split())
+        if text:
+            notes[kind].append(text)
+    return {kind: " ".join(texts) for kind, texts in notes.items()}
+
+
+def parse_examples(problem: str) -> list:
+    examples = []
+    for match in EXAMPLE_RE.finditer(problem or ""):
+        inputs = [(name, parse_literal(value)) for name, value in split_assignments(match.group("input").strip())]
+        examples.append({
+            "input": inputs,
+            "output": parse_literal(match.group("output").strip()),
+            "explanation": (match.group("explanation") or "").strip(),
+        })
+    return examples
+
+
+# Structured view of a pasted problem: statement, constraints, examples, shapes and target complexity
+def parse_problem(problem: str) -> dict:
+    text = (problem or "").strip()
+    first_section = SECTION_RE.search(text)
+    statement = text[:first_section.start()].strip() if first_section else text
+    lines = statement.splitlines()
+    title = ""
+    if len(lines) > 1 and len(lines[0]) <= 80 and not lines[0].rstrip().endswith((".", ":", "?")):
+        title, statement = lines[0].strip(), "\n".join(lines[1:]).strip()
+    constraints = parse_constraints(text)
+    examples = parse_examples(text)
+    notes = parse_notes(text)
+    sizes = [c["upper"] for c in constraints if _is_size_constraint(c) and c["upper"]]
+    values = [abs(b) for c in constraints if not _is_size_constraint(c) for b in (c["lower"], c["upper"]) if b is not None]
+    max_n = max(sizes) if sizes else None
+    input_shapes = {}
+    if examples:
+        for position, (name, value) in enumerate(examples[0]["input"]):
+            input_shapes[name or f"arg{position + 1}"] = shape_of(value)
+    return {
+        "title": title,
+        "statement": statement,
+        "constraints": constraints,
+        "examples": examples,
+        "follow_up": notes["follow_up"],
+        "note": notes["note"],
+        "input_shapes": input_shapes,
+        "output_shape": shape_of(examples[0]["output"]) if examples else None,
+        "max_n": max_n,
+        "value_bound": max(values) if values else None,
+        "target_complexity": feasible_complexity(max_n) if max_n else None,
+    }
+
+
+def _bound_text(value) -> str:
+    if value is None:
+        return "?"
+    magnitude = abs(value)
+    exponent = len(str(magnitude)) - 1
+    if magnitude >= 10_000 and magnitude == 10 ** exponent:
+        return f"{'-' if value < 0 else ''}10^{exponent}"
+    return str(value)
+
+
+# Compact form sent to the agents in place of the verbose pasted constraints and examples
+def compact_problem(parsed: dict) -> str:
+    lines = []
+    if parsed["title"]:
+        lines.append(f"Title: {parsed['title']}")
+    lines.append(f"Statement: {parsed['statement']}")
+    if parsed["constraints"]:
+        bounds = []
+        for c in parsed["constraints"]:
+            if c["lower"] is not None or c["upper"] is not None:
+                bounds.append(f"{c['subject']} in [{_bound_text(c['lower'])}, {_bound_text(c['upper'])}]")
+            else:
+                bounds.append(c["text"])
+        lines.append("Constraints: " + "; ".join(bounds))
+    if parsed["input_shapes"]:
+        shapes = ", ".join(f"{name}: {shape}" for name, shape in parsed["input_shapes"].items())
+        lines.append(f"Shapes: ({shapes}) -> {parsed['output_shape']}")
+    for i, example in enumerate(parsed["examples"], 1):
+        inputs = ", ".join(f"{name}={json.dumps(value)}" if name else json.dumps(value) for name, value in example["input"])
+        explanation = " ".join(example["explanation"].split())
+        lines.append(f"Example {i}: {inputs} -> {json.dumps(example['output'])}" + (f" ({explanation})" if explanation else ""))
+    if parsed["note"]:
+        lines.append(f"Note: {parsed['note']}")
+    if parsed["target_complexity"]:
+        # The bound only says what the constraints allow; a follow-up may ask for better
+        bound = f"n <= {_bound_text(parsed['max_n'])}"
+        if parsed["follow_up"]:
+            lines.append(f"Target: {bound} allows {parsed['target_complexity']}, but aim for what the follow-up asks")
+        else:
+            lines.append(f"Target: {bound}, so {parsed['target_complexity']} or better")
+    if parsed["follow_up"]:
+        lines.append(f"Follow-up: {parsed['follow_up']}")
+    return "\n".join(lines)
+
+
+def parsed_problem_markdown(parsed: dict) -> str:
+    lines = []
+    if parsed["target_complexity"]:
+        lines.append(f"**Target complexity:** n ≤ {parsed['max_n']:,} → {parsed['target_complexity']} or better")
+    if parsed["input_shapes"]:
+        shapes = ", ".join(f"`{name}: {shape}`" for name, shape in parsed["input_shapes"].items())
+        lines.append(f"**Shapes:** {shapes} → `{parsed['output_shape']}`")
+    if parsed["constraints"]:
+        lines.append("**Constraints:**\n" + "\n".join(f"- `{c['text']}`" for c in parsed["constraints"]))
+    lines.append(f"**Examples parsed:** {len(parsed['examples'])}")
+    if parsed["follow_up"]:
+        lines.append(f"**Follow-up:** {parsed['follow_up']}")
+    return "\n\n".join(lines)
@@ -0,0 +1,179 @@
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import deque
+from contextlib import closing
+
+# Constants
+RATE_LIMIT_MARKERS = ("429", "resource_exhausted", "rate limit", "quota")
+MAX_SLEEP = 1.0
+WAIT_WINDOW = 500
+
+
+def is_rate_limited(error: Exception) -> bool:
+    if getattr(error, "status_code", None) == 429:
+        return True
+    text = str(error).lower()
+    return any(marker in text for marker in RATE_LIMIT_MARKERS)
+
+
+# Token-bucket refill and take on a plain state dict; both stores below share it.
+# Returns 0 when the request was admitted, otherwise the seconds until it could be.
+def _take(state: dict, rpm: int, tpm: int, tokens: int, now: float) -> float:
+    elapsed = max(0.0, now - state["updated"])
+    state["requests"] = min(rpm, state["requests"] + elapsed * rpm / 60)
+    if tpm:
+        state["tokens"] = min(tpm, state["tokens"] + elapsed * tpm / 60)
+    state["updated"] = now
+    if state["paused_until"] > now:
+        return state["paused_until"] - now
+    tokens = min(tokens, tpm) if tpm else 0
+    wait = (1 - state["requests"]) * 60 / rpm if state["requests"] < 1 else 0.0
+    if tpm and state["tokens"] < tokens:
+        wait = max(wait, (tokens - state["tokens"]) * 60 / tpm)
+    if wait <= 0:
+        state["requests"] -= 1
+        state["tokens"] -= tokens
+    return wait
+
+
+def _left(since: float, timeout: float) -> float:
+    return None if timeout is None else max(0.0, timeout - (time.monotonic() - since))
+
+
+def _initial_state(rpm: int, tpm: int) -> dict:
+    return {"requests": float(rpm), "tokens": float(tpm or 0), "updated": time.time(), "paused_until": 0.0}
+
+
+# Buckets for this process only
+class MemoryBuckets:
+    def __init__(self, rpm: int, tpm: int = None):
+        self.rpm, self.tpm = rpm, tpm
+        self.state = _initial_state(rpm, tpm)
+        self.lock = threading.Lock()
+
+    def take(self, tokens: int) -> float:
+        with self.lock:
+            return _take(self.state, self.rpm, self.tpm, tokens, time.time())
+
+    def adjust(self, tokens: int):
+        with self.lock:
+            self.state["tokens"] -= tokens
+
+    def pause(self, seconds: float):
+        with self.lock:
+            self.state["paused_until"] = max(self.state["paused_until"], time.time() + seconds)
+
+    def paused_for(self) -> float:
+        return max(0.0, self.state["paused_until"] - time.time())
+
+
+# Buckets in a SQLite file, shared by every process pointing at it (Streamlit servers, workers, batch jobs)
+class SqliteBuckets:
+    def __init__(self, path: str, rpm: int, tpm: int = None, name: str = "gemini"):
+        self.path, self.rpm, self.tpm, self.name = path, rpm, tpm, name
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        with closing(self._connect()) as conn:
+            conn.execute("CREATE TABLE IF NOT EXISTS buckets (name TEXT PRIMARY KEY, state TEXT NOT NULL)")
+            conn.execute("INSERT OR IGNORE INTO buckets VALUES (?, ?)", (name, json.dumps(_initial_state(rpm, tpm))))
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+        conn.execute("PRAGMA journal_mode=WAL")
+        return conn
+
+    # Read-modify-write of the bucket row under an exclusive write lock
+    def _update(self, change):
+        with closing(self._connect()) as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                state = json.loads(conn.execute("SELECT state FROM buckets WHERE name = ?", (self.name,)).fetchone()[0])
+                result = change(state)
+                conn.execute("UPDATE buckets SET state = ? WHERE name = ?", (json.dumps(state), self.name))
+                conn.execute("COMMIT")
+            except Exception:
+                conn.execute("ROLLBACK")
+                raise
+        return result
+
+    def take(self, tokens: int) -> float:
+        return self._update(lambda state: _take(state, self.rpm, self.tpm, tokens, time.time()))
+
+    def adjust(self, tokens: int):
+        self._update(lambda state: state.__setitem__("tokens", state["tokens"] - tokens))
+
+    def pause(self, seconds: float):
+        self._update(lambda state: state.__setitem__("paused_until", max(state["paused_until"], time.time() + seconds)))
+
+    def paused_for(self) -> float:
+        return self._update(lambda state: max(0.0, state["paused_until"] - time.time()))
+
+
+# Requests-per-minute and tokens-per-minute gate for model calls. Callers are admitted in
+# arrival order: only the head of the queue may take from the buckets, the rest wait behind it.
+class RateLimiter:
+    def __init__(self, rpm: int, tpm: int = None, path: str = None, name: str = "gemini"):
+        self.rpm, self.tpm = rpm, tpm
+        self.buckets = SqliteBuckets(path, rpm, tpm, name) if path else MemoryBuckets(rpm, tpm)
+        self.queue = deque()
+        self.condition = threading.Condition()
+        self.waits = deque(maxlen=WAIT_WINDOW)
+        self.granted = 0
+        self.pauses = 0
+
+    # timeout: give up with TimeoutError rather than wait longer than that for admission
+    def acquire(self, tokens: int = 0, timeout: float = None) -> float:
+        ticket = (object(), time.monotonic())
+        with self.condition:
+            self.queue.append(ticket)
+        try:
+            while True:
+                with self.condition:
+                    while self.queue[0] is not ticket:
+                        if not self.condition.wait(_left(ticket[1], timeout)):
+                            raise TimeoutError("Rate limit wait exceeds the timeout")
+                    wait = self.buckets.take(tokens)
+                    if wait <= 0:
+                        waited = time.monotonic() - ticket[1]
+                        self.waits.append(waited)
+                        self.granted += 1
+                        return waited
+                if timeout is not None and wait > _left(ticket[1], timeout):
+                    raise TimeoutError("Rate limit wait exceeds the timeout")
+                # The head keeps its place while sleeping, nobody can overtake it
+                time.sleep(min(wait, MAX_SLEEP))
+        finally:
+            with self.condition:
+                self.queue.remove(ticket)
+                self.condition.notify_all()
+
+    # Correct the token bucket once the real usage of a call is known
+    def settle(self, estimated: int, actual: int):
+        if self.tpm and actual is not None:
+            self.buckets.adjust(actual - estimated)
+
+    # Every caller holds off after a 429, not only the one that got it
+    def pause(self, seconds: float):
+        self.pauses += 1
+        self.buckets.pause(seconds)
+
+    def gauges(self) -> dict:
+        with self.condition:
+            depth = len(self.queue)
+            oldest = time.monotonic() - self.queue[0][1] if self.queue else 0.0
+        waits = sorted(self.waits)
+        pick = lambda q: round(waits[min(len(waits) - 1, int(q * len(waits)))], 3) if waits else 0.0
+        return {
+            "queue_depth": depth,
+            "oldest_wait_s": round(oldest, 3),
+            "granted": self.granted,
+            "wait_p50_s": pick(0.5),
+            "wait_p95_s": pick(0.95),
+            "rate_limit_pauses": self.pauses,
+            "paused_for_s": round(self.buckets.paused_for(), 3),
+            "rpm": self.rpm,
+            "tpm": self.tpm,
+        }
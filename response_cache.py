@@ -0,0 +1,40 @@
+import hashlib
+import json
+import os
+import threading
+from datetime import datetime
+
+# Constants
+CACHE_DIR = "sessions/response_cache"
+
+
+# One file per response: concurrent writers (Streamlit sessions, batch jobs) never rewrite a shared file
+def cache_key(*parts) -> str:
+    return hashlib.sha256(json.dumps(parts, sort_keys=True).encode()).hexdigest()[:32]
+
+
+def _cache_path(key: str) -> str:
+    return os.path.join(CACHE_DIR, key[:2], f"{key}.json")
+
+
+def load_cached(key: str):
+    path = _cache_path(key)
+    if not os.path.exists(path):
+        return None
+    try:
+        with open(path, "r") as f:
+            return json.load(f)
+    except (OSError, json.JSONDecodeError):
+        return None
+
+
+def store_cached(key: str, content: str, **metadata):
+    path = _cache_path(key)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    entry = {"timestamp": datetime.now().strftime("%Y-%m-%d %H:%M:%S"), "content": content, **metadata}
+    # Write then rename, a reader never sees a half-written entry
+    tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    with open(tmp_path, "w") as f:
+        json.dump(entry, f, indent=2)
+    os.replace(tmp_path, path)
+    return entry
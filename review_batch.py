@@ -0,0 +1,130 @@
+# Batch code review with the leetdoc.py pipeline over a directory of solutions:
+#   python review_batch.py solutions/ --workers 3 --report review_report.md
+# A solution file is paired with the problem statement next to it: same name with .md/.txt
+# (two_sum.py + two_sum.md), or problem.md / problem.txt / README.md in the same folder.
+import argparse
+import os
+import sys
+import threading
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from code_sandbox import code_execution_allowed
+from leet_agents import load_api_key
+from llm import DEFAULT_RPM, configure_rate_limit
+from review_pipeline import create_review_agents, run_review, review_outcome, load_review_history, save_review_history
+
+# Constants
+DEFAULT_WORKERS = 3
+LANGUAGES = {".py": "Python", ".java": "Java", ".cpp": "C++", ".cc": "C++", ".js": "JavaScript"}
+PROBLEM_EXTENSIONS = (".md", ".txt")
+FOLDER_PROBLEM_FILES = ("problem.md", "problem.txt", "README.md")
+
+
+def _read(path: str) -> str:
+    with open(path, "r", encoding="utf-8", errors="replace") as f:
+        return f.read().strip()
+
+
+def find_submissions(root: str):
+    submissions, unpaired = [], []
+    for folder, dirs, files in os.walk(root):
+        dirs[:] = sorted(d for d in dirs if not d.startswith((".", "__")))
+        for name in sorted(files):
+            stem, ext = os.path.splitext(name)
+            if ext not in LANGUAGES:
+                continue
+            candidates = [stem + e for e in PROBLEM_EXTENSIONS] + list(FOLDER_PROBLEM_FILES)
+            problem_file = next((c for c in candidates if c in files), None)
+            path = os.path.join(folder, name)
+            if problem_file:
+                submissions.append({"path": path, "problem_path": os.path.join(folder, problem_file), "language": LANGUAGES[ext]})
+            else:
+                unpaired.append(path)
+    return submissions, unpaired
+
+
+# Agno agents keep per-run state, so every worker thread gets its own set
+_local = threading.local()
+
+
+def review_file(submission: dict, api_key: str, difficulty: str, run_code: bool = None) -> dict:
+    if not hasattr(_local, "agents"):
+        _local.agents = create_review_agents(api_key)
+    started = time.perf_counter()
+    session = run_review(_local.agents, _read(submission["problem_path"]), _read(submission["path"]), submission["language"], difficulty, run_code=run_code)
+    session["source"] = submission["path"]
+    return {"session": session, "seconds": time.perf_counter() - started, **review_outcome(session)}
+
+
+def report_markdown(rows: list, failures: list, unpaired: list, elapsed: float) -> str:
+    verdicts = Counter(r["verdict"] for r in rows)
+    scores = [r["score"] for r in rows if r["score"] is not None]
+    lines = [
+        "# 🧠 Batch Code Review Report",
+        "",
+        f"**Reviewed:** {len(rows)} | **Failed:** {len(failures)} | **Unpaired:** {len(unpaired)} | **Time:** {elapsed / 60:.1f} min  ",
+        "**Verdicts:** " + (", ".join(f"{v}: {c}" for v, c in verdicts.most_common()) or "—") + "  ",
+        f"**Average clean code score:** {sum(scores) / len(scores):.1f}/10" if scores else "**Average clean code score:** —",
+        "",
+        "| file | language | verdict | score | review time |",
+        "|:---|:---|:---|---:|---:|",
+    ]
+    for r in sorted(rows, key=lambda r: r["path"]):
+        score = f"{r['score']:g}/10" if r["score"] is not None else "—"
+        lines.append(f"| `{r['path']}` | {r['language']} | {r['verdict']} | {score} | {r['seconds']:.0f}s |")
+    if failures:
+        lines += ["", "## ❌ Failures"] + [f"- `{f['path']}`: {f['error']}" for f in failures]
+    if unpaired:
+        lines += ["", "## ⚠️ No problem statement found"] + [f"- `{p}`" for p in unpaired]
+    return "\n".join(lines)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Review every solution in a directory with the five-agent leetdoc.py pipeline.")
+    parser.add_argument("directory", help="Directory to walk for solution files")
+    parser.add_argument("--difficulty", default="Unknown", help="Difficulty passed to the reviewers")
+    parser.add_argument("--workers", type=int, default=DEFAULT_WORKERS, help="Files reviewed concurrently")
+    parser.add_argument("--rpm", type=int, default=DEFAULT_RPM, help="Model requests per minute across all workers")
+    parser.add_argument("--report", help="Also write the summary report to this Markdown file")
+    parser.add_argument("--run-unisolated", action="store_true", help="Execute the solutions even without bubblewrap (resource limits only; the code can read local files and use the network)")
+    args = parser.parse_args()
+
+    api_key = load_api_key()
+    if not api_key:
+        sys.exit("❌ GEMINI_API_KEY not set in the environment or .streamlit/secrets.toml")
+    submissions, unpaired = find_submissions(args.directory)
+    print(f"Found {len(submissions)} solutions with a problem statement, {len(unpaired)} without")
+
+    configure_rate_limit(args.rpm)
+    run_code = code_execution_allowed(args.run_unisolated)
+    history = load_review_history()
+    rows, failures = [], []
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.workers) as pool:
+        futures = {pool.submit(review_file, s, api_key, args.difficulty, run_code): s for s in submissions}
+        for future in as_completed(futures):
+            submission = futures[future]
+            try:
+                result = future.result()
+                rows.append({"path": submission["path"], "language": submission["language"], **{k: v for k, v in result.items() if k != "session"}})
+                # Saved after every review so an interrupted batch keeps what it finished
+                history.append(result["session"])
+                save_review_history(history)
+                status = f"{result['verdict']}, score {result['score'] if result['score'] is not None else '?'}"
+            except Exception as e:
+                failures.append({"path": submission["path"], "error": str(e)})
+                status = f"failed: {e}"
+            print(f"[{len(rows) + len(failures)}/{len(submissions)}] {submission['path']}: {status}")
+
+    report = report_markdown(rows, failures, unpaired, time.perf_counter() - started)
+    print("\n" + report)
+    if args.report:
+        with open(args.report, "w") as f:
+            f.write(report + "\n")
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,319 @@
+import contextvars
+import hashlib
+import json
+import os
+import re
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+from agno.agent import Agent
+
+from code_analysis import BREAKDOWN_NOTE, static_analysis_context, function_breakdown_markdown, extract_python_blocks, code_fingerprint, code_diff, split_code_units
+from code_sandbox import code_execution_allowed, measure_complexity, measurement_markdown, benchmark_candidates, profile_memory, memory_markdown, sizes_for_bound, run_examples, examples_markdown
+from checkpoints import request_hash, retry_step
+from deadline import current_deadline
+from llm import gemini_model
+from problem_parser import parse_problem, compact_problem
+
+# Constants
+MODEL_ID = "gemini-2.0-flash-exp"
+HISTORY_FILE = "sessions/review_history.json"
+# Above this share of changed lines a re-review starts from scratch, the diff saves nothing
+MAX_DIFF_RATIO = 0.5
+# Python submissions at least this long with several functions are reviewed unit by unit
+CHUNK_MIN_LINES = 80
+UNIT_WORKERS = 4
+UNIT_NOTE = "Review only this unit, in at most 8 concise bullet points under your usual headings; your notes on every unit are merged into one answer afterwards."
+AGGREGATE_NOTE = "Write your answer for the whole submission in your usual format, based on these notes. Merge overlapping points and keep it concise."
+
+# Review agents: (session key, name, instructions)
+REVIEW_AGENT_SPECS = [
+    ("explanation", "Code Explainer", [
+        "You are a detailed technical explainer of code logic and structure.",
+        "Go through the code line by line, explaining what each part does.",
+        "Break down all functions, control flows, loops, conditions, and data structures used.",
+        "Respond in markdown using this format:",
+        "### 🔎 Code Walkthrough\nExplain what happens from the start to the end, including all helper functions.",
+        "### ⚙️ Function Breakdown\nFor each function, explain parameters, return value, and role in the solution.",
+        "### 📊 Data Structures Used\nMention the data structures used, why they were chosen, and how they impact performance."
+    ]),
+    ("evaluation", "Code Evaluator", [
+        "You are an expert algorithm master evaluating submitted code.",
+        "Return output in the following structured format with markdown:",
+        "### 🔍 Code Summary\nBriefly explain what this code is trying to solve.",
+        "### ⏱️ Time & Space Complexity\nState Big-O complexity for worst and average cases.",
+        "### 📐 Code Structure & Style\nComment on the code's readability, organization, and clarity.",
+        "### 🧼 Clean Code Score\nGive a score out of 10 with a short justification."
+    ]),
+    ("judgement", "Code Judge", [
+        "You are an elite problem judge like a LeetCode moderator.",
+        "Respond in markdown with:",
+        "### 🧪 Test Verdict\nNormal Case ✅ | Edge Case ❗ | Large Input 🚀",
+        "### 🧠 Logical Correctness\nExplain flaws if any.",
+        "### 🔥 Verdict\n✅ Accepted | ⚠️ TLE | ❌ Wrong Answer",
+        "### 🛠️ Diagnostic Tip\n1-line insight for debugging."
+    ]),
+    ("criticism", "Code Critic", [
+        "You are a seasoned code critic analyzing the solution.",
+        "Break down into:",
+        "### ❌ Pain Points\nTop issues in logic, structure, or performance.",
+        "### 🧠 Better Practices\nImprovements and justifications.",
+        "### ⚡ Missed Optimization Opportunities\nMention better algorithms or structures."
+    ]),
+    ("improvement", "Code Improver", [
+        "You are a master developer rewriting this code to be better.",
+        "### 🚀 Improved Version (with explanation)\nExplain what changed and why.",
+        "### 📦 Optimized Code\nRespond with clean, efficient code block."
+    ]),
+]
+
+# Stored reviews are only resumed while the model and prompts they were generated with are unchanged
+REVIEW_VERSION = hashlib.sha256(json.dumps([MODEL_ID, REVIEW_AGENT_SPECS]).encode()).hexdigest()[:12]
+
+VERDICTS = ["Accepted", "TLE", "Wrong Answer"]
+SCORE_RE = re.compile(r"(\d+(?:\.\d+)?)\s*(?:/|out of)\s*10")
+
+
+def create_review_agents(api_key: str) -> dict:
+    model = gemini_model(MODEL_ID, api_key)
+    return {key: Agent(model=model, name=name, instructions=instructions, markdown=True) for key, name, instructions in REVIEW_AGENT_SPECS}
+
+
+# Near the end of a request deadline (deadline.py) the agent is asked for a short answer
+def _run_agent(agent: Agent, message: str) -> str:
+    return agent.run(message=current_deadline().budgeted(message)).content
+
+
+# Reviews are keyed by what decides their content: the code up to formatting, comments, docstrings
+# and local names (code_fingerprint), and the problem up to whitespace
+def review_key(version: str, problem: str, code: str, language: str, difficulty: str) -> str:
+    return request_hash(version, " ".join(problem.split()), code_fingerprint(code, language), language, difficulty)
+
+
+# How a resubmission relates to an earlier review of the same problem: "same" when the code is
+# semantically unchanged, "diff" when a moderate edit can be reviewed from the diff, else None
+def incremental_mode(base: dict, problem: str, code: str, language: str) -> str:
+    if not base or base.get("problem") != problem or base.get("language") != language:
+        return None
+    if code_fingerprint(base["code"], language) == code_fingerprint(code, language):
+        return "same"
+    _, ratio = code_diff(base["code"], code)
+    return "diff" if ratio <= MAX_DIFF_RATIO else None
+
+
+# Shared state of one review: contexts for the agents plus the session record being filled.
+# base: session of an earlier review to update from the diff (see incremental_mode)
+# run_code=False skips the local sandbox steps (profile, measure, benchmark); by default they only
+# run when the sandbox is isolated (code_sandbox.code_execution_allowed)
+def prepare_review(problem: str, code: str, language: str, difficulty: str, call=None, base: dict = None, run_code: bool = None) -> dict:
+    run_code = code_execution_allowed() if run_code is None else run_code
+    # Constraints and examples go to the agents in compact structured form
+    parsed = parse_problem(problem)
+    problem_text = compact_problem(parsed) if parsed["constraints"] or parsed["examples"] else problem
+    full_context = f"Problem:\n{problem_text}\n\nCode:\n```{language}\n{code}\n```"
+
+    # Local static-analysis pre-pass, shared with every agent
+    analysis, static_summary, full_context = static_analysis_context(code, language, full_context)
+    explainer_note = BREAKDOWN_NOTE if analysis else ""
+
+    # Large submission: agents see one function or class at a time, plus an outline of the rest
+    units = split_code_units(code) if analysis and analysis["lines"] >= CHUNK_MIN_LINES else None
+    unit_context = None
+    if units and len(units[1]) >= 2:
+        preamble, units = units
+        outline = "\n".join(f"- {name} ({len(source.splitlines())} lines)" for name, source in units)
+        unit_context = f"Problem:\n{problem_text}\n\nThe {language} submission has {len(units)} units:\n{outline}"
+        if preamble:
+            unit_context += f"\n\nModule-level code shared by the units:\n```{language}\n{preamble}\n```"
+        unit_context += f"\n\nStatic analysis of the whole submission (computed locally from the AST):\n{static_summary}"
+    else:
+        units = None
+
+    # Edited resubmission: agents get the diff and their previous answer instead of the whole code
+    diff_context = None
+    if base and incremental_mode(base, problem, code, language) == "diff":
+        diff, _ = code_diff(base["code"], code)
+        diff_context = f"Problem:\n{problem_text}\n\nThe {language} code you reviewed before was edited:\n```diff\n{diff}\n```"
+        if static_summary:
+            diff_context += f"\n\nStatic analysis of the edited code (computed locally from the AST):\n{static_summary}"
+    else:
+        base = None
+
+    return {
+        "parsed": parsed,
+        "max_n": parsed["max_n"] or 10 ** 5,
+        "analysis": analysis,
+        "full_context": full_context,
+        "explainer_note": explainer_note,
+        "diff_context": diff_context,
+        "base": base,
+        "units": units,
+        "unit_context": unit_context,
+        "run_code": run_code,
+        "call": call or _run_agent,
+        "session": {
+            "timestamp": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+            "problem": problem,
+            "code": code,
+            "language": language,
+            "difficulty": difficulty,
+            "static_analysis": static_summary,
+            # Python code that was not executed because the sandbox is not isolated
+            "sandbox_skipped": bool(analysis) and not run_code,
+            "units": [name for name, _ in units] if units else None,
+        },
+    }
+
+
+# Prompt for one agent: the full context, or on an incremental re-review the diff plus the
+# agent's previous answer to update, whichever is shorter (short code is cheaper to review again)
+def _context(review: dict, key: str, context: str) -> str:
+    previous = review["base"].get(key) if review["base"] else None
+    if not previous:
+        return context
+    update = (
+        f"{review['diff_context']}\n\nYour previous answer for the code before the edit:\n{previous}\n\n"
+        "Update that answer for the edited code: keep the same format, keep what still holds and revise what the edit changed."
+    )
+    return update if len(update) < len(context) else context
+
+
+# One agent's answer per unit, run in parallel within the request deadline, then one aggregation
+# call that turns the per-unit notes into the agent's usual section
+def _ask_by_unit(review: dict, agent: Agent, extra: str) -> str:
+    language = review["session"]["language"]
+    prompts = [
+        f"{review['unit_context']}\n\nUnit {name}:\n```{language}\n{source}\n```\n\n{UNIT_NOTE}"
+        for name, source in review["units"]
+    ]
+    # agno agents keep per-run state, so every worker thread gets its own agent from the same spec
+    local = threading.local()
+
+    def ask(context, prompt):
+        if not hasattr(local, "agent"):
+            local.agent = Agent(model=agent.model, name=agent.name, instructions=agent.instructions, markdown=agent.markdown)
+        return context.run(retry_step, review["call"], local.agent, prompt)
+
+    # Each thread runs in a copy of the caller's context, so the deadline applies to it as well
+    contexts = [contextvars.copy_context() for _ in prompts]
+    with ThreadPoolExecutor(max_workers=UNIT_WORKERS) as pool:
+        notes = list(pool.map(ask, contexts, prompts))
+    merged = "\n\n".join(f"#### {name}\n{note}" for (name, _), note in zip(review["units"], notes))
+    return review["call"](agent, f"{review['unit_context']}{extra}\n\nNotes from reviewing each unit separately:\n{merged}\n\n{AGGREGATE_NOTE}")
+
+
+# One agent's section: incremental update, unit by unit for large code, or the full context
+def _ask(review: dict, agents: dict, key: str, context: str, extra: str = "") -> str:
+    prompt = _context(review, key, context)
+    if prompt == context and review["units"]:
+        return _ask_by_unit(review, agents[key], extra)
+    return review["call"](agents[key], prompt + extra)
+
+
+# Pipeline steps, each fills one key of review["session"]; local steps skip non-Python code
+def explain(review: dict, agents: dict):
+    explanation = _ask(review, agents, "explanation", review["full_context"], review["explainer_note"])
+    if review["analysis"]:
+        explanation += "\n\n" + function_breakdown_markdown(review["analysis"])
+    review["session"]["explanation"] = explanation
+
+
+# Peak memory across input sizes, traced locally with tracemalloc
+def profile(review: dict, agents: dict):
+    if review["analysis"] and review["run_code"]:
+        profile_result = profile_memory(review["session"]["code"], sizes_for_bound(review["max_n"]))
+        review["session"]["memory_profile"] = memory_markdown(profile_result)
+
+
+def evaluate(review: dict, agents: dict):
+    extra = ""
+    if review["session"].get("memory_profile"):
+        extra = f"\n\nMeasured memory profile (tracemalloc, input excluded; base the space complexity on it):\n{review['session']['memory_profile']}"
+    review["session"]["evaluation"] = _ask(review, agents, "evaluation", review["full_context"], extra)
+
+
+# Empirical runtime on growing inputs and the problem's own examples, run in a local sandbox
+def measure(review: dict, agents: dict):
+    if review["analysis"] and review["run_code"]:
+        code = review["session"]["code"]
+        measured = measurement_markdown(measure_complexity(code, target_n=review["max_n"]))
+        if review["parsed"]["examples"]:
+            measured = examples_markdown(run_examples(code, review["parsed"]["examples"])) + "\n\n" + measured
+        review["session"]["measurement"] = measured
+
+
+def judge(review: dict, agents: dict):
+    extra = ""
+    if review["session"].get("measurement"):
+        extra = f"\n\nMeasured locally on the problem examples and generated inputs (base the Normal Case and Large Input verdicts on this):\n{review['session']['measurement']}"
+    review["session"]["judgement"] = _ask(review, agents, "judgement", review["full_context"], extra)
+
+
+def criticize(review: dict, agents: dict):
+    review["session"]["criticism"] = _ask(review, agents, "criticism", review["full_context"])
+
+
+# Always on the whole code: the rewrite has to be one runnable solution for the benchmark
+def improve(review: dict, agents: dict):
+    review["session"]["improvement"] = review["call"](agents["improvement"], _context(review, "improvement", review["full_context"]))
+
+
+# Differential check of the optimized code against the original
+def benchmark(review: dict, agents: dict):
+    improvement = review["session"].get("improvement")
+    improved_blocks = extract_python_blocks(improvement, "Optimized Code") if review["analysis"] and review["run_code"] and improvement else []
+    if improved_blocks:
+        candidates = {"original": review["session"]["code"], "optimized": max(improved_blocks, key=len)}
+        review["session"]["benchmark"] = benchmark_candidates(candidates)
+
+
+# (session key, spinner text, step) in pipeline order
+REVIEW_STEPS = [
+    ("explanation", "📖 Explaining your code...", explain),
+    ("memory_profile", "🧠 Profiling memory across input sizes...", profile),
+    ("evaluation", "🔍 Evaluating Code...", evaluate),
+    ("measurement", "⏱️ Running the examples and measuring runtime on growing inputs...", measure),
+    ("judgement", "⚖️ Judging Code...", judge),
+    ("criticism", "🕵️ Analyzing Drawbacks...", criticize),
+    ("improvement", "🚀 Rewriting Optimized Code...", improve),
+    ("benchmark", "🧪 Checking the optimized code against yours...", benchmark),
+]
+
+
+# Earlier steps whose results a step reads; it waits for them when they did not finish
+STEP_INPUTS = {
+    "evaluation": ["memory_profile"],
+    "judgement": ["measurement"],
+    "benchmark": ["improvement"],
+}
+
+
+def run_review(agents: dict, problem: str, code: str, language: str, difficulty: str, call=None, run_code: bool = None) -> dict:
+    review = prepare_review(problem, code, language, difficulty, call, run_code=run_code)
+    for _, _, step in REVIEW_STEPS:
+        step(review, agents)
+    return review["session"]
+
+
+# Verdict and clean code score pulled from the judge and evaluator answers
+def review_outcome(session: dict) -> dict:
+    verdict_section = (session.get("judgement") or "").split("Verdict")[-1]
+    verdict = next((v for v in VERDICTS if v.lower() in verdict_section.lower()), "Unknown")
+    score_section = (session.get("evaluation") or "").split("Clean Code Score")[-1]
+    score = SCORE_RE.search(score_section)
+    return {"verdict": verdict, "score": float(score.group(1)) if score else None}
+
+
+# Persistent history, same file leerxox.py reads
+def load_review_history() -> list:
+    if os.path.exists(HISTORY_FILE):
+        with open(HISTORY_FILE, "r") as f:
+            return json.load(f)
+    return []
+
+
+def save_review_history(history: list):
+    os.makedirs(os.path.dirname(HISTORY_FILE), exist_ok=True)
+    with open(HISTORY_FILE, "w") as f:
+        json.dump(history, f, indent=2)
@@ -0,0 +1,357 @@
+# Persistent review jobs for leetdoc.py, run by worker processes outside Streamlit:
+#   python review_queue.py worker --processes 2
+#   python review_queue.py status
+# The UI only submits jobs and reads them back, so a rerun, refresh or second tab never loses work;
+# it starts a worker itself (ensure_worker) when none is alive.
+# Progress is saved after every pipeline step; a job whose worker died resumes from the last step.
+# Workers run each job to the end unless given a time budget (--deadline); a job that runs out of
+# time is queued again and resumes, steps that keep failing leave it "partial" until retried.
+# Submitting the same request again reuses its job instead of starting over.
+import argparse
+import json
+import multiprocessing
+import os
+import socket
+import sqlite3
+import subprocess
+import sys
+import threading
+import time
+import uuid
+from contextlib import closing
+from datetime import datetime
+
+from checkpoints import retry_step
+from code_sandbox import code_execution_allowed
+from deadline import DeadlineExceeded, deadline
+from leet_agents import load_api_key
+from llm import DEFAULT_RPM, configure_rate_limit
+from review_pipeline import REVIEW_STEPS, REVIEW_VERSION, STEP_INPUTS, create_review_agents, incremental_mode, prepare_review, review_key
+
+# Constants
+QUEUE_FILE = "sessions/review_jobs.db"
+RATE_LIMIT_FILE = "sessions/rate_limit.db"
+DEFAULT_PROCESSES = 2
+POLL_INTERVAL = 1.0
+# Workers refresh their own and their job's heartbeat this often, also while a step runs
+HEARTBEAT_INTERVAL = 10.0
+STALE_AFTER = 60
+# A worker started by the UI stops after this long without work
+AUTO_WORKER_IDLE_EXIT = 600
+JOB_STATUSES = ["queued", "running", "partial", "done", "failed"]
+# Statuses a worker can still move on without the user doing anything
+ACTIVE_STATUSES = ["queued", "running"]
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id TEXT PRIMARY KEY,
+    status TEXT NOT NULL,
+    created_at TEXT NOT NULL,
+    finished_at TEXT,
+    worker TEXT,
+    heartbeat REAL,
+    request TEXT NOT NULL,
+    session TEXT,
+    steps_done TEXT NOT NULL DEFAULT '[]',
+    error TEXT,
+    request_hash TEXT
+);
+CREATE INDEX IF NOT EXISTS jobs_status ON jobs (status, created_at);
+CREATE TABLE IF NOT EXISTS workers (
+    id TEXT PRIMARY KEY,
+    heartbeat REAL NOT NULL
+);
+"""
+
+
+# One short-lived connection per call; WAL lets the UI read while workers write
+def connect(path: str = QUEUE_FILE) -> sqlite3.Connection:
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    conn = sqlite3.connect(path, timeout=30, isolation_level=None)
+    conn.row_factory = sqlite3.Row
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.executescript(SCHEMA)
+    # Queues created before jobs were keyed by request
+    if "request_hash" not in {row["name"] for row in conn.execute("PRAGMA table_info(jobs)")}:
+        conn.execute("ALTER TABLE jobs ADD COLUMN request_hash TEXT")
+    conn.execute("CREATE INDEX IF NOT EXISTS jobs_request ON jobs (request_hash)")
+    return conn
+
+
+def _job(row) -> dict:
+    if row is None:
+        return None
+    job = dict(row)
+    job["request"] = json.loads(job["request"])
+    job["session"] = json.loads(job["session"]) if job["session"] else {}
+    job["steps_done"] = json.loads(job["steps_done"])
+    return job
+
+
+# Same request as an earlier job (review_key, so also code differing only in formatting, comments or
+# names): that job is returned, and queued again to finish its missing steps if needed.
+# base_job: the previous review in the session, an edited resubmission is reviewed incrementally from it
+def submit_job(problem: str, code: str, language: str, difficulty: str, base_job: str = None, path: str = QUEUE_FILE) -> str:
+    request = {"problem": problem, "code": code, "language": language, "difficulty": difficulty}
+    key = review_key(REVIEW_VERSION, problem, code, language, difficulty)
+    request["base_job"] = base_job
+    with closing(connect(path)) as conn:
+        existing = conn.execute("SELECT id FROM jobs WHERE request_hash = ? ORDER BY created_at DESC LIMIT 1", (key,)).fetchone()
+        if existing is None:
+            job_id = uuid.uuid4().hex[:12]
+            conn.execute(
+                "INSERT INTO jobs (id, status, created_at, request, request_hash) VALUES (?, 'queued', ?, ?, ?)",
+                (job_id, datetime.now().strftime("%Y-%m-%d %H:%M:%S"), json.dumps(request), key),
+            )
+            return job_id
+    retry_job(existing["id"], path)
+    return existing["id"]
+
+
+def get_job(job_id: str, path: str = QUEUE_FILE) -> dict:
+    with closing(connect(path)) as conn:
+        return _job(conn.execute("SELECT * FROM jobs WHERE id = ?", (job_id,)).fetchone())
+
+
+def list_jobs(status: str = None, limit: int = 50, path: str = QUEUE_FILE) -> list:
+    with closing(connect(path)) as conn:
+        if status:
+            rows = conn.execute("SELECT * FROM jobs WHERE status = ? ORDER BY created_at DESC LIMIT ?", (status, limit))
+        else:
+            rows = conn.execute("SELECT * FROM jobs ORDER BY created_at DESC LIMIT ?", (limit,))
+        return [_job(row) for row in rows]
+
+
+def queue_counts(path: str = QUEUE_FILE) -> dict:
+    with closing(connect(path)) as conn:
+        counts = dict(conn.execute("SELECT status, COUNT(*) FROM jobs GROUP BY status").fetchall())
+    return {status: counts.get(status, 0) for status in JOB_STATUSES}
+
+
+# Oldest queued job, or a running one whose worker stopped sending heartbeats
+def claim_job(worker: str, path: str = QUEUE_FILE) -> dict:
+    now = time.time()
+    with closing(connect(path)) as conn:
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            row = conn.execute(
+                "SELECT id FROM jobs WHERE status = 'queued' OR (status = 'running' AND heartbeat < ?) ORDER BY created_at LIMIT 1",
+                (now - STALE_AFTER,),
+            ).fetchone()
+            if row:
+                conn.execute("UPDATE jobs SET status = 'running', worker = ?, heartbeat = ? WHERE id = ?", (worker, now, row["id"]))
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        return _job(conn.execute("SELECT * FROM jobs WHERE id = ?", (row["id"],)).fetchone()) if row else None
+
+
+# Writes of a worker only land while it still owns the job; False once another worker reclaimed it
+def save_progress(job_id: str, session: dict, steps_done: list, path: str = QUEUE_FILE, worker: str = None) -> bool:
+    with closing(connect(path)) as conn:
+        cursor = conn.execute(
+            "UPDATE jobs SET session = ?, steps_done = ?, heartbeat = ? WHERE id = ? AND (? IS NULL OR worker = ?)",
+            (json.dumps(session), json.dumps(steps_done), time.time(), job_id, worker, worker),
+        )
+        return cursor.rowcount > 0
+
+
+def finish_job(job_id: str, error: str = None, partial: bool = False, path: str = QUEUE_FILE, worker: str = None):
+    status = "partial" if partial else "failed" if error else "done"
+    with closing(connect(path)) as conn:
+        conn.execute(
+            "UPDATE jobs SET status = ?, error = ?, finished_at = ? WHERE id = ? AND (? IS NULL OR worker = ?)",
+            (status, error, datetime.now().strftime("%Y-%m-%d %H:%M:%S"), job_id, worker, worker),
+        )
+
+
+# Liveness of a worker process, and of the job it runs
+def heartbeat(worker: str, job_id: str = None, path: str = QUEUE_FILE):
+    now = time.time()
+    with closing(connect(path)) as conn:
+        conn.execute("INSERT INTO workers (id, heartbeat) VALUES (?, ?) ON CONFLICT (id) DO UPDATE SET heartbeat = excluded.heartbeat", (worker, now))
+        if job_id:
+            conn.execute("UPDATE jobs SET heartbeat = ? WHERE id = ? AND worker = ? AND status = 'running'", (now, job_id, worker))
+
+
+def live_workers(path: str = QUEUE_FILE) -> int:
+    with closing(connect(path)) as conn:
+        conn.execute("DELETE FROM workers WHERE heartbeat < ?", (time.time() - STALE_AFTER,))
+        return conn.execute("SELECT COUNT(*) FROM workers").fetchone()[0]
+
+
+# Beats every HEARTBEAT_INTERVAL until stopped, so a long step (a sandbox run, a call waiting on the
+# rate limiter) never looks like a dead worker to claim_job
+def _keep_alive(worker: str, job_id: str, stop: threading.Event, path: str):
+    while not stop.wait(HEARTBEAT_INTERVAL):
+        try:
+            heartbeat(worker, job_id, path)
+        except sqlite3.Error as e:
+            print(f"⚠️ {worker} heartbeat failed: {e}", file=sys.stderr)
+
+
+_started_worker = None
+
+
+# Start one background worker process for the UI when no worker is alive. It outlives Streamlit
+# reruns and stops by itself after AUTO_WORKER_IDLE_EXIT seconds without jobs.
+def ensure_worker(path: str = QUEUE_FILE) -> bool:
+    global _started_worker
+    if live_workers(path) or (_started_worker and _started_worker.poll() is None):
+        return False
+    command = [sys.executable, os.path.abspath(__file__), "worker", "--processes", "1", "--idle-exit", str(AUTO_WORKER_IDLE_EXIT)]
+    _started_worker = subprocess.Popen(command, start_new_session=True, stdout=subprocess.DEVNULL)
+    return True
+
+
+# Queue a partial or failed job again; it resumes after the steps it already finished
+def retry_job(job_id: str, path: str = QUEUE_FILE):
+    with closing(connect(path)) as conn:
+        conn.execute(
+            "UPDATE jobs SET status = 'queued', error = NULL, finished_at = NULL WHERE id = ? AND status IN ('partial', 'failed')",
+            (job_id,),
+        )
+
+
+# Finished sections of the job an edited resubmission builds on
+def _base_session(request: dict, path: str = QUEUE_FILE) -> dict:
+    base = get_job(request["base_job"], path) if request.get("base_job") else None
+    if not base:
+        return None
+    step_keys = {key for key, _, _ in REVIEW_STEPS}
+    session = {key: value for key, value in base["session"].items() if key not in step_keys or key in base["steps_done"]}
+    return {**session, "job_id": base["id"], "steps_done": base["steps_done"]}
+
+
+# Run the review pipeline for one job, skipping the steps an earlier worker already finished.
+# Each step is retried on its own; one that keeps failing is reported and the others still run,
+# except those reading its result (STEP_INPUTS). Returns the session, the steps done and the errors.
+def run_job(job: dict, agents: dict, call=None, path: str = QUEUE_FILE, budget: float = None, run_code: bool = None):
+    request = job["request"]
+    base = _base_session(request, path)
+    mode = incremental_mode(base, request["problem"], request["code"], request["language"])
+    review = prepare_review(request["problem"], request["code"], request["language"], request["difficulty"], call, base, run_code)
+    steps_done = []
+    if mode == "same":
+        # Only formatting or comments changed, every finished section of the earlier review still holds
+        review["session"].update({key: base[key] for key in base["steps_done"] if key in base})
+        steps_done = list(base["steps_done"])
+    if mode:
+        review["session"]["base_job"] = base["job_id"]
+        review["session"]["incremental"] = mode
+    review["session"].update(job["session"])
+    steps_done = list(dict.fromkeys(steps_done + job["steps_done"]))
+    save_progress(job["id"], review["session"], steps_done, path, job["worker"])
+    errors = {}
+    with deadline(budget) as limit:
+        for key, _, step in REVIEW_STEPS:
+            if key in steps_done or any(name not in steps_done for name in STEP_INPUTS.get(key, [])):
+                continue
+            # Local sandbox steps are not cut short, but none starts once the budget is spent
+            if limit.expired():
+                break
+            try:
+                retry_step(step, review, agents)
+            except DeadlineExceeded:
+                break
+            except Exception as e:
+                errors[key] = str(e)
+                continue
+            steps_done.append(key)
+            if not save_progress(job["id"], review["session"], steps_done, path, job["worker"]):
+                # Reclaimed by another worker, which carries on from the saved steps
+                break
+    return review["session"], steps_done, errors
+
+
+# idle_exit: seconds without a job after which the worker stops, 0 to run until interrupted
+def worker_loop(api_key: str, rpm: int, poll_interval: float = POLL_INTERVAL, budget: float = None, path: str = QUEUE_FILE, run_unisolated: bool = False, idle_exit: float = 0):
+    worker = f"{socket.gethostname()}:{os.getpid()}"
+    heartbeat(worker, path=path)
+    run_code = code_execution_allowed(run_unisolated)
+    # All worker processes draw from one requests-per-minute budget
+    configure_rate_limit(rpm, path=RATE_LIMIT_FILE)
+    agents = create_review_agents(api_key)
+    print(f"👷 {worker} waiting for jobs in {path}")
+    idle_since = time.monotonic()
+    while True:
+        heartbeat(worker, path=path)
+        job = claim_job(worker, path)
+        if not job:
+            if idle_exit and time.monotonic() - idle_since > idle_exit:
+                print(f"💤 {worker} idle for {idle_exit:.0f}s, stopping")
+                return
+            time.sleep(poll_interval)
+            continue
+        resumed = f" (resuming after {len(job['steps_done'])} steps)" if job["steps_done"] else ""
+        print(f"▶️ {worker} {job['id']}{resumed}")
+        stop = threading.Event()
+        threading.Thread(target=_keep_alive, args=(worker, job["id"], stop, path), daemon=True).start()
+        try:
+            _, steps_done, errors = run_job(job, agents, path=path, budget=budget, run_code=run_code)
+            error = "; ".join(f"{key}: {message}" for key, message in errors.items()) or None
+            missing = len(REVIEW_STEPS) - len(steps_done)
+            finish_job(job["id"], error=error, partial=missing > 0, path=path, worker=worker)
+            # Out of time but still moving: resume in a later run instead of waiting for a manual retry
+            if missing and not error and len(steps_done) > len(job["steps_done"]):
+                retry_job(job["id"], path)
+            print(f"✅ {worker} {job['id']}" if not missing else f"⏳ {worker} {job['id']} {missing} steps pending" + (f" ({error})" if error else ""))
+        except Exception as e:
+            finish_job(job["id"], error=str(e), path=path, worker=worker)
+            print(f"❌ {worker} {job['id']}: {e}", file=sys.stderr)
+        finally:
+            stop.set()
+            idle_since = time.monotonic()
+
+
+def run_workers(args):
+    api_key = load_api_key()
+    if not api_key:
+        sys.exit("❌ GEMINI_API_KEY not set in the environment or .streamlit/secrets.toml")
+    processes = [multiprocessing.Process(target=worker_loop, args=(api_key, args.rpm, args.poll, args.deadline, QUEUE_FILE, args.run_unisolated, args.idle_exit), daemon=True) for _ in range(args.processes)]
+    for process in processes:
+        process.start()
+    try:
+        for process in processes:
+            process.join()
+    except KeyboardInterrupt:
+        # Interrupted jobs stay "running" and are picked up again once their heartbeat is stale
+        print("\nStopping workers")
+        for process in processes:
+            process.terminate()
+    return 0
+
+
+def status(args):
+    counts = queue_counts()
+    print(", ".join(f"{status}: {count}" for status, count in counts.items()))
+    for job in list_jobs(limit=args.limit):
+        steps = f"{len(job['steps_done'])}/{len(REVIEW_STEPS)} steps"
+        print(f"  {job['id']}  {job['created_at']}  {job['status']:<8} {steps:<11} {job['request']['language']}" + (f"  {job['error']}" if job["error"] else ""))
+    return 0
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Review job queue for the LeetCode Code Reviewer.")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    workers = commands.add_parser("worker", help="Run a pool of worker processes that execute queued reviews")
+    workers.add_argument("--processes", type=int, default=DEFAULT_PROCESSES, help="Worker processes, each runs one review at a time")
+    workers.add_argument("--rpm", type=int, default=DEFAULT_RPM, help="Model requests per minute across all workers")
+    workers.add_argument("--poll", type=float, default=POLL_INTERVAL, help="Seconds between queue checks when idle")
+    workers.add_argument("--run-unisolated", action="store_true", help="Execute submitted code even without bubblewrap (resource limits only; the code can read local files and use the network)")
+    workers.add_argument("--idle-exit", type=float, default=0, help="Stop after this many seconds without jobs, 0 to run until interrupted")
+    workers.add_argument("--deadline", type=float, default=0, help="Seconds one job run may take before it is queued again, 0 for no limit")
+    workers.set_defaults(handler=run_workers)
+
+    show = commands.add_parser("status", help="Show queue counts and the latest jobs")
+    show.add_argument("--limit", type=int, default=20, help="Jobs listed")
+    show.set_defaults(handler=status)
+
+    args = parser.parse_args()
+    sys.exit(args.handler(args))
+
+
+if __name__ == "__main__":
+    main()
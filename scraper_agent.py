@@ -0,0 +1,44 @@
+from agno.agent import Agent
+
+from dom_fingerprint import distill_html
+from llm import gemini_model
+
+# Constants
+MODEL_ID = "gemini-2.0-flash"
+
+SCRAPER_INSTRUCTIONS = [
+    "You are an expert web scraper generator using Python + Selenium.",
+    "You'll be given HTML (or a webpage dump) and a user-described goal.",
+    "Your task is to understand what the user wants, identify correct DOM elements, and write a working scraper.",
+    "**Always do the following:**",
+    "1. Identify the target elements (e.g., links, prices, titles, etc.) even if not explicitly mentioned.",
+    "2. Analyze the HTML and suggest the best tag/class/ID selectors.",
+    "3. Generate clean Selenium code. Use BeautifulSoup optionally.",
+    "**Output Format:**",
+    "### 🧠 Inferred Task\nSummarize the user's goal and target elements.",
+    "### 📋 Scraping Plan\nExplain your approach to selecting DOM elements.",
+    "### 🔧 Selenium Code\nFull working Python code using Selenium.",
+    "### ⚠️ Notes\nMention any JS rendering issues, login needs, or site-specific tricks."
+]
+
+
+def create_scraper_agent(api_key: str) -> Agent:
+    model = gemini_model(MODEL_ID, api_key)
+    return Agent(model=model, name="Smart Scraper Agent", instructions=SCRAPER_INSTRUCTIONS, markdown=True)
+
+
+def build_scraper_prompt(source_html: str, goal: str, url: str = "") -> str:
+    # Escape triple backticks using tags to avoid SyntaxError
+    html_display = f"[START HTML]\n{distill_html(source_html)}\n[END HTML]"
+    return f"""You are a Selenium scraper builder.
+
+Below is a distilled version of the HTML source code of the page (scripts, styles and most attributes removed, long runs of identical elements shortened):
+{html_display}
+
+User's scraping goal:
+"{goal}"
+
+Sample URL (if provided): {url if url else "N/A"}
+
+Please infer what to scrape, explain your logic, and return a working Selenium scraper.
+"""
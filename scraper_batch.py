@@ -0,0 +1,138 @@
+# Batch scraper generation over a directory of saved pages:
+#   python scraper_batch.py pages/ --goal "Product names and prices" --out scrapers/
+# Pages sharing a DOM template get one scraper; templates already in the cache or the
+# scraper library are written without a model call.
+import argparse
+import os
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from dom_fingerprint import dom_fingerprint, load_scraper_cache, save_scraper_cache, lookup_cached_scraper, store_cached_scraper
+from leet_agents import load_api_key
+from llm import DEFAULT_RPM, configure_rate_limit
+from scraper_agent import create_scraper_agent, build_scraper_prompt
+from scraper_library import load_scraper_library, save_scraper_library, parse_scraper_result
+
+# Constants
+DEFAULT_WORKERS = 4
+PAGE_EXTENSIONS = (".html", ".htm", ".txt")
+
+
+def _read(path: str) -> str:
+    with open(path, "r", encoding="utf-8", errors="ignore") as f:
+        return f.read()
+
+
+# Pages grouped by DOM template; the largest page of a group represents it
+def group_pages(directory: str) -> dict:
+    groups = {}
+    for folder, dirs, files in os.walk(directory):
+        dirs.sort()
+        for name in sorted(files):
+            if name.lower().endswith(PAGE_EXTENSIONS):
+                path = os.path.join(folder, name)
+                html = _read(path)
+                groups.setdefault(dom_fingerprint(html), []).append((path, len(html)))
+    return {fp: sorted(pages, key=lambda p: -p[1]) for fp, pages in groups.items()}
+
+
+# Agno agents keep per-run state, so every worker thread gets its own
+_local = threading.local()
+
+
+def generate(html: str, goal: str, url: str, api_key: str) -> str:
+    if not hasattr(_local, "agent"):
+        _local.agent = create_scraper_agent(api_key)
+    return _local.agent.run(message=build_scraper_prompt(html, goal, url)).content
+
+
+def write_scraper(out_dir: str, fingerprint: str, pages: list, goal: str, source: str, result: str) -> str:
+    code = parse_scraper_result(result)["code"]
+    listed = ", ".join(os.path.basename(p) for p, _ in pages[:5]) + (f" (+{len(pages) - 5} more)" if len(pages) > 5 else "")
+    header = f"Scraper for DOM template {fingerprint}\nGoal: {goal}\nPages: {listed}\nSource: {source}"
+    if code:
+        path = os.path.join(out_dir, f"scraper_{fingerprint}.py")
+        content = "".join(f"# {line}\n" for line in header.splitlines()) + "\n" + code + "\n"
+    else:
+        # No code block in the answer, keep the full markdown instead
+        path = os.path.join(out_dir, f"scraper_{fingerprint}.md")
+        content = "".join(f"<!-- {line} -->\n" for line in header.splitlines()) + "\n" + result + "\n"
+    with open(path, "w") as f:
+        f.write(content)
+    return path
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate one scraper per unique page template in a directory.")
+    parser.add_argument("directory", help="Directory of saved .html/.htm/.txt pages")
+    parser.add_argument("--goal", required=True, help="What to scrape from every page")
+    parser.add_argument("--url", default="", help="Sample URL of the site (used for library matching)")
+    parser.add_argument("--out", default="scrapers", help="Directory the scraper files are written to")
+    parser.add_argument("--threshold", type=float, default=0.9, help="Reuse a library scraper at this similarity or above")
+    parser.add_argument("--force", action="store_true", help="Ignore the cache and library, generate every template")
+    parser.add_argument("--workers", type=int, default=DEFAULT_WORKERS, help="Templates generated concurrently")
+    parser.add_argument("--rpm", type=int, default=DEFAULT_RPM, help="Model requests per minute across all workers")
+    args = parser.parse_args()
+
+    started = time.perf_counter()
+    groups = group_pages(args.directory)
+    page_count = sum(len(pages) for pages in groups.values())
+    print(f"{page_count} pages, {len(groups)} unique DOM templates")
+    os.makedirs(args.out, exist_ok=True)
+
+    cache = load_scraper_cache()
+    library = load_scraper_library()
+    stats = {"cache": 0, "library": 0, "generated": 0, "failed": 0}
+    pending = {}
+    for fingerprint, pages in groups.items():
+        html = _read(pages[0][0])
+        cached = None if args.force else lookup_cached_scraper(cache, fingerprint, args.goal)
+        if cached:
+            path = write_scraper(args.out, fingerprint, pages, args.goal, f"cache ({cached['timestamp']})", cached["result"])
+            stats["cache"] += 1
+            print(f"♻️ {fingerprint}: cached → {path}")
+            continue
+        match, similarity = (None, 0.0) if args.force else library.lookup(html, args.goal, args.url)
+        if match and similarity >= args.threshold:
+            path = write_scraper(args.out, fingerprint, pages, args.goal, f"library {match['id']} (similarity {similarity:.2f})", match["result"])
+            stats["library"] += 1
+            print(f"🧩 {fingerprint}: library {match['id']} ({similarity:.2f}) → {path}")
+            continue
+        pending[fingerprint] = html
+    save_scraper_cache(cache)
+
+    if pending:
+        api_key = load_api_key()
+        if not api_key:
+            sys.exit(f"❌ GEMINI_API_KEY not set in the environment or .streamlit/secrets.toml ({len(pending)} templates need generation)")
+        configure_rate_limit(args.rpm)
+        with ThreadPoolExecutor(max_workers=args.workers) as pool:
+            futures = {pool.submit(generate, html, args.goal, args.url, api_key): fp for fp, html in pending.items()}
+            for future in as_completed(futures):
+                fingerprint = futures[future]
+                try:
+                    result = future.result()
+                except Exception as e:
+                    stats["failed"] += 1
+                    print(f"❌ {fingerprint}: {e}", file=sys.stderr)
+                    continue
+                # Cache and library are only touched from this thread
+                store_cached_scraper(cache, fingerprint, args.goal, args.url, result)
+                save_scraper_cache(cache)
+                library.add(pending[fingerprint], args.goal, args.url, result)
+                save_scraper_library(library)
+                path = write_scraper(args.out, fingerprint, groups[fingerprint], args.goal, "generated", result)
+                stats["generated"] += 1
+                print(f"🤖 {fingerprint}: generated → {path}")
+
+    print(
+        f"\nDone in {time.perf_counter() - started:.0f}s: {len(groups)} templates for {page_count} pages, "
+        f"{stats['cache']} cache hits, {stats['library']} library reuses, {stats['generated']} generated, {stats['failed']} failed"
+    )
+    sys.exit(1 if stats["failed"] else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,158 @@
+import json
+import os
+import re
+from datetime import datetime
+from urllib.parse import urlparse
+
+from dom_fingerprint import extract_features, fingerprint_features
+
+# Constants
+LIBRARY_FILE = "sessions/scraper_library.json"
+LIBRARY_VERSION = 1
+# Page source kept per scraper history session, longer pages are cut at this length
+HISTORY_SOURCE_CHARS = 1000
+
+# Weights of the similarity score, the DOM dominates since the code is written against it
+DOM_WEIGHT = 0.7
+GOAL_WEIGHT = 0.2
+DOMAIN_WEIGHT = 0.1
+
+CODE_BLOCK_RE = re.compile(r"```[ \t]*(python|py)?[ \t]*\n(.*?)```", re.DOTALL | re.IGNORECASE)
+SELECTOR_PATTERNS = [
+    # driver.find_element(By.CSS_SELECTOR, ".price")
+    re.compile(r"By\.(CSS_SELECTOR|XPATH|ID|CLASS_NAME|TAG_NAME|NAME|LINK_TEXT|PARTIAL_LINK_TEXT)\s*,\s*(?P<q>['\"])(?P<sel>.+?)(?P=q)"),
+    # driver.find_elements_by_css_selector(".price") in older Selenium code
+    re.compile(r"find_elements?_by_(?P<kind>\w+)\(\s*(?P<q>['\"])(?P<sel>.+?)(?P=q)"),
+    # soup.select(".item > a") / soup.select_one("#title")
+    re.compile(r"\.select(?:_one)?\(\s*(?P<q>['\"])(?P<sel>.+?)(?P=q)"),
+    # soup.find_all("div", class_="item")
+    re.compile(r"\.find(?:_all)?\(\s*(?P<q>['\"])(?P<sel>[\w-]+)(?P=q)(?:\s*,\s*class_\s*=\s*(?P<q2>['\"])(?P<cls>.+?)(?P=q2))?"),
+]
+
+
+def url_domain(url: str) -> str:
+    if not url:
+        return ""
+    netloc = urlparse(url if "://" in url else f"https://{url}").netloc.lower()
+    return netloc[4:] if netloc.startswith("www.") else netloc
+
+
+# Split a generated markdown answer into its code and selector set
+def parse_scraper_result(result: str) -> dict:
+    blocks = [m.group(2).strip() for m in CODE_BLOCK_RE.finditer(result or "")]
+    code = max(blocks, key=len) if blocks else ""
+    selectors = []
+    for pattern in SELECTOR_PATTERNS:
+        for match in pattern.finditer(code):
+            groups = match.groupdict()
+            selector = groups["sel"]
+            if groups.get("cls"):
+                selector = f"{selector}.{groups['cls'].replace(' ', '.')}"
+            if selector not in selectors:
+                selectors.append(selector)
+    return {"code": code, "selectors": selectors}
+
+
+def _tokens(text: str) -> set:
+    return set(re.findall(r"[a-z0-9]+", (text or "").lower()))
+
+
+def _jaccard(a: set, b: set) -> float:
+    if not a and not b:
+        return 1.0
+    return len(a & b) / len(a | b)
+
+
+class ScraperLibrary:
+    def __init__(self, entries=None):
+        self.entries = []
+        self.by_domain = {}
+        self.by_signature = {}
+        for entry in entries or []:
+            self._index(entry)
+
+    def _index(self, entry: dict):
+        entry["_features"] = set(entry.get("features", []))
+        self.entries.append(entry)
+        self.by_domain.setdefault(entry.get("domain", ""), []).append(entry)
+        self.by_signature.setdefault(entry["signature"], []).append(entry)
+
+    def add(self, html: str, goal: str, url: str, result: str, timestamp: str = None) -> dict:
+        features = extract_features(html)
+        parsed = parse_scraper_result(result)
+        entry = {
+            "id": f"s{len(self.entries) + 1:05d}",
+            "timestamp": timestamp or datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+            "domain": url_domain(url),
+            "url": url,
+            "signature": fingerprint_features(features),
+            "features": sorted(features),
+            "goal": goal,
+            "code": parsed["code"],
+            "selectors": parsed["selectors"],
+            "result": result,
+        }
+        self._index(entry)
+        return entry
+
+    def score(self, entry: dict, features: set, goal: str, domain: str) -> float:
+        score = DOM_WEIGHT * _jaccard(features, entry["_features"])
+        score += GOAL_WEIGHT * _jaccard(_tokens(goal), _tokens(entry["goal"]))
+        if domain and domain == entry.get("domain"):
+            score += DOMAIN_WEIGHT
+        elif not domain and not entry.get("domain"):
+            score += DOMAIN_WEIGHT / 2
+        return round(score, 3)
+
+    # Closest stored scraper for a page, checked before any model call
+    def lookup(self, html: str, goal: str, url: str = ""):
+        features = extract_features(html)
+        signature = fingerprint_features(features)
+        domain = url_domain(url)
+        candidates = self.by_signature.get(signature, []) + self.by_domain.get(domain, [])
+        # Small libraries are cheap to scan in full, which also catches cross-domain templates
+        if not candidates or len(self.entries) <= 500:
+            candidates = self.entries
+        best, best_score = None, 0.0
+        for entry in {id(e): e for e in candidates if e.get("code")}.values():
+            score = self.score(entry, features, goal, domain)
+            if score > best_score:
+                best, best_score = entry, score
+        return best, best_score
+
+    def to_dict(self) -> dict:
+        return {
+            "version": LIBRARY_VERSION,
+            "entries": [{k: v for k, v in e.items() if not k.startswith("_")} for e in self.entries],
+        }
+
+
+# Persistence, same layout as the session history files
+def load_scraper_library() -> ScraperLibrary:
+    if os.path.exists(LIBRARY_FILE):
+        with open(LIBRARY_FILE, "r") as f:
+            data = json.load(f)
+        if data.get("version") == LIBRARY_VERSION:
+            return ScraperLibrary(data.get("entries", []))
+    return ScraperLibrary()
+
+
+def save_scraper_library(library: ScraperLibrary):
+    os.makedirs(os.path.dirname(LIBRARY_FILE), exist_ok=True)
+    with open(LIBRARY_FILE, "w") as f:
+        json.dump(library.to_dict(), f, indent=2)
+
+
+# Seed the library from sessions/scraper_history.json. Sessions whose source was cut at
+# HISTORY_SOURCE_CHARS are skipped: features of a truncated page would match the wrong templates.
+def import_scraper_history(library: ScraperLibrary, history: list) -> int:
+    known = {(e["timestamp"], e["goal"]) for e in library.entries}
+    added = 0
+    for session in history:
+        if (session.get("timestamp"), session.get("goal")) in known or not session.get("result"):
+            continue
+        if len(session.get("source", "")) >= HISTORY_SOURCE_CHARS:
+            continue
+        library.add(session.get("source", ""), session.get("goal", ""), session.get("url", ""), session["result"], session.get("timestamp"))
+        added += 1
+    return added
@@ -4,7 +4,7 @@ import os
 import json
 from datetime import datetime
 from agno.agent import Agent
-from agno.models.google import Gemini
+from llm import default_api_key, gemini_model
 
 # Constants
 SAVE_FILE = "sessions/scraper_history.json"
@@ -17,7 +17,7 @@ logging.basicConfig(level=logging.ERROR)
 logger = logging.getLogger(__name__)
 
 # API Key
-gemini_api_key = st.secrets.get("GEMINI_API_KEY")
+gemini_api_key = st.secrets.get("GEMINI_API_KEY") or default_api_key()
 
 # Load/Save Session Functions
 def save_scraper_history(history):
@@ -37,7 +37,7 @@ if "scraper_history" not in st.session_state:
 # Initialize Agent
 def initialize_scraper_agent(api_key: str) -> Agent:
     try:
-        model = Gemini(id="gemini-2.0-flash", api_key=api_key)
+        model = gemini_model("gemini-2.0-flash", api_key)
         agent = Agent(
             model=model,
             name="Scraper Agent",
@@ -4,7 +4,10 @@ import os
 import json
 from datetime import datetime
 from agno.agent import Agent
-from agno.models.google import Gemini
+from dom_fingerprint import dom_fingerprint, load_scraper_cache, save_scraper_cache, lookup_cached_scraper, store_cached_scraper
+from scraper_library import HISTORY_SOURCE_CHARS, load_scraper_library, save_scraper_library, import_scraper_history
+from scraper_agent import create_scraper_agent, build_scraper_prompt
+from llm import default_api_key
 
 # Constants
 SAVE_FILE = "sessions/scraper_history.json"
@@ -17,7 +20,7 @@ logging.basicConfig(level=logging.ERROR)
 logger = logging.getLogger(__name__)
 
 # Load API Key
-gemini_api_key = st.secrets.get("GEMINI_API_KEY")
+gemini_api_key = st.secrets.get("GEMINI_API_KEY") or default_api_key()
 
 # Save and Load Functions
 def save_scraper_history(history):
@@ -34,29 +37,18 @@ def load_scraper_history():
 if "scraper_history" not in st.session_state:
     st.session_state.scraper_history = load_scraper_history()
 
+if "scraper_cache" not in st.session_state:
+    st.session_state.scraper_cache = load_scraper_cache()
+
+if "scraper_library" not in st.session_state:
+    st.session_state.scraper_library = load_scraper_library()
+    if import_scraper_history(st.session_state.scraper_library, st.session_state.scraper_history):
+        save_scraper_library(st.session_state.scraper_library)
+
 # Initialize Scraper Agent
 def initialize_scraper_agent(api_key: str) -> Agent:
     try:
-        model = Gemini(id="gemini-2.0-flash", api_key=api_key)
-        return Agent(
-            model=model,
-            name="Smart Scraper Agent",
-            instructions=[
-                "You are an expert web scraper generator using Python + Selenium.",
-                "You'll be given HTML (or a webpage dump) and a user-described goal.",
-                "Your task is to understand what the user wants, identify correct DOM elements, and write a working scraper.",
-                "**Always do the following:**",
-                "1. Identify the target elements (e.g., links, prices, titles, etc.) even if not explicitly mentioned.",
-                "2. Analyze the HTML and suggest the best tag/class/ID selectors.",
-                "3. Generate clean Selenium code. Use BeautifulSoup optionally.",
-                "**Output Format:**",
-                "### 🧠 Inferred Task\nSummarize the user's goal and target elements.",
-                "### 📋 Scraping Plan\nExplain your approach to selecting DOM elements.",
-                "### 🔧 Selenium Code\nFull working Python code using Selenium.",
-                "### ⚠️ Notes\nMention any JS rendering issues, login needs, or site-specific tricks."
-            ],
-            markdown=True
-        )
+        return create_scraper_agent(api_key)
     except Exception as e:
         st.error(f"❌ Error initializing agent: {str(e)}")
         return None
@@ -95,43 +87,65 @@ scrape_goal = st.text_area("🎯 What do you want to scrape?", height=150, place
 # Optional URL
 url_sample = st.text_input("🔗 Sample URL (optional)", placeholder="https://example.com/products")
 
+# Cache options
+force_regenerate = st.checkbox("🔁 Ignore cached scraper for this page template", value=False)
+reuse_threshold = st.slider("🧩 Reuse the closest library scraper at similarity ≥", min_value=0.5, max_value=1.0, value=0.9, step=0.05)
+
 # Build button
 if st.button("🛠️ Build Smart Scraper", type="primary"):
-    if not gemini_api_key:
+    cached, match, similarity = None, None, 0.0
+    fingerprint = dom_fingerprint(source_html) if source_html else None
+    if source_html and scrape_goal and not force_regenerate:
+        cached = lookup_cached_scraper(st.session_state.scraper_cache, fingerprint, scrape_goal)
+        if not cached:
+            # Lookup-before-generate against the indexed library
+            match, similarity = st.session_state.scraper_library.lookup(source_html, scrape_goal, url_sample)
+
+    if cached:
+        save_scraper_cache(st.session_state.scraper_cache)
+        st.subheader("📦 Generated Scraper")
+        st.info(f"♻️ Reused scraper for DOM template `{fingerprint}` (built {cached['timestamp']}, {cached['hits']} reuse(s)).")
+        st.markdown(cached["result"])
+    elif match and similarity >= reuse_threshold:
+        st.subheader("📦 Generated Scraper")
+        st.info(f"🧩 Reused library scraper `{match['id']}` from {match['domain'] or 'an unknown domain'} (similarity {similarity:.2f}).")
+        if match["selectors"]:
+            st.markdown("**Selectors:** " + ", ".join(f"`{sel}`" for sel in match["selectors"]))
+        st.markdown(match["result"])
+    elif not gemini_api_key:
         st.error("❌ Gemini API Key not found.")
     elif not source_html or not scrape_goal:
         st.warning("⚠️ Please provide both HTML source and scraping goal.")
     else:
+        if match:
+            with st.expander(f"🧩 Closest library scraper `{match['id']}` (similarity {similarity:.2f}, below threshold)"):
+                st.code(match["code"], language="python")
+
         agent = initialize_scraper_agent(gemini_api_key)
         if agent:
-            # Escape triple backticks using tags to avoid SyntaxError
-            html_display = f"[START HTML]\n{source_html[:4000]}\n[END HTML]"
-            prompt = f"""You are a Selenium scraper builder.
-
-Below is a section of the HTML source code of the page:
-{html_display}
-
-User's scraping goal:
-"{scrape_goal}"
-
-Sample URL (if provided): {url_sample if url_sample else "N/A"}
-
-Please infer what to scrape, explain your logic, and return a working Selenium scraper.
-"""
+            prompt = build_scraper_prompt(source_html, scrape_goal, url_sample)
             with st.spinner("🤖 Generating scraping logic..."):
                 result = agent.run(message=prompt).content
                 st.subheader("📦 Generated Scraper")
+                st.caption(f"🧬 DOM template: `{fingerprint}`")
                 st.markdown(result)
 
                 session_data = {
                     "timestamp": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
-                    "source": source_html[:1000],
+                    "source": source_html[:HISTORY_SOURCE_CHARS],
                     "goal": scrape_goal,
                     "url": url_sample,
+                    "fingerprint": fingerprint,
                     "result": result
                 }
                 st.session_state.scraper_history.append(session_data)
                 save_scraper_history(st.session_state.scraper_history)
+
+                store_cached_scraper(st.session_state.scraper_cache, fingerprint, scrape_goal, url_sample, result)
+                save_scraper_cache(st.session_state.scraper_cache)
+
+                st.session_state.scraper_library.add(source_html, scrape_goal, url_sample, result, session_data["timestamp"])
+                save_scraper_library(st.session_state.scraper_library)
         else:
             st.error("⚠️ Could not initialize the agent.")
 
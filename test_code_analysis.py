@@ -0,0 +1,56 @@
+from code_analysis import analyze_python_code, code_fingerprint
+
+MAX_DEPTH = """
+class Solution:
+    def maxDepth(self, root):
+        best = 0
+
+        def dfs(node, depth):
+            nonlocal best
+            if not node:
+                return depth
+            best = max(best, depth)
+            return max(dfs(node.left, depth + 1), dfs(node.right, depth + 1))
+
+        return dfs(root, 0)
+"""
+
+
+# An outer local used inside a closure must not collide with the closure's own locals
+def test_closure_locals_keep_distinct_names():
+    broken = MAX_DEPTH.replace("                return depth", "                return root")
+    assert code_fingerprint(MAX_DEPTH) != code_fingerprint(broken)
+
+
+def test_renamed_locals_share_fingerprint():
+    renamed = MAX_DEPTH.replace("best", "answer").replace("depth", "level").replace("node", "current")
+    assert code_fingerprint(MAX_DEPTH) == code_fingerprint(renamed)
+
+
+KEYWORD_CALL = """
+def f(a, b):
+    return a - b
+
+print(f(b=1, a=2))
+"""
+
+
+# Keyword arguments follow the parameters they name, swapped parameters are different code
+def test_keyword_calls_follow_parameter_order():
+    swapped = KEYWORD_CALL.replace("def f(a, b)", "def f(b, a)")
+    assert code_fingerprint(KEYWORD_CALL) != code_fingerprint(swapped)
+    renamed = KEYWORD_CALL.replace("a", "x").replace("b", "y")
+    assert code_fingerprint(KEYWORD_CALL) == code_fingerprint(renamed)
+
+
+def test_lambda_parameters_are_renamed():
+    code = "def f(xs):\n    return sorted(xs, key=lambda item: -item)\n"
+    assert code_fingerprint(code) == code_fingerprint(code.replace("item", "v"))
+    assert code_fingerprint(code) != code_fingerprint(code.replace("-item", "-xs"))
+
+
+# Memoizing decorators count whether they are called or not
+def test_bare_cache_decorators_are_memoization():
+    for decorator in ("@cache", "@functools.cache", "@lru_cache", "@functools.lru_cache(maxsize=None)"):
+        code = f"{decorator}\ndef fib(n):\n    return n if n < 2 else fib(n - 1) + fib(n - 2)\n"
+        assert "memoization" in analyze_python_code(code)["functions"][0]["structures"], decorator
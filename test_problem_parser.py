@@ -0,0 +1,23 @@
+from problem_parser import max_input_size, parse_problem
+
+GRID_PROBLEM = """Minimum Path Sum
+Given a m x n grid filled with non-negative numbers, find a path from top left to bottom right.
+
+Example 1:
+Input: grid = [[1,3,1],[1,5,1],[4,2,1]]
+Output: 7
+
+Constraints:
+m == grid.length
+n == grid[i].length
+1 <= m, n <= 200
+0 <= grid[i][j] <= 200
+"""
+
+
+# A bound shared by several variables ("1 <= m, n <= 200") applies to each of them
+def test_multi_variable_size_constraint():
+    assert max_input_size(GRID_PROBLEM) == 200
+    parsed = parse_problem(GRID_PROBLEM)
+    assert parsed["max_n"] == 200
+    assert parsed["value_bound"] == 200